@@ -0,0 +1,55 @@
+"""Сравнение пропускной способности пакетного и поштучного подбора контрпиков.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_batch.py --teams 500 --team-size 4
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+
+from system import HeroWinrateSystem
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--teams', type=int, default=500)
+    parser.add_argument('--team-size', type=int, default=4)
+    parser.add_argument('--bans', type=int, default=3)
+    parser.add_argument('--top-n', type=int, default=10)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    system = HeroWinrateSystem()
+    rng = random.Random(args.seed)
+    teams = [rng.sample(system.hero_names, args.team_size) for _ in range(args.teams)]
+    bans = [rng.sample(system.hero_names, args.bans) for _ in range(args.teams)]
+
+    started = time.perf_counter()
+    single = []
+    for team, exclude in zip(teams, bans):
+        best = system.find_best_heroes(team, top_n=args.top_n, exclude_heroes=exclude)
+        single.append((best, {hero: system.get_hero_details(hero, team) for hero, _ in best}))
+    single_elapsed = time.perf_counter() - started
+
+    started = time.perf_counter()
+    batch = system.find_best_heroes_batch(teams, bans, top_n=args.top_n)
+    batch_elapsed = time.perf_counter() - started
+
+    # Пакетный подсчет складывает очки в том же порядке, поэтому сравниваем точно
+    same = sum(
+        result['best_heroes'] == best and all(result['details'][hero] == details[hero] for hero, _ in best)
+        for result, (best, details) in zip(batch, single)
+    )
+
+    print(f"Команд: {args.teams}, размер команды: {args.team_size}, героев: {system.num_heroes}")
+    print(f"Поштучно: {single_elapsed:.3f} с ({args.teams / single_elapsed:,.0f} команд/с)")
+    print(f"Пакетно:  {batch_elapsed:.3f} с ({args.teams / batch_elapsed:,.0f} команд/с)")
+    print(f"Совпадение топов: {same}/{args.teams}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Сетевой режим парсера против разбора карточек на записанном HAR, без сети.
+
+Запуск из корня репозитория (нужен chromium для playwright):
+    python benchmarks/bench_capture.py
+    python benchmarks/bench_capture.py --workers 4 --runs 3
+"""
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'parser', 'fixtures'))
+sys.path.insert(0, os.path.join(ROOT, 'parser'))
+
+from main import scrape
+from make_har import FIXTURE_URL, build_har
+
+
+async def run(har: str, mode: str, workers: int):
+    started = time.perf_counter()
+    data, failed = await scrape(FIXTURE_URL, workers=workers, har=har, mode=mode)
+    return time.perf_counter() - started, data, failed
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--workers', type=int, default=2)
+    parser.add_argument('--runs', type=int, default=3)
+    args = parser.parse_args()
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        har = os.path.join(tmp, 'matchups.har')
+        build_har(har)
+
+        results = {}
+        for mode in ('dom', 'network'):
+            timings = []
+            for _ in range(args.runs):
+                elapsed, data, failed = await run(har, mode, args.workers)
+                timings.append(elapsed)
+            results[mode] = data
+            print(f"{mode:>8}: {min(timings) * 1000:8.1f} мс (лучший из {args.runs}), "
+                  f"героев {len(data)}, не собрано {len(failed)}")
+
+        print("Данные совпадают:", results['dom'] == results['network'])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
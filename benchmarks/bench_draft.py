@@ -0,0 +1,60 @@
+"""Скорость поиска в драфте: узлы в секунду, попадания в таблицу транспозиций, глубина.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_draft.py
+    python benchmarks/bench_draft.py --budgets 0.1 0.5 1 --width 6 --heroes 200
+"""
+import argparse
+import os
+import random
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from draft import DRAFT_FORMATS, parse_format
+from matrix import MatchupMatrix
+from synth import generate_winrates
+from system import Dataset, HeroWinrateSystem
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--budgets', type=float, nargs='+', default=[0.1, 0.5, 1.0])
+    parser.add_argument('--width', type=int, default=8)
+    parser.add_argument('--positions', type=int, default=5, help='случайных начальных позиций на формат')
+    parser.add_argument('--heroes', type=int, help='синтетический ростер такого размера вместо winrates.json')
+    parser.add_argument('--strategy', default='mean')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    system = HeroWinrateSystem()
+    if args.heroes:
+        system.swap_dataset(Dataset(MatchupMatrix.from_dict(generate_winrates(args.heroes, seed=args.seed))))
+    rng = random.Random(args.seed)
+
+    print(f"Героев: {system.num_heroes}, ширина: {args.width}, стратегия: {args.strategy}")
+    print(f"{'формат':>8} {'бюджет':>7} {'узлов/с':>9} {'TT хиты':>8} {'глубина':>8} {'полный':>7} {'время, мс':>10}")
+    for name, spec in DRAFT_FORMATS.items():
+        steps = parse_format(spec)
+        # Начальные позиции: пустой драфт и драфты с несколькими сделанными ходами
+        positions = [[]] + [rng.sample(system.hero_names, rng.randint(1, len(steps) - 1))
+                            for _ in range(args.positions - 1)]
+        for budget in args.budgets:
+            nodes = hits = 0
+            elapsed = 0.0
+            depth_ratio = []
+            complete = 0
+            for history in positions:
+                result = system.solve_draft(name, history, args.strategy, time_budget=budget, width=args.width)
+                nodes += result['nodes']
+                hits += result['tt_hits']
+                elapsed += result['elapsed']
+                depth_ratio.append(f"{result['depth']}/{len(steps) - len(history)}")
+                complete += result['complete']
+            print(f"{name:>8} {budget:7.2f} {nodes / elapsed:9,.0f} {hits / max(nodes, 1):8.1%} "
+                  f"{depth_ratio[0]:>8} {complete:>3}/{len(positions):<3} {elapsed / len(positions) * 1000:10.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Прогон потоков нажатий клавиш через инлайн-режим.
+
+Каждый пользователь набирает состав противника по букве, и на каждое
+нажатие приходит инлайн-запрос с уже набранным текстом. Замеряется:
+
+- engine: задержка InlineCompleter.suggest на каждом нажатии, с кешами
+  частичных сумм и результатов и без них (каждый запрос с нуля);
+- bot: задержка от получения обновления до answerInlineQuery через
+  TelegramBot с поддельными Redis и Telegram, с темпом набора
+  --keystroke-ms; вытесненные следующим нажатием запросы не отвечаются,
+  но последний запрос каждого пользователя должен получить ответ.
+
+p99 сравнивается с бюджетом INLINE_BUDGET_MS (--budget-ms).
+
+Запуск из корня репозитория:
+    python benchmarks/bench_inline.py
+    python benchmarks/bench_inline.py --heroes 10000 --density 0.02 --users 200
+"""
+import argparse
+import asyncio
+import logging
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fakes import FakeAsyncRedis, FakeTelegramRequest
+from synth import write_winrates
+from webhook_replay import percentile
+
+import bot as bot_module
+from inline import InlineCompleter
+from system import HeroWinrateSystem
+from telegram import Update
+
+
+def keystroke_streams(hero_names, users: int, seed: int):
+    """Для каждого пользователя - тексты запроса после каждого нажатия"""
+    rng = random.Random(seed)
+    first_words = {}
+    for hero in hero_names:
+        word = hero.split()[0].lower()
+        first_words[word] = first_words.get(word, 0) + 1
+    streams = []
+    for _ in range(users):
+        team = rng.sample(hero_names, rng.randint(1, min(4, len(hero_names))))
+        # Имя набирается до однозначного первого слова или целиком
+        text = ', '.join(hero.split()[0].lower() if first_words[hero.split()[0].lower()] == 1 else hero.lower()
+                         for hero in team)
+        streams.append([text[:i] for i in range(1, len(text) + 1)])
+    return streams
+
+
+def summary(latencies) -> str:
+    return (f"p50 {percentile(latencies, 0.5) * 1000:7.3f} мс, p99 {percentile(latencies, 0.99) * 1000:7.3f} мс, "
+            f"макс {max(latencies) * 1000:7.3f} мс")
+
+
+def run_engine(system, streams, strategy: str, budget: float, cached: bool):
+    size = 256 if cached else 0
+    completer = InlineCompleter(system, sums_cache_size=size, results_cache_size=size * 8)
+    latencies = []
+    for stream in streams:
+        for text in stream:
+            started = time.perf_counter()
+            completer.suggest(text, strategy, budget=budget)
+            latencies.append(time.perf_counter() - started)
+    return latencies
+
+
+async def run_bot(system, streams, keystroke: float, telegram_latency: float, seed: int):
+    os.environ['DATASET_RELOAD_CHANNEL'] = ''
+    os.environ['DATASET_POLL_INTERVAL'] = '0'
+    os.environ['RATE_LIMIT'] = '0'
+    os.environ['METRICS_PORT'] = '0'
+    request = FakeTelegramRequest(latency=telegram_latency)
+    bot = bot_module.TelegramBot('123456:FAKE', client=FakeAsyncRedis(), winrate_system=system)
+    application = bot.create_application(concurrent_updates=64, request=request)
+    await application.initialize()
+    await application.start()
+
+    rng = random.Random(seed)
+    sent = {}  # id запроса -> время отправки
+    last_ids = []
+
+    async def type_stream(user_id: int, stream):
+        await asyncio.sleep(rng.uniform(0, keystroke))
+        query_id = None
+        for text in stream:
+            query_id = f"{user_id}:{len(text)}"
+            update = Update.de_json({
+                'update_id': len(sent) + 1,
+                'inline_query': {'id': query_id, 'query': text, 'offset': '',
+                                 'from': {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}}
+            }, application.bot)
+            sent[query_id] = time.perf_counter()
+            await application.update_queue.put(update)
+            await asyncio.sleep(keystroke * rng.uniform(0.5, 1.5))
+        last_ids.append(query_id)
+
+    await asyncio.gather(*(type_stream(user_id, stream) for user_id, stream in enumerate(streams, 1)))
+    # Ждем ответов на последние запросы
+    deadline = time.perf_counter() + 10
+    while time.perf_counter() < deadline and not all(query_id in request.inline_answers for query_id in last_ids):
+        await asyncio.sleep(0.01)
+
+    await application.stop()
+    await application.shutdown()
+
+    answers = request.inline_answers
+    latencies = [answers[query_id][0] - sent_at for query_id, sent_at in sent.items() if query_id in answers]
+    return {
+        'queries': len(sent),
+        'answered': len(latencies),
+        'last_answered': sum(query_id in answers for query_id in last_ids),
+        'users': len(last_ids),
+        'latencies': latencies
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--heroes', type=int, help='синтетический датасет такого размера вместо настоящего')
+    parser.add_argument('--density', type=float, default=0.3)
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--strategy', default=os.getenv('SCORING_STRATEGY', 'mean'))
+    parser.add_argument('--budget-ms', type=float, default=float(os.getenv('INLINE_BUDGET_MS', 50)))
+    parser.add_argument('--keystroke-ms', type=float, default=120, help='средний интервал между нажатиями')
+    parser.add_argument('--telegram-latency-ms', type=float, default=30)
+    parser.add_argument('--mode', choices=['engine', 'bot', 'both'], default='both')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    logging.disable(logging.INFO)
+    budget = args.budget_ms / 1000
+    with tempfile.TemporaryDirectory() as tmp:
+        if args.heroes:
+            path = os.path.join(tmp, 'winrates.json')
+            write_winrates(path, args.heroes, args.density, args.seed)
+            system = HeroWinrateSystem(path, cache_size=0)
+        else:
+            system = HeroWinrateSystem(cache_size=0)
+
+    streams = keystroke_streams(system.hero_names, args.users, args.seed)
+    print(f"Героев: {system.num_heroes}, пользователей: {len(streams)}, "
+          f"нажатий: {sum(len(stream) for stream in streams)}, бюджет {args.budget_ms:.0f} мс")
+
+    failed = False
+    if args.mode in ('engine', 'both'):
+        for cached, title in ((False, 'каждый запрос с нуля'), (True, 'с частичными суммами')):
+            latencies = run_engine(system, streams, args.strategy, budget, cached)
+            print(f"  engine, {title:>21}: {summary(latencies)}")
+        failed |= percentile(latencies, 0.99) > budget
+
+    if args.mode in ('bot', 'both'):
+        result = asyncio.run(run_bot(system, streams, args.keystroke_ms / 1000, args.telegram_latency_ms / 1000,
+                                     args.seed))
+        print(f"  bot: отвечено {result['answered']} из {result['queries']} запросов, "
+              f"последний запрос отвечен у {result['last_answered']} из {result['users']} пользователей")
+        if result['latencies']:
+            print(f"  bot, включая {args.telegram_latency_ms:.0f} мс Bot API: {summary(result['latencies'])}")
+        failed |= result['last_answered'] < result['users']
+
+    print("p99 превышает бюджет или ответы потеряны" if failed else "В пределах бюджета")
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+"""Нагрузочный тест задержки обработчиков при синхронном и асинхронном Redis.
+
+Обновления приходят с заданной частотой, каждый обработчик делает те же
+обращения к Redis, что и handle_message с клавиатурой банов. Без
+--redis-url задержка сети к Redis имитируется: синхронный клиент
+блокирует цикл событий на это время, асинхронный - нет.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_redis_latency.py --rate 500 --duration 3 --latency-ms 2
+    python benchmarks/bench_redis_latency.py --redis-url redis://localhost:6379/0
+"""
+import argparse
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+
+from redis_helper import AsyncRedisHelper, RedisHelper
+from system import HeroWinrateSystem
+
+
+class _Script:
+    def __call__(self, *args, **kwargs):
+        return 0
+
+
+class SlowRedis:
+    """Синхронный клиент с фиксированной сетевой задержкой"""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+
+    def register_script(self, script):
+        return _Script()
+
+    def smembers(self, key):
+        time.sleep(self.latency)
+        return {'Achilles', 'Buffy'}
+
+    def smismember(self, key, members):
+        time.sleep(self.latency)
+        return [0] * len(members)
+
+
+class AsyncSlowRedis(SlowRedis):
+    """Асинхронный клиент с той же задержкой"""
+
+    async def smembers(self, key):
+        await asyncio.sleep(self.latency)
+        return {'Achilles', 'Buffy'}
+
+    async def smismember(self, key, members):
+        await asyncio.sleep(self.latency)
+        return [0] * len(members)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def run(helper, system, rate: float, duration: float):
+    enemy_team = ['Alice', 'Ciri', 'Robin Hood']
+    latencies = []
+
+    async def handler(arrived: float):
+        if isinstance(helper, AsyncRedisHelper):
+            banned = await helper.get_bans_list(1)
+            await helper.get_banned_flags(1, system.hero_names[:20])
+        else:
+            banned = helper.get_bans_list(1)
+            helper.get_banned_flags(1, system.hero_names[:20])
+        system.find_best_heroes(enemy_team, top_n=10, exclude_heroes=banned)
+        latencies.append(time.perf_counter() - arrived)
+
+    tasks = []
+    started = time.perf_counter()
+    count = int(rate * duration)
+    for i in range(count):
+        # Обновления приходят по расписанию независимо от того, занят ли цикл
+        delay = started + i / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(handler(started + i / rate)))
+    await asyncio.gather(*tasks)
+    return latencies
+
+
+def report(name, latencies):
+    print(f"{name:>6}: p50 {percentile(latencies, 0.5) * 1000:8.2f} мс, "
+          f"p99 {percentile(latencies, 0.99) * 1000:8.2f} мс, "
+          f"max {max(latencies) * 1000:8.2f} мс")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rate', type=float, default=300, help='обновлений в секунду')
+    parser.add_argument('--duration', type=float, default=3)
+    parser.add_argument('--latency-ms', type=float, default=2, help='имитируемая задержка Redis')
+    parser.add_argument('--redis-url', help='использовать настоящий Redis вместо имитации')
+    args = parser.parse_args()
+
+    system = HeroWinrateSystem()
+    if args.redis_url:
+        import redis
+        import redis.asyncio
+
+        sync_helper = RedisHelper(redis.Redis.from_url(args.redis_url, decode_responses=True))
+        async_client = redis.asyncio.Redis(connection_pool=redis.asyncio.BlockingConnectionPool.from_url(
+            args.redis_url, decode_responses=True, max_connections=20))
+        async_helper = AsyncRedisHelper(async_client)
+    else:
+        sync_helper = RedisHelper(SlowRedis(args.latency_ms / 1000))
+        async_helper = AsyncRedisHelper(AsyncSlowRedis(args.latency_ms / 1000))
+
+    print(f"Частота: {args.rate:.0f} обновлений/с, длительность: {args.duration} с")
+    report('sync', asyncio.run(run(sync_helper, system, args.rate, args.duration)))
+    report('async', asyncio.run(run(async_helper, system, args.rate, args.duration)))
+
+
+if __name__ == "__main__":
+    main()
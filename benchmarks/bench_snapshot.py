@@ -0,0 +1,102 @@
+"""Время запуска и память при загрузке датасета из JSON и из бинарного снимка.
+
+Замеряется готовый к запросам Dataset: матрица, матрицы стратегий
+SCORING_STRATEGIES и списки контрпиков. Каждый замер - отдельный процесс.
+Для оценки общих страниц запускается несколько реплик одновременно и
+суммируется их PSS: страницы memmap делятся между процессами, а
+разобранный JSON у каждого свой. SNAPSHOT_STRATEGIES добавляет в снимок
+матрицы стратегий.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_snapshot.py
+    python benchmarks/bench_snapshot.py --heroes 2000 --density 0.5 --replicas 4
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from matrix import MatchupMatrix
+from snapshot import SNAPSHOT_STRATEGIES, write_snapshot
+from synth import write_winrates
+
+# Код замера внутри процесса-реплики: загрузка, затем память из /proc
+PROBE = r'''
+import json, sys, time
+sys.path.insert(0, sys.argv[1])
+from matrix import MatchupMatrix
+from system import Dataset
+started = time.perf_counter()
+dataset = Dataset(MatchupMatrix.{loader}(sys.argv[2]))
+dataset.matrix.average_winrates([0, 1, 2])
+elapsed = time.perf_counter() - started
+
+def read_kb(path, field):
+    with open(path) as fp:
+        for line in fp:
+            if line.startswith(field + ':'):
+                return int(line.split()[1])
+    return 0
+
+print(json.dumps({{
+    'load_ms': elapsed * 1000,
+    'rss_kb': read_kb('/proc/self/status', 'VmRSS'),
+    'pss_kb': read_kb('/proc/self/smaps_rollup', 'Pss'),
+}}), flush=True)
+sys.stdin.read()
+'''
+
+
+def measure(loader: str, path: str, replicas: int) -> dict:
+    """Запускает реплики одновременно, пока все живы - собирает их замеры"""
+    code = PROBE.format(loader=loader)
+    processes = [
+        subprocess.Popen([sys.executable, '-c', code, os.path.join(ROOT, 'bot'), path],
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE, text=True)
+        for _ in range(replicas)
+    ]
+    results = [json.loads(process.stdout.readline()) for process in processes]
+    for process in processes:
+        process.communicate('')
+    return {
+        'load_ms': sum(r['load_ms'] for r in results) / replicas,
+        'rss_kb': sum(r['rss_kb'] for r in results) / replicas,
+        'pss_total_kb': sum(r['pss_kb'] for r in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--data', default=os.path.join(ROOT, 'parser', 'winrates.json'))
+    parser.add_argument('--heroes', type=int, help='вместо --data сгенерировать датасет такого размера')
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--replicas', type=int, default=4)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, 'winrates.json')
+        if args.heroes:
+            write_winrates(json_path, args.heroes, args.density)
+        else:
+            with open(args.data, 'rb') as src, open(json_path, 'wb') as dst:
+                dst.write(src.read())
+        snapshot_path = os.path.join(tmp, 'winrates.bin')
+        write_snapshot(snapshot_path, MatchupMatrix.from_json(json_path))
+
+        json_size, snapshot_size = os.path.getsize(json_path), os.path.getsize(snapshot_path)
+        print(f"JSON: {json_size / 1024:,.0f} КБ, снимок: {snapshot_size / 1024:,.0f} КБ "
+              f"({snapshot_size / json_size:.0%} от JSON, SNAPSHOT_STRATEGIES={','.join(SNAPSHOT_STRATEGIES) or '-'})")
+        for name, loader, path in [('json', 'from_json', json_path), ('snapshot', 'from_snapshot', snapshot_path)]:
+            result = measure(loader, path, args.replicas)
+            print(f"{name:>8}: загрузка {result['load_ms']:8.1f} мс, RSS {result['rss_kb'] / 1024:7.1f} МБ, "
+                  f"суммарный PSS {args.replicas} реплик {result['pss_total_kb'] / 1024:7.1f} МБ")
+
+
+if __name__ == "__main__":
+    main()
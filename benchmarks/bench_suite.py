@@ -0,0 +1,319 @@
+"""Воспроизводимый набор замеров движка рекомендаций на синтетических датасетах.
+
+Для каждой пары (число героев, разреженность) генерируется winrates.json
+и в отдельном процессе замеряются загрузка, память, задержки и пропускная
+способность find_hero_by_name, find_best_heroes и get_hero_details, затем
+через бота с поддельными Redis и Telegram прогоняется смесь сообщений и
+нажатий кнопок (webhook_replay). Отдельный процесс нужен, чтобы пиковая
+память одного датасета не искажала следующий, а нехватка памяти на
+большом датасете не обрывала весь набор.
+
+Результаты сохраняются в JSON вместе с коммитом; --compare печатает
+изменения относительно сохраненного ранее файла.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_suite.py
+    python benchmarks/bench_suite.py --sizes 100,1000 --densities 0.1,0.5 --out before.json
+    python benchmarks/bench_suite.py --out after.json --compare before.json
+
+На 10 000 героев каждая матрица занимает 800 МБ. Если --precompute и
+SCORING_STRATEGIES не заданы, а матрицы всех стратегий не помещаются в
+доступную память, для датасета предрасчитывается только mean. Датасеты
+больше --max-pairs пар пропускаются; пропуски печатаются в конце и
+сохраняются в JSON.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import platform
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from synth import write_winrates
+
+# Пропускаем датасеты, где пар с матчами больше: генерация JSON и его разбор занимают минуты
+DEFAULT_MAX_PAIRS = 5_000_000
+# Сколько матриц N x N float64 одновременно живет при предрасчете всех стратегий, с временными
+ALL_STRATEGIES_MATRICES = 12
+
+
+def percentiles(latencies) -> dict:
+    """Сводка задержек в миллисекундах и число операций в секунду"""
+    ordered = sorted(latencies)
+    total = sum(ordered)
+
+    def at(q):
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))] * 1000
+
+    return {
+        'count': len(ordered),
+        'ops_per_sec': len(ordered) / total if total else 0.0,
+        'p50_ms': at(0.5),
+        'p90_ms': at(0.9),
+        'p99_ms': at(0.99),
+        'max_ms': ordered[-1] * 1000
+    }
+
+
+def read_memory() -> dict:
+    """Текущая и пиковая память процесса из /proc, в МБ"""
+    memory = {}
+    with open('/proc/self/status') as fp:
+        for line in fp:
+            if line.startswith(('VmRSS:', 'VmHWM:')):
+                memory['rss_mb' if line.startswith('VmRSS') else 'peak_rss_mb'] = int(line.split()[1]) / 1024
+    return memory
+
+
+def available_memory() -> Optional[int]:
+    """MemAvailable из /proc/meminfo в байтах или None, если узнать нельзя"""
+    try:
+        with open('/proc/meminfo') as fp:
+            for line in fp:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return None
+
+
+def default_precompute(heroes: int) -> Optional[str]:
+    """SCORING_STRATEGIES для датасета без явной настройки: все стратегии, если хватает памяти"""
+    available = available_memory()
+    if available is not None and ALL_STRATEGIES_MATRICES * 8 * heroes * heroes > available:
+        return 'mean'
+    return None
+
+
+def timed_calls(func, args_list) -> dict:
+    latencies = []
+    for args in args_list:
+        started = time.perf_counter()
+        func(*args)
+        latencies.append(time.perf_counter() - started)
+    return percentiles(latencies)
+
+
+def name_queries(rng: random.Random, hero_names, count: int):
+    """Ввод пользователей: имя целиком, начало имени в нижнем регистре и опечатка"""
+    queries = []
+    for _ in range(count):
+        hero = rng.choice(hero_names)
+        kind = rng.randrange(3)
+        if kind == 0:
+            queries.append((hero,))
+        elif kind == 1:
+            queries.append((hero.lower()[:max(3, len(hero) * 2 // 3)],))
+        else:
+            i = rng.randrange(len(hero))
+            queries.append((hero[:i] + hero[i + 1:],))
+    return queries
+
+
+def run_child(config: dict) -> dict:
+    """Замеры на одном датасете; выполняется в отдельном процессе"""
+    from system import HeroWinrateSystem
+    import webhook_replay
+
+    logging.disable(logging.INFO)
+    result = {}
+    started = time.perf_counter()
+    # Без кеша результатов каждый вызов считает ранжирование заново
+    system = HeroWinrateSystem(config['path'], cache_size=0)
+    result['load_ms'] = (time.perf_counter() - started) * 1000
+    result['memory_after_load'] = read_memory()
+
+    rng = random.Random(config['seed'])
+    hero_names = system.hero_names
+    strategy = config['strategy']
+    count = config['queries']
+    teams = [rng.sample(hero_names, rng.randint(1, min(5, len(hero_names)))) for _ in range(count)]
+    bans = [rng.sample(hero_names, rng.randint(0, min(10, len(hero_names)))) for _ in range(count)]
+
+    result['find_hero_by_name'] = timed_calls(system.find_hero_by_name, name_queries(rng, hero_names, count))
+    result['find_best_heroes'] = timed_calls(
+        system.find_best_heroes, [(team, 10, banned, strategy) for team, banned in zip(teams, bans)])
+    result['get_hero_details'] = timed_calls(
+        system.get_hero_details, [(rng.choice(hero_names), team, strategy) for team in teams])
+
+    if config['replay_users']:
+        updates = webhook_replay.generate_updates(hero_names, system.version, config['replay_users'],
+                                                  config['replay_updates_per_user'], config['seed'])
+        result['replay'] = asyncio.run(webhook_replay.replay(
+            updates, config['concurrency'], config['port'], config['telegram_latency'],
+            config['redis_latency'], winrate_system=system))
+    result['memory_peak'] = read_memory()
+    return result
+
+
+def run_config(config: dict, precompute: str) -> dict:
+    env = dict(os.environ)
+    if precompute:
+        env['SCORING_STRATEGIES'] = precompute
+    process = subprocess.run([sys.executable, os.path.abspath(__file__), '--child', json.dumps(config)],
+                             env=env, capture_output=True, text=True)
+    if process.returncode != 0:
+        error = f"код выхода {process.returncode}"
+        if process.returncode == -9:
+            error += ", вероятно, не хватило памяти"
+        last_line = process.stderr.strip().splitlines()[-1:]
+        return {'error': f"{error}: {last_line[0]}" if last_line else error}
+    return json.loads(process.stdout.strip().splitlines()[-1])
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return ''
+
+
+def summary_metrics(run: dict) -> dict:
+    """Плоский набор сравниваемых чисел одного прогона"""
+    metrics = {'load_ms': run['load_ms'], 'peak_rss_mb': run['memory_peak']['peak_rss_mb']}
+    for name in ('find_hero_by_name', 'find_best_heroes', 'get_hero_details', 'replay'):
+        if name in run:
+            metrics[f'{name}.p50_ms'] = run[name]['p50_ms']
+            metrics[f'{name}.p99_ms'] = run[name]['p99_ms']
+    return metrics
+
+
+def completed(run: dict) -> bool:
+    return 'result' in run and 'error' not in run['result']
+
+
+def print_run(run: dict):
+    if 'skipped' in run:
+        print(f"  пропущено: {run['skipped']}")
+        return
+    if run.get('precompute'):
+        print(f"  предрасчет стратегий: {run['precompute']}")
+    if 'error' in run['result']:
+        print(f"  ошибка: {run['result']['error']}")
+        return
+    result = run['result']
+    print(f"  загрузка {result['load_ms']:,.0f} мс, RSS {result['memory_after_load']['rss_mb']:,.0f} МБ, "
+          f"пик {result['memory_peak']['peak_rss_mb']:,.0f} МБ")
+    for name in ('find_hero_by_name', 'find_best_heroes', 'get_hero_details', 'replay'):
+        if name in result:
+            stats = result[name]
+            rate = stats.get('ops_per_sec', stats.get('updates_per_sec'))
+            print(f"  {name:>18}: {rate:10,.0f} оп/с, p50 {stats['p50_ms']:7.3f} мс, p99 {stats['p99_ms']:7.3f} мс")
+
+
+def compare(base: dict, current: dict):
+    """Изменения метрик относительно прошлого прогона; рост означает замедление"""
+    base_runs = {(run['heroes'], run['density']): run for run in base['runs'] if completed(run)}
+    print(f"\nСравнение с {base.get('commit') or 'базой'}:")
+    for run in current['runs']:
+        old = base_runs.get((run['heroes'], run['density']))
+        if old is None or not completed(run):
+            continue
+        print(f"{run['heroes']} героев, плотность {run['density']}:")
+        old_metrics = summary_metrics(old['result'])
+        for name, value in summary_metrics(run['result']).items():
+            if old_metrics.get(name):
+                change = (value - old_metrics[name]) / old_metrics[name]
+                print(f"  {name:>24}: {old_metrics[name]:10.3f} -> {value:10.3f} ({change:+.1%})")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='100,1000,10000', help='числа героев через запятую')
+    parser.add_argument('--densities', default='0.02,0.3', help='доли пар с матчами через запятую')
+    parser.add_argument('--max-pairs', type=int, default=DEFAULT_MAX_PAIRS)
+    parser.add_argument('--queries', type=int, default=2000, help='вызовов каждого метода')
+    parser.add_argument('--strategy', default='mean')
+    parser.add_argument('--precompute', help='SCORING_STRATEGIES для замера, по умолчанию как в окружении; '
+                                             'без него на больших датасетах только mean')
+    parser.add_argument('--replay-users', type=int, default=100, help='0 - без прогона через бота')
+    parser.add_argument('--replay-updates-per-user', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=64)
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--telegram-latency-ms', type=float, default=0)
+    parser.add_argument('--redis-latency-ms', type=float, default=0)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', help='файл результатов, по умолчанию benchmarks/results/<коммит>.json')
+    parser.add_argument('--compare', help='JSON прошлого прогона для сравнения')
+    parser.add_argument('--child', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(run_child(json.loads(args.child))))
+        return
+
+    commit = git_commit()
+    results = {
+        'commit': commit,
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'cpus': os.cpu_count(),
+        'strategy': args.strategy,
+        'precompute': args.precompute or os.getenv('SCORING_STRATEGIES', 'all'),
+        'runs': []
+    }
+    explicit_precompute = args.precompute or os.getenv('SCORING_STRATEGIES')
+    with tempfile.TemporaryDirectory() as tmp:
+        for heroes in (int(size) for size in args.sizes.split(',')):
+            for density in (float(value) for value in args.densities.split(',')):
+                run = {'heroes': heroes, 'density': density}
+                print(f"{heroes} героев, плотность {density}:", flush=True)
+                pairs = int(heroes * heroes * density)
+                if pairs > args.max_pairs:
+                    run['skipped'] = f"{pairs:,} пар больше --max-pairs={args.max_pairs:,}"
+                    results['runs'].append(run)
+                    print_run(run)
+                    continue
+                precompute = explicit_precompute or default_precompute(heroes)
+                if precompute != explicit_precompute:
+                    # Все стратегии не помещаются в память, замеряем только mean
+                    run['precompute'] = precompute
+                path = os.path.join(tmp, f'winrates_{heroes}_{density}.json')
+                write_winrates(path, heroes, density, args.seed)
+                run['json_mb'] = os.path.getsize(path) / 2 ** 20
+                run['result'] = run_config({
+                    'path': path,
+                    'strategy': args.strategy,
+                    'queries': args.queries,
+                    'seed': args.seed,
+                    'replay_users': args.replay_users,
+                    'replay_updates_per_user': args.replay_updates_per_user,
+                    'concurrency': args.concurrency,
+                    'port': args.port,
+                    'telegram_latency': args.telegram_latency_ms / 1000,
+                    'redis_latency': args.redis_latency_ms / 1000
+                }, precompute)
+                os.remove(path)
+                results['runs'].append(run)
+                print_run(run)
+
+    out = args.out or os.path.join(ROOT, 'benchmarks', 'results', f"{commit or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(out)), exist_ok=True)
+    with open(out, 'w') as fp:
+        json.dump(results, fp, ensure_ascii=False, indent=2)
+    skipped = [run for run in results['runs'] if 'skipped' in run]
+    if skipped:
+        print("\nПропущены:")
+        for run in skipped:
+            print(f"  {run['heroes']} героев, плотность {run['density']}: {run['skipped']}")
+    print(f"\nРезультаты: {out}")
+
+    if args.compare:
+        with open(args.compare) as fp:
+            compare(json.load(fp), results)
+
+
+if __name__ == "__main__":
+    main()
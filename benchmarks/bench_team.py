@@ -0,0 +1,87 @@
+"""Подбор команды: время венгерского алгоритма и перебора max-min по размеру ростера,
+проверка обоих режимов полным перебором на малом пуле.
+
+Запуск из корня репозитория:
+    python benchmarks/bench_team.py
+    python benchmarks/bench_team.py --heroes 100 1000 5000 --sizes 2 3 5
+"""
+import argparse
+import os
+import random
+import sys
+import time
+from itertools import combinations, permutations
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from assignment import best_assignment, max_min_team
+from matrix import MatchupMatrix
+from scoring import pairwise_scores
+from synth import generate_winrates
+
+
+def brute_force(scores: np.ndarray):
+    """Точные значения обоих режимов перебором всех команд и пар"""
+    pool_size, k = scores.shape
+    best_assign = best_maxmin = -np.inf
+    for team in combinations(range(pool_size), k):
+        totals = [sum(scores[team[p[i]], i] for i in range(k)) for p in permutations(range(k))]
+        best_assign = max(best_assign, max(totals))
+        best_maxmin = max(best_maxmin, min(totals))
+    return best_assign, best_maxmin
+
+
+def check(trials: int, rng: np.random.Generator):
+    approximate = 0
+    for _ in range(trials):
+        k = int(rng.integers(1, 4))
+        scores = rng.random((int(rng.integers(k, 12)), k))
+        exact_assign, exact_maxmin = brute_force(scores)
+        _, assign = best_assignment(scores)
+        _, maxmin, optimal = max_min_team(scores)
+        assert abs(assign - exact_assign) < 1e-9, (assign, exact_assign)
+        assert maxmin <= exact_maxmin + 1e-9
+        if optimal:
+            assert abs(maxmin - exact_maxmin) < 1e-9, (maxmin, exact_maxmin)
+        else:
+            approximate += 1
+    print(f"Проверка перебором: {trials} случаев совпали, без доказанной оптимальности: {approximate}")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--heroes', type=int, nargs='+', default=[100, 1000, 5000])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[2, 3, 5])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--trials', type=int, default=200)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    check(args.trials, np.random.default_rng(args.seed))
+
+    print(f"{'героев':>7} {'k':>3} {'венгерский, мс':>15} {'max-min, мс':>12} {'оптимально':>11}")
+    for num_heroes in args.heroes:
+        matrix = MatchupMatrix.from_dict(generate_winrates(num_heroes, seed=args.seed))
+        rng = random.Random(args.seed)
+        for k in args.sizes:
+            assign_time = maxmin_time = 0.0
+            optimal = 0
+            for _ in range(args.repeat):
+                enemy_idx = rng.sample(range(num_heroes), k)
+                pool = np.setdiff1d(np.arange(num_heroes), enemy_idx)
+                scores = pairwise_scores(matrix, columns=enemy_idx)[pool]
+                started = time.perf_counter()
+                best_assignment(scores)
+                assign_time += time.perf_counter() - started
+                started = time.perf_counter()
+                optimal += max_min_team(scores)[2]
+                maxmin_time += time.perf_counter() - started
+            print(f"{num_heroes:7d} {k:3d} {assign_time / args.repeat * 1000:15.2f} "
+                  f"{maxmin_time / args.repeat * 1000:12.2f} {optimal:>5}/{args.repeat:<5}")
+
+
+if __name__ == "__main__":
+    main()
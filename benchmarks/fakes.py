@@ -0,0 +1,214 @@
+"""Поддельные Redis и Telegram Bot API для локальных замеров без сети.
+
+FakeAsyncRedis реализует только те команды, которые использует бот.
+FakeTelegramRequest подменяет HTTP-транспорт python-telegram-bot и
+отвечает на методы Bot API правдоподобными JSON-ответами, записывая
+время каждого вызова.
+"""
+import asyncio
+import fnmatch
+import json
+import os
+import sys
+import time
+from collections import defaultdict
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'bot'))
+
+from telegram.request import BaseRequest
+
+from redis_helper import MIGRATE_BANS_SCRIPT, TOGGLE_BAN_SCRIPT
+
+
+class FakeScript:
+    def __init__(self, redis, script: str):
+        self.redis = redis
+        self.script = script
+
+    def run(self, keys, args):
+        if self.script == TOGGLE_BAN_SCRIPT:
+            members = self.redis._members(keys[0])
+            if args[0] in members:
+                members.discard(args[0])
+                return 0
+            members.add(args[0])
+            return 1
+        if self.script == MIGRATE_BANS_SCRIPT:
+            legacy = self.redis.data.pop(keys[0], None)
+            if legacy is None:
+                return 0
+            bans = json.loads(legacy)
+            self.redis._members(keys[1]).update(bans)
+            return len(bans)
+        raise NotImplementedError(self.script)
+
+    async def __call__(self, keys=(), args=(), client=None):
+        if isinstance(client, FakePipeline):
+            client.commands.append(lambda: self.run(keys, args))
+            return client
+        await self.redis._roundtrip()
+        return self.run(keys, args)
+
+
+class FakePipeline:
+    def __init__(self, redis):
+        self.redis = redis
+        self.commands = []
+
+    def __getattr__(self, name):
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self.redis, '_' + name)
+
+        def queue(*args, **kwargs):
+            self.commands.append(lambda: method(*args, **kwargs))
+            return self
+        return queue
+
+    async def execute(self):
+        await self.redis._roundtrip()
+        results = [command() for command in self.commands]
+        self.commands = []
+        return results
+
+
+class FakeAsyncRedis:
+    """Хранилище в памяти с интерфейсом redis.asyncio.Redis (decode_responses=True)"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.data = {}
+        self.calls = 0
+
+    async def _roundtrip(self):
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        else:
+            await asyncio.sleep(0)
+
+    def _members(self, key):
+        return self.data.setdefault(key, set())
+
+    def _get(self, key):
+        return self.data.get(key)
+
+    def _set(self, key, value, ex=None):
+        self.data[key] = value
+        return True
+
+    def _delete(self, *keys):
+        return sum(self.data.pop(key, None) is not None for key in keys)
+
+    def _sadd(self, key, *members):
+        members_set = self._members(key)
+        before = len(members_set)
+        members_set.update(members)
+        return len(members_set) - before
+
+    def _srem(self, key, *members):
+        members_set = self._members(key)
+        before = len(members_set)
+        members_set.difference_update(members)
+        return before - len(members_set)
+
+    def _scard(self, key):
+        return len(self.data.get(key, ()))
+
+    def _smembers(self, key):
+        return set(self.data.get(key, ()))
+
+    def _sismember(self, key, member):
+        return int(member in self.data.get(key, ()))
+
+    def _smismember(self, key, members):
+        existing = self.data.get(key, ())
+        return [int(member in existing) for member in members]
+
+    def _hgetall(self, key):
+        return dict(self.data.get(key, {}))
+
+    def _hset(self, key, mapping=None, **kwargs):
+        self.data.setdefault(key, {}).update(mapping or {})
+        return len(mapping or {})
+
+    def _expire(self, key, ttl):
+        return int(key in self.data)
+
+    def register_script(self, script):
+        return FakeScript(self, script)
+
+    def pipeline(self, transaction=True):
+        return FakePipeline(self)
+
+    async def scan_iter(self, match=None, count=None):
+        for key in list(self.data):
+            if match is None or fnmatch.fnmatchcase(key, match):
+                yield key
+
+    async def aclose(self):
+        pass
+
+    def __getattr__(self, name):
+        # Одиночные команды: тот же обработчик, что и в пайплайне, плюс сетевая задержка
+        if name.startswith('_'):
+            raise AttributeError(name)
+        method = getattr(self, '_' + name)
+
+        async def command(*args, **kwargs):
+            await self._roundtrip()
+            return method(*args, **kwargs)
+        return command
+
+
+class FakeTelegramRequest(BaseRequest):
+    """Транспорт Bot API, который отвечает сам и запоминает вызовы по чатам"""
+
+    def __init__(self, latency: float = 0.0):
+        self.latency = latency
+        self.calls = defaultdict(list)  # chat_id -> [(метод, время вызова)]
+        self.inline_answers = {}  # id инлайн-запроса -> (время ответа, число результатов)
+        self.total_calls = 0
+        self._message_id = 0
+
+    @property
+    def read_timeout(self):
+        return None
+
+    async def initialize(self):
+        pass
+
+    async def shutdown(self):
+        pass
+
+    def _message(self, chat_id, text=''):
+        self._message_id += 1
+        return {
+            'message_id': self._message_id,
+            'date': int(time.time()),
+            'chat': {'id': chat_id, 'type': 'private'},
+            'text': text
+        }
+
+    async def do_request(self, url, method, request_data=None, read_timeout=None,
+                         write_timeout=None, connect_timeout=None, pool_timeout=None):
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        endpoint = url.rsplit('/', 1)[-1]
+        params = request_data.parameters if request_data is not None else {}
+        chat_id = params.get('chat_id')
+        self.total_calls += 1
+        if chat_id is not None:
+            self.calls[int(chat_id)].append((endpoint, time.perf_counter()))
+        if endpoint == 'answerInlineQuery':
+            self.inline_answers[params['inline_query_id']] = (time.perf_counter(), len(params.get('results', [])))
+
+        if endpoint == 'getMe':
+            result = {'id': 1, 'is_bot': True, 'first_name': 'FakeBot', 'username': 'fake_bot',
+                      'can_join_groups': True, 'can_read_all_group_messages': False,
+                      'supports_inline_queries': True}
+        elif endpoint in ('sendMessage', 'editMessageText', 'editMessageReplyMarkup'):
+            result = self._message(int(chat_id or 0), params.get('text', ''))
+        else:
+            result = True
+        return 200, json.dumps({'ok': True, 'result': result}).encode('utf-8')
@@ -0,0 +1,47 @@
+"""Генератор синтетических winrates.json заданного размера и разреженности.
+
+Запуск из корня репозитория:
+    python benchmarks/synth.py --heroes 1000 --density 0.3 --out /tmp/winrates_1k.json
+"""
+import argparse
+import json
+
+import numpy as np
+
+
+def generate_winrates(num_heroes: int, density: float = 0.5, seed: int = 0) -> dict:
+    """Словарь формата winrates.json: доля density пар героев имеет сыгранные матчи"""
+    rng = np.random.default_rng(seed)
+    names = [f"Hero {i:05d}" for i in range(num_heroes)]
+
+    # Сила героя задает средний винрейт, количество игр - логнормальное
+    strength = rng.normal(0, 0.08, num_heroes)
+    data = {name: {} for name in names}
+    for i in range(num_heroes):
+        enemies = np.flatnonzero(rng.random(num_heroes) < density)
+        enemies = enemies[enemies != i]
+        games = np.maximum(1, rng.lognormal(2.5, 1.2, enemies.size).astype(int))
+        percent = np.clip(0.5 + strength[i] - strength[enemies] + rng.normal(0, 0.1, enemies.size), 0, 1)
+        row = data[names[i]]
+        for j, g, p in zip(enemies.tolist(), games.tolist(), np.round(percent, 2).tolist()):
+            row[names[j]] = {'games': g, 'percent': p}
+    return data
+
+
+def write_winrates(path: str, num_heroes: int, density: float = 0.5, seed: int = 0):
+    with open(path, 'w') as fp:
+        json.dump(generate_winrates(num_heroes, density, seed), fp)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--heroes', type=int, default=1000)
+    parser.add_argument('--density', type=float, default=0.5)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--out', required=True)
+    args = parser.parse_args()
+    write_winrates(args.out, args.heroes, args.density, args.seed)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,222 @@
+"""Прогон записанных обновлений через бота в режиме вебхука с поддельным Telegram.
+
+Бот поднимает настоящий вебхук-сервер python-telegram-bot на localhost,
+обновления отправляются в него HTTP-запросами, а все вызовы Bot API
+перехватывает FakeTelegramRequest. Задержка обновления - время от POST
+до ответа бота в этот чат (sendMessage / editMessage*). Заодно
+проверяется, что ответы каждому пользователю пришли в порядке его
+обновлений.
+
+Запуск из корня репозитория:
+    python benchmarks/webhook_replay.py --users 200 --updates-per-user 8 --concurrency 64
+    python benchmarks/webhook_replay.py --record updates.jsonl
+    python benchmarks/webhook_replay.py --updates updates.jsonl --concurrency 1
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import sys
+import time
+from collections import Counter, defaultdict
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+import logging
+
+import httpx
+
+from fakes import FakeAsyncRedis, FakeTelegramRequest
+
+import bot as bot_module
+import callbacks
+from callbacks import CallbackCodec
+
+# Бот прогона подписывает кнопки этим ключом, поэтому записанные обновления воспроизводимы
+REPLAY_SECRET = 'replay'
+
+# Метод Bot API, которым бот отвечает на обновление каждого вида
+TERMINAL_METHODS = {'message': 'sendMessage', 'details': 'editMessageText',
+                    'back': 'editMessageText', 'banpage': 'editMessageReplyMarkup'}
+
+
+def generate_updates(hero_names, version: str, users: int, per_user: int, seed: int):
+    """Смесь сообщений с командами противника и нажатий кнопок, по порядку для каждого пользователя"""
+    rng = random.Random(seed)
+    codec = CallbackCodec(REPLAY_SECRET.encode('utf-8'))
+    # Пользователи пишут первое слово имени, если оно однозначно, иначе имя целиком
+    first_words = [hero.split()[0].lower() for hero in hero_names]
+    counts = Counter(first_words)
+    aliases = {hero: (hero.lower() if counts[word] > 1 else word) for hero, word in zip(hero_names, first_words)}
+    streams = []
+    for user_id in range(1, users + 1):
+        stream = []
+        team = []
+        for i in range(per_user):
+            kind = 'message' if i == 0 else rng.choice(['message', 'details', 'back', 'banpage'])
+            if kind == 'message':
+                team = rng.sample(hero_names, rng.randint(1, 4))
+                stream.append(('message', ', '.join(aliases[hero] for hero in team)))
+            elif kind == 'details':
+                hero_idx = rng.randrange(len(hero_names))
+                stream.append(('details', codec.encode(callbacks.DETAILS, version, hero_idx)))
+            elif kind == 'back':
+                stream.append(('back', codec.encode(callbacks.BACK_TO_LIST, version)))
+            else:
+                stream.append(('banpage', codec.encode(callbacks.BAN_PAGE, version, page=rng.randint(0, 2))))
+        streams.append((user_id, stream))
+
+    # Перемешиваем пользователей, сохраняя порядок внутри каждого
+    updates = []
+    positions = {user_id: 0 for user_id, _ in streams}
+    remaining = dict(streams)
+    while remaining:
+        user_id = rng.choice(list(remaining))
+        kind, payload = remaining[user_id][positions[user_id]]
+        positions[user_id] += 1
+        if positions[user_id] == len(remaining[user_id]):
+            del remaining[user_id]
+        updates.append(make_update(len(updates) + 1, user_id, kind, payload))
+    return updates
+
+
+def make_update(update_id: int, user_id: int, kind: str, payload: str):
+    user = {'id': user_id, 'is_bot': False, 'first_name': f'user{user_id}'}
+    chat = {'id': user_id, 'type': 'private'}
+    message = {'message_id': update_id, 'date': int(time.time()), 'chat': chat, 'from': user}
+    if kind == 'message':
+        message['text'] = payload
+        return {'update_id': update_id, 'message': message, '_kind': kind}
+    message['from'] = {'id': 1, 'is_bot': True, 'first_name': 'FakeBot'}
+    return {
+        'update_id': update_id,
+        'callback_query': {'id': str(update_id), 'from': user, 'chat_instance': str(user_id),
+                           'message': message, 'data': payload},
+        '_kind': kind
+    }
+
+
+def chat_id_of(update) -> int:
+    if 'message' in update:
+        return update['message']['chat']['id']
+    return update['callback_query']['message']['chat']['id']
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+async def replay(updates, concurrency: int, port: int, telegram_latency: float, redis_latency: float,
+                 senders: int = 8, winrate_system=None):
+    # Поддельный Redis не поддерживает pub/sub, датасет во время прогона не меняется
+    os.environ['DATASET_RELOAD_CHANNEL'] = ''
+    os.environ['DATASET_POLL_INTERVAL'] = '0'
+    # Поддельный Telegram не ограничивает частоту, а ожидание лимитов заслонило бы время обработки
+    os.environ['RATE_LIMIT'] = '0'
+    os.environ['METRICS_PORT'] = '0'
+    os.environ['CALLBACK_SECRET'] = REPLAY_SECRET
+    request = FakeTelegramRequest(latency=telegram_latency)
+    bot = bot_module.TelegramBot('123456:FAKE', client=FakeAsyncRedis(latency=redis_latency),
+                                 winrate_system=winrate_system)
+    application = bot.create_application(concurrent_updates=concurrency, request=request)
+
+    await application.initialize()
+    await application.post_init(application)
+    await application.updater.start_webhook(listen='127.0.0.1', port=port, url_path='telegram',
+                                            webhook_url=f'http://127.0.0.1:{port}/telegram')
+    await application.start()
+
+    sent = defaultdict(list)  # chat_id -> [(вид, время отправки)]
+    url = f'http://127.0.0.1:{port}/telegram'
+
+    # Несколько отправителей, как параллельные соединения Telegram; обновления
+    # одного пользователя всегда идут через одного отправителя и по порядку
+    lanes = defaultdict(list)
+    for update in updates:
+        lanes[chat_id_of(update) % senders].append(update)
+
+    async def send_lane(client, lane):
+        for update in lane:
+            body = {key: value for key, value in update.items() if key != '_kind'}
+            sent[chat_id_of(update)].append((update['_kind'], time.perf_counter()))
+            await client.post(url, json=body)
+
+    started = time.perf_counter()
+    async with httpx.AsyncClient() as client:
+        await asyncio.gather(*(send_lane(client, lane) for lane in lanes.values()))
+
+        # Ждем, пока бот ответит на все обновления
+        expected = sum(len(items) for items in sent.values())
+        while True:
+            answered = sum(
+                sum(method in TERMINAL_METHODS.values() for method, _ in request.calls[chat_id])
+                for chat_id in sent
+            )
+            if answered >= expected:
+                break
+            await asyncio.sleep(0.01)
+    elapsed = time.perf_counter() - started
+
+    await application.updater.stop()
+    await application.stop()
+    await application.shutdown()
+
+    latencies = []
+    out_of_order = 0
+    for chat_id, items in sent.items():
+        replies = [(method, at) for method, at in request.calls[chat_id] if method in TERMINAL_METHODS.values()]
+        for (kind, sent_at), (method, replied_at) in zip(items, replies):
+            if TERMINAL_METHODS[kind] != method:
+                out_of_order += 1
+            latencies.append(replied_at - sent_at)
+
+    return {
+        'updates': len(updates),
+        'elapsed': elapsed,
+        'updates_per_sec': len(updates) / elapsed,
+        'p50_ms': percentile(latencies, 0.5) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'out_of_order': out_of_order
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--users', type=int, default=100)
+    parser.add_argument('--updates-per-user', type=int, default=8)
+    parser.add_argument('--concurrency', type=int, default=64, help='1 - последовательная обработка')
+    parser.add_argument('--senders', type=int, default=8, help='параллельных HTTP-отправителей')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--telegram-latency-ms', type=float, default=30)
+    parser.add_argument('--redis-latency-ms', type=float, default=1)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--updates', help='JSONL с записанными обновлениями')
+    parser.add_argument('--record', help='сохранить сгенерированные обновления в JSONL')
+    args = parser.parse_args()
+
+    # Журнал каждого HTTP-запроса заглушил бы результаты
+    logging.getLogger('httpx').setLevel(logging.WARNING)
+
+    if args.updates:
+        with open(args.updates) as fp:
+            updates = [json.loads(line) for line in fp if line.strip()]
+    else:
+        system = bot_module.HeroWinrateSystem(cache_size=0)
+        updates = generate_updates(system.hero_names, system.version, args.users, args.updates_per_user, args.seed)
+    if args.record:
+        with open(args.record, 'w') as fp:
+            for update in updates:
+                fp.write(json.dumps(update, ensure_ascii=False) + '\n')
+
+    result = asyncio.run(replay(updates, args.concurrency, args.port,
+                                args.telegram_latency_ms / 1000, args.redis_latency_ms / 1000,
+                                args.senders))
+    print(f"Обновлений: {result['updates']}, параллельно: {args.concurrency}")
+    print(f"{result['updates_per_sec']:,.0f} обновлений/с, p50 {result['p50_ms']:.1f} мс, "
+          f"p99 {result['p99_ms']:.1f} мс, нарушений порядка: {result['out_of_order']}")
+
+
+if __name__ == "__main__":
+    main()
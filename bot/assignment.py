@@ -0,0 +1,183 @@
+"""Подбор команды против команды соперника: герои и пары для k отдельных игр"""
+from itertools import combinations, islice, permutations
+from math import comb
+from typing import Tuple
+
+import numpy as np
+
+# Режимы подбора команды
+TEAM_MODES = {
+    'assign': 'Пары выбираем мы',
+    'maxmin': 'Пары выбирает соперник',
+}
+
+
+def hungarian(cost: np.ndarray) -> np.ndarray:
+    """Назначение минимальной стоимости для матрицы n x m, n <= m.
+
+    Возвращает номер столбца для каждой строки. Алгоритм с потенциалами,
+    O(n^2 * m); внутренний цикл по столбцам векторизован.
+    """
+    n, m = cost.shape
+    if n > m:
+        raise ValueError("Строк больше, чем столбцов")
+
+    u = np.zeros(n + 1)
+    v = np.zeros(m + 1)
+    owner = np.zeros(m + 1, dtype=np.int64)  # строка, назначенная столбцу (с 1), 0 - свободен
+    way = np.zeros(m + 1, dtype=np.int64)
+    for row in range(1, n + 1):
+        owner[0] = row
+        col = 0
+        min_reduced = np.full(m + 1, np.inf)
+        used = np.zeros(m + 1, dtype=bool)
+        while True:
+            used[col] = True
+            current_row = owner[col]
+            free = ~used[1:]
+            reduced = cost[current_row - 1] - u[current_row] - v[1:]
+            better = free & (reduced < min_reduced[1:])
+            min_reduced[1:][better] = reduced[better]
+            way[1:][better] = col
+
+            candidates = np.where(free, min_reduced[1:], np.inf)
+            next_col = int(np.argmin(candidates)) + 1
+            delta = candidates[next_col - 1]
+
+            used_cols = np.flatnonzero(used)
+            u[owner[used_cols]] += delta
+            v[used_cols] -= delta
+            min_reduced[1:][free] -= delta
+
+            col = next_col
+            if owner[col] == 0:
+                break
+
+        # Переназначение вдоль найденного увеличивающего пути
+        while col:
+            previous = way[col]
+            owner[col] = owner[previous]
+            col = previous
+
+    assignment = np.full(n, -1, dtype=np.int64)
+    assigned = np.flatnonzero(owner[1:])
+    assignment[owner[1:][assigned] - 1] = assigned
+    return assignment
+
+
+def best_assignment(scores: np.ndarray) -> Tuple[np.ndarray, float]:
+    """Лучшие герои и пары, если пары выбираем мы.
+
+    scores - пул x соперники. Возвращает строку пула для каждого соперника
+    и сумму оценок.
+    """
+    rows = hungarian(-scores.T)
+    return rows, float(scores[rows, np.arange(scores.shape[1])].sum())
+
+
+def _worst_totals(sub: np.ndarray, combos: np.ndarray) -> np.ndarray:
+    """Сумма оценок каждой команды при худших для нас парах.
+
+    Динамика по подмножествам соперников: worst[mask] - минимум суммы, когда
+    первые popcount(mask) героев команды играют против соперников из mask.
+    k * 2^(k-1) векторных операций на все команды сразу вместо k! перестановок.
+    """
+    k = combos.shape[1]
+    # pair[i][j] - оценки i-го героя каждой команды против j-го соперника
+    pair = [[sub[combos[:, i], j] for j in range(k)] for i in range(k)]
+    worst = [np.zeros(len(combos))] + [None] * ((1 << k) - 1)
+    for mask in range(1, 1 << k):
+        member = bin(mask).count('1') - 1
+        best = None
+        for j in range(k):
+            if mask >> j & 1:
+                total = worst[mask ^ (1 << j)] + pair[member][j]
+                best = total if best is None else np.minimum(best, total, out=best)
+        worst[mask] = best
+    return worst[-1]
+
+
+def max_min_team(scores: np.ndarray, start_candidates: int = 12,
+                 max_combinations: int = 200_000) -> Tuple[np.ndarray, float, bool]:
+    """Лучшая команда, если пары выбирает соперник.
+
+    scores - пул x соперники, размер команды равен числу соперников.
+    Возвращает строки пула в порядке соперников для худших для нас пар,
+    сумму оценок и признак доказанной оптимальности.
+    """
+    pool_size, k = scores.shape
+    if k == 0 or pool_size < k:
+        return np.zeros(0, dtype=np.int64), 0.0, True
+    team, value, upper = _max_min_search(scores, tuple(range(k)), {}, start_candidates, max_combinations)
+    return _worst_pairing(scores, team), value, upper <= value
+
+
+def _max_min_search(scores: np.ndarray, columns: tuple, cache: dict, start_candidates: int,
+                    max_combinations: int) -> Tuple[np.ndarray, float, float]:
+    """Команда против соперников columns: строки пула, результат и его верхняя граница.
+
+    Если соперник поставит героя h против j-го соперника, остальные наберут
+    не больше лучшего результата против прочих соперников, поэтому любая
+    команда с h не лучше min_j (s[h, j] + граница без j). Перебираются
+    сочетания L героев с лучшей такой границей; когда она у первого
+    героя вне L не выше найденного результата, ответ оптимален. Иначе L
+    растет и перебираются только сочетания с новыми героями, пока общее
+    число сочетаний не превысит max_combinations.
+    """
+    if columns in cache:
+        return cache[columns]
+    sub = scores[:, columns]
+    pool_size, k = sub.shape
+    if k == 1:
+        row = int(np.argmax(sub[:, 0]))
+        value = float(sub[row, 0])
+        cache[columns] = result = np.array([row]), value, value
+        return result
+
+    bounds = np.full(pool_size, np.inf)
+    for j in range(k):
+        _, _, upper = _max_min_search(scores, columns[:j] + columns[j + 1:], cache,
+                                      start_candidates, max_combinations)
+        np.minimum(bounds, sub[:, j] + upper, out=bounds)
+    order = np.argsort(-bounds, kind='stable')
+    chunk = 50_000
+
+    size = min(pool_size, max(k, start_candidates))
+    searched = 0
+    best_value, best_team = -np.inf, None
+    while True:
+        candidates = order[:size]
+        candidate_scores = sub[candidates]
+        # Сочетания, старший герой которых добавлен на этом шаге
+        combos_iter = (rest + (last,) for last in range(searched, size)
+                       for rest in combinations(range(last), k - 1))
+        while True:
+            combos = np.array(list(islice(combos_iter, chunk)), dtype=np.int64).reshape(-1, k)
+            if not combos.size:
+                break
+            worst = _worst_totals(candidate_scores, combos)
+            best = int(np.argmax(worst))
+            if worst[best] > best_value:
+                best_value = float(worst[best])
+                best_team = candidates[combos[best]]
+        searched = size
+
+        if size == pool_size or bounds[order[size]] <= best_value:
+            upper = best_value
+            break
+        # Героев, чья граница не выше найденного результата, перебирать незачем
+        next_size = min(int(np.count_nonzero(bounds > best_value)), int(size * 1.5) + 1)
+        if comb(next_size, k) > max_combinations:
+            upper = float(bounds[order[size]])
+            break
+        size = next_size
+    cache[columns] = result = best_team, best_value, upper
+    return result
+
+
+def _worst_pairing(scores: np.ndarray, team: np.ndarray) -> np.ndarray:
+    """Герои команды в порядке соперников при худших для нас парах"""
+    k = len(team)
+    perms = np.array(list(permutations(range(k))), dtype=np.int64)
+    totals = scores[team[perms], np.arange(k)].sum(axis=1)
+    return team[perms[int(np.argmin(totals))]]
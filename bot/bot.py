@@ -1,13 +1,32 @@
 from dotenv import load_dotenv
+import asyncio
+import hashlib
 import logging
-import redis
+import redis.asyncio as redis
 import os
-from typing import List, Tuple
+from typing import Dict, List, Optional, Tuple
 from telegram import Update, InlineKeyboardButton, InlineKeyboardMarkup
-from telegram.ext import Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes, filters
-
+from telegram.error import BadRequest
+from telegram.ext import (Application, CommandHandler, MessageHandler, CallbackQueryHandler, ContextTypes,
+                          InlineQueryHandler, TypeHandler, filters)
+
+import callbacks
+from assignment import TEAM_MODES
+from callbacks import CallbackCodec, version_tag
+from channels import RELOAD_CHANNEL
+from coalesce import Coalescer
+from draft import DRAFT_FORMATS, parse_format
+from inline import InlineCompleter
+from metrics import (CACHE_HIT_RATIO, CACHE_LOOKUPS, CACHE_SIZE, DATASET_HEROES, DATASET_INFO, HANDLER_SECONDS,
+                     INLINE_SUPERSEDED, PARSE_SECONDS, UPDATES, MetricsServer, instrument, timed)
+from processor import PerUserUpdateProcessor
+from ratelimit import TokenBucketRateLimiter
 from system import HeroWinrateSystem
-from redis_helper import RedisHelper
+from redis_helper import AsyncRedisHelper
+from reload import DatasetWatcher
+from render import Renderer
+from scoring import DEFAULT_STRATEGY, STRATEGIES
+from session import create_session_store, new_session
 
 
 logging.basicConfig(
@@ -16,46 +35,181 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Кнопки с индексом героя в аргументе
+HERO_CALLBACKS = {callbacks.DETAILS, callbacks.BAN, callbacks.TOGGLE_BAN, callbacks.DRAFT_MOVE}
+# Кнопки, которые отвечают на нажатие уведомлением
+NOTIFYING_CALLBACKS = {callbacks.BAN, callbacks.CLEAR_BANS}
+# Кнопки, которые работают только во время драфта
+DRAFT_CALLBACKS = {callbacks.DRAFT_MOVE, callbacks.DRAFT_UNDO, callbacks.DRAFT_STOP}
+# Типы обновлений для счетчика bot_updates_total, совпадают с именами полей Update
+UPDATE_TYPES = [update_type.value for update_type in Update.ALL_TYPES]
+
 dotenv_path = os.path.join(os.path.dirname(__file__), '.env')
 if os.path.exists(dotenv_path):
     load_dotenv(dotenv_path)
 
-redis_client = redis.Redis(
+# Ограниченный пул: при исчерпании соединений обработчик ждет свободное не дольше REDIS_POOL_TIMEOUT
+redis_client = redis.Redis(connection_pool=redis.BlockingConnectionPool(
     host=os.getenv('REDIS_HOST', 'redis'),
     port=int(os.getenv('REDIS_PORT', 6379)),
     db=int(os.getenv('REDIS_DB', 0)),
-    decode_responses=True
-)
+    decode_responses=True,
+    max_connections=int(os.getenv('REDIS_MAX_CONNECTIONS', 20)),
+    timeout=float(os.getenv('REDIS_POOL_TIMEOUT', 2)),
+    socket_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', 1)),
+    socket_connect_timeout=float(os.getenv('REDIS_SOCKET_TIMEOUT', 1))
+))
 
 
 class TelegramBot:
-    def __init__(self, token: str):
+    def __init__(self, token: str, client=None, winrate_system: HeroWinrateSystem = None):
         self.token = token
-        self.winrate_system = HeroWinrateSystem()
-        self.user_sessions = {}  # Хранит состояние пользователей
-        self.redis_helper = RedisHelper(redis_client)
-
-    def create_application(self):
+        client = client or redis_client
+        self.winrate_system = winrate_system or HeroWinrateSystem(cache_size=int(os.getenv('RESULT_CACHE_SIZE', 1024)))
+        # Хранит состояние пользователей: в памяти процесса или общее в Redis
+        self.sessions = create_session_store(
+            os.getenv('SESSION_BACKEND', 'memory'),
+            redis_client=client,
+            maxsize=int(os.getenv('SESSION_MAX_USERS', 10000)),
+            ttl=int(os.getenv('SESSION_TTL', 7 * 24 * 3600))
+        )
+        self.redis_helper = AsyncRedisHelper(client, timeout=float(os.getenv('REDIS_CALL_TIMEOUT', 1)))
+        # Время жизни общего кеша результатов в Redis, 0 - только локальный кеш
+        self.shared_cache_ttl = int(os.getenv('SHARED_CACHE_TTL', 0))
+        # Стратегия оценки для пользователей, которые ее не выбирали
+        self.default_strategy = os.getenv('SCORING_STRATEGY', DEFAULT_STRATEGY)
+        # Бюджет времени поиска в драфте на один ход и число кандидатов на шаге
+        self.draft_time_budget = float(os.getenv('DRAFT_TIME_BUDGET', 1.0))
+        self.draft_width = int(os.getenv('DRAFT_WIDTH', 8))
+        # Наибольший размер команды в /team: перебор в режиме max-min растет как k!
+        self.team_max_size = int(os.getenv('TEAM_MAX_SIZE', 5))
+        # callback_data кнопок подписывается ключом CALLBACK_SECRET, по умолчанию производным от токена
+        secret = os.getenv('CALLBACK_SECRET') or hashlib.sha256(b'callback:' + token.encode('utf-8')).hexdigest()
+        self.callback_codec = CallbackCodec(secret.encode('utf-8'))
+        self._callback_handlers = {
+            callbacks.DETAILS: self._on_details,
+            callbacks.BACK_TO_LIST: self._on_back_to_list,
+            callbacks.SCORING: self._on_scoring,
+            callbacks.LIST_PAGE: self._on_list_page,
+            callbacks.BAN: self._on_ban,
+            callbacks.SHOW_BANS: self._on_show_bans,
+            callbacks.CLEAR_BANS: self._on_clear_bans,
+            callbacks.TOGGLE_BAN: self._on_toggle_ban,
+            callbacks.BAN_PAGE: self._on_ban_page,
+            callbacks.NOOP: self._on_noop,
+            callbacks.CLOSE_BAN: self._on_close_ban,
+            callbacks.DRAFT_NEW: self._on_draft_new,
+            callbacks.DRAFT_MOVE: self._on_draft_move,
+            callbacks.DRAFT_UNDO: self._on_draft_undo,
+            callbacks.DRAFT_STOP: self._on_draft_stop,
+        }
+        # Готовые клавиатуры и страницы списков для текущей версии датасета
+        self.renderer = Renderer(self.callback_codec, int(os.getenv('RENDER_CACHE_SIZE', 512)))
+        # Серия переключений банов перерисовывает клавиатуру одним редактированием за BAN_RENDER_DELAY
+        self.ban_renders = Coalescer(float(os.getenv('BAN_RENDER_DELAY', 0.5)))
+        # Список контрпиков листается страницами по list_page_size до list_max_results героев
+        self.list_page_size = 10
+        self.list_max_results = int(os.getenv('COUNTERS_MAX_RESULTS', 100))
+        # Инлайн-режим (включается у @BotFather через /setinline): до INLINE_COMPLETIONS вариантов
+        # дополнения на запрос, сверх первого - пока не вышло INLINE_BUDGET_MS. Ответ не зависит от
+        # пользователя, поэтому Telegram кеширует его для всех на INLINE_CACHE_TIME секунд
+        self.inline_completer = InlineCompleter(self.winrate_system,
+                                                sums_cache_size=int(os.getenv('INLINE_SUMS_CACHE_SIZE', 256)))
+        self.inline_completions = int(os.getenv('INLINE_COMPLETIONS', 5))
+        self.inline_budget = float(os.getenv('INLINE_BUDGET_MS', 50)) / 1000
+        self.inline_cache_time = int(os.getenv('INLINE_CACHE_TIME', 300))
+        # user_id -> задача ответа на последний инлайн-запрос пользователя
+        self._inline_tasks: Dict[int, asyncio.Task] = {}
+        # Горячая перезагрузка винрейтов: по изменению файлов и по сигналу из Redis
+        self.dataset_watcher = DatasetWatcher(
+            self.winrate_system,
+            redis_client=client,
+            poll_interval=float(os.getenv('DATASET_POLL_INTERVAL', 30)),
+            channel=os.getenv('DATASET_RELOAD_CHANNEL', RELOAD_CHANNEL)
+        )
+        # Метрики Prometheus на METRICS_PORT (0 - выключены), METRICS_PROFILER=1 открывает /profile/start и /stop
+        metrics_port = int(os.getenv('METRICS_PORT', 8080))
+        self.metrics_server = MetricsServer(
+            port=metrics_port,
+            collect=self._collect_metrics,
+            profiler_enabled=os.getenv('METRICS_PROFILER', '0') == '1'
+        ) if metrics_port else None
+
+    def create_application(self, concurrent_updates: int = 1, request=None):
         """Создает приложение бота"""
-        application = Application.builder().token(self.token).build()
+        builder = (
+            Application.builder()
+            .token(self.token)
+            .post_init(self.post_init)
+            .post_shutdown(self.post_shutdown)
+        )
+        if concurrent_updates > 1:
+            # Разные пользователи обрабатываются параллельно, обновления одного - по порядку
+            builder = builder.concurrent_updates(PerUserUpdateProcessor(concurrent_updates))
+        if request is not None:
+            builder = builder.request(request)
+        if os.getenv('RATE_LIMIT', '1') == '1':
+            # Исходящие запросы не превышают лимиты Telegram на бота и на чат
+            builder = builder.rate_limiter(TokenBucketRateLimiter(
+                overall_rate=float(os.getenv('RATE_LIMIT_OVERALL', 30)),
+                chat_rate=float(os.getenv('RATE_LIMIT_CHAT', 1)),
+                chat_burst=float(os.getenv('RATE_LIMIT_CHAT_BURST', 3)),
+                group_rate=float(os.getenv('RATE_LIMIT_GROUP', 20 / 60)),
+                max_retries=int(os.getenv('RATE_LIMIT_RETRIES', 1))
+            ))
+        application = builder.build()
+
+        # Подсчет всех входящих обновлений до основных обработчиков
+        application.add_handler(TypeHandler(Update, self._count_update), group=-1)
 
         # Обработчики команд
-        application.add_handler(CommandHandler("start", self.start_command))
-        application.add_handler(CommandHandler("help", self.help_command))
-        application.add_handler(CommandHandler("heroes", self.list_heroes))
-        application.add_handler(CommandHandler("clear", self.clear_session))
-        application.add_handler(CommandHandler("ban", self.ban_command))
+        commands = {
+            "start": self.start_command,
+            "help": self.help_command,
+            "heroes": self.list_heroes,
+            "clear": self.clear_session,
+            "ban": self.ban_command,
+            "draft": self.draft_command,
+            "team": self.team_command,
+            "counters": self.counters_command,
+            "hero": self.hero_command,
+        }
+        for command, callback in commands.items():
+            application.add_handler(CommandHandler(command, instrument(command, callback)))
 
         # Обработчики сообщений
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, self.handle_message))
-        application.add_handler(CallbackQueryHandler(self.button_callback))
+        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND,
+                                               instrument("message", self.handle_message)))
+        application.add_handler(CallbackQueryHandler(instrument("button", self.button_callback)))
+        application.add_handler(InlineQueryHandler(instrument("inline", self.inline_query)))
 
         return application
 
+    async def post_init(self, application: Application):
+        """Выполняется после инициализации приложения, до получения обновлений"""
+        migrated = await self.redis_helper.migrate_legacy_bans()
+        if migrated:
+            logger.info("Перенесено списков банов в новый формат: %d", migrated)
+        self.dataset_watcher.start()
+        if self.metrics_server is not None:
+            try:
+                await self.metrics_server.start()
+            except OSError as e:
+                logger.warning("Не удалось запустить сервер метрик: %s", e)
+
+    async def post_shutdown(self, application: Application):
+        for task in list(self._inline_tasks.values()):
+            task.cancel()
+        if self.metrics_server is not None:
+            await self.metrics_server.stop()
+        await self.ban_renders.flush()
+        await self.dataset_watcher.stop()
+        await self.redis_helper.close()
+
     async def start_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Обработчик команды /start"""
         user_id = update.effective_user.id
-        self.user_sessions[user_id] = {'enemy_team': []}
+        await self._save_session(user_id, [])
 
         welcome_text = """
 🎮 **Добро пожаловать в бота для помощи с контрпиками для соревновательного Unmatched!**
@@ -81,6 +235,10 @@ class TelegramBot:
 **Команды:**
 • `/start` - Начать работу с ботом
 • `/ban` - Список банов
+• `/draft` - Помощник по драфту: лучшие баны и пики
+• `/team <герои>` - Лучшая команда против команды противника по матчам один на один
+• `/counters <герой>` - Лучшие контрпики против одного героя
+• `/hero <герой>` - Место в рейтинге, лучшие и худшие матчапы; без имени - общий рейтинг
 • `/help` - Показать эту справку
 • `/heroes` - Показать список всех персонажей
 • `/clear` - Очистить текущую сессию
@@ -90,16 +248,25 @@ class TelegramBot:
 2. Бот найдет и покажет топ-10 лучших контр-пиков
 3. Нажмите на персонажа для подробной информации
 
+В любом чате можно набрать `@имя_бота ciri, ach` - бот допишет имя и сразу покажет контр-пики.
+
 **Примеры запросов:**
 • `Achilles, Ciri, Robin`
 • `ach cir robi` (можно без запятых и частично)
 
+**Оценка контрпиков** (кнопки под списком):
+• Среднее - средний винрейт матчапов
+• По играм - матчапы с большим числом игр весят больше
+• Байес - оценка по малому числу игр подтягивается к 50%
+• Уилсон - нижняя граница 95% доверительного интервала
+
 **Особенности:**
-• В подборке не участвуют персонажи с кол-вом игр меньше 10
+• В среднем и по играм не участвуют матчапы с кол-вом игр меньше 10
 • В подборке не участвуют забаненные персонажи
 • Поиск работает по частичному совпадению имен
 • Регистр не важен
 • Для поиска например `T. Rex` достаточно ввести `t`.
+• Опечатки и прозвища тоже распознаются: `achiles`, `trex`.
         """
 
         await update.message.reply_text(help_text, parse_mode='Markdown')
@@ -121,40 +288,110 @@ class TelegramBot:
     async def clear_session(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Очищает сессию пользователя"""
         user_id = update.effective_user.id
-        self.user_sessions[user_id] = {'enemy_team': []}
+        await self._save_session(user_id, [])
         await update.message.reply_text("✅ Сессия очищена. Можете вводить новую команду противника.")
 
-    def _build_ban_keyboard(self, user_id: int, page: int = 0, page_size: int = 20) -> InlineKeyboardMarkup:
-        """Строит пагинированную клавиатуру со всеми героями и статусом бана"""
+    def _ban_page_heroes(self, page: int, page_size: int = 20) -> List[str]:
         heroes = self.winrate_system.hero_names
-        total = len(heroes)
-        start = page * page_size
-        end = min(start + page_size, total)
-        page_heroes = heroes[start:end]
-
-        rows = []
-        for hero in page_heroes:
-            banned = self.redis_helper.is_character_banned(user_id, hero)
-            mark = "🚫" if banned else "✅"
-            rows.append([InlineKeyboardButton(f"{mark} {hero}", callback_data=f"toggleban_{hero}_{page}")])
-
-        nav = []
-        if page > 0:
-            nav.append(InlineKeyboardButton("⬅️", callback_data=f"banpage_{page-1}"))
-        nav.append(InlineKeyboardButton(f"{page+1}/{(total + page_size - 1)//page_size}", callback_data="noop"))
-        if end < total:
-            nav.append(InlineKeyboardButton("➡️", callback_data=f"banpage_{page+1}"))
-        rows.append(nav)
-
-        rows.append([InlineKeyboardButton("Закрыть", callback_data="close_ban")])
-        return InlineKeyboardMarkup(rows)
+        return heroes[page * page_size:(page + 1) * page_size]
+
+    async def _build_ban_keyboard(self, user_id: int, page: int = 0, page_size: int = 20,
+                                  banned_flags: List[bool] = None) -> InlineKeyboardMarkup:
+        """Строит пагинированную клавиатуру со всеми героями и статусом бана"""
+        system = self.winrate_system
+        # Статусы бана всей страницы одним запросом к Redis
+        if banned_flags is None:
+            banned_flags = await self.redis_helper.get_banned_flags(user_id, self._ban_page_heroes(page, page_size))
+        return self.renderer.ban_keyboard(system.version, system.hero_names, page, page_size, banned_flags)
 
     async def ban_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
         """Показывает список всех героев с чек-боксами бана"""
         user_id = update.effective_user.id
-        keyboard = self._build_ban_keyboard(user_id=user_id, page=0)
+        keyboard = await self._build_ban_keyboard(user_id=user_id, page=0)
         await update.message.reply_text("Выберите героев для бана (забаненные герои помечены 🚫):", reply_markup=keyboard)
 
+    async def _save_session(self, user_id: int, enemy_team: List[str], strategy: str = None,
+                            draft: Dict = None):
+        """Сохраняет сессию, заменяя имена героев индексами матрицы"""
+        matrix = self.winrate_system.matrix
+        if draft is not None:
+            draft = dict(draft, history=matrix.indices(draft['history']))
+        await self.sessions.set(user_id, new_session(
+            matrix.version,
+            matrix.indices(enemy_team),
+            strategy or self.default_strategy,
+            draft
+        ))
+
+    async def _load_session(self, user_id: int) -> Optional[Dict]:
+        """Возвращает сессию с именами героев вместо индексов или None, если сессии нет.
+
+        {'enemy': [...], 'strategy': 'mean', 'draft': {'format', 'side', 'history': [...]} или None}
+        """
+        session = await self.sessions.get(user_id)
+        if session is None:
+            return None
+
+        # Сессия могла быть сохранена до обновления датасета: индексы переводятся
+        # через имена героев той версии
+        hero_names = self.winrate_system.hero_names_for_version(session['version'])
+        if hero_names is None:
+            return None
+        hero_index = self.winrate_system.matrix.hero_index
+        draft = session.get('draft')
+        if draft is not None:
+            draft = dict(draft, history=[hero_names[i] for i in draft['history']])
+            if any(hero not in hero_index for hero in draft['history']):
+                draft = None
+        strategy = session['strategy'] if session['strategy'] in STRATEGIES else DEFAULT_STRATEGY
+        return {
+            'enemy': [hero_names[i] for i in session['enemy'] if hero_names[i] in hero_index],
+            'strategy': strategy,
+            'draft': draft
+        }
+
+    async def find_best_counters(self, enemy_team: List[str], banned_heroes: List[str],
+                                 top_n: int = 10, strategy: str = DEFAULT_STRATEGY) -> List[Tuple[str, float]]:
+        """Подбирает контрпики через локальный и, если включен, общий кеш в Redis"""
+        system = self.winrate_system
+        key = system.ranking_cache_key(enemy_team, top_n, banned_heroes, strategy=strategy)
+        if not self.shared_cache_ttl or key in system.result_cache:
+            return system.find_best_heroes(enemy_team, top_n=top_n, exclude_heroes=banned_heroes,
+                                           strategy=strategy)
+
+        cached = await self.redis_helper.get_cached_result(key)
+        if cached is not None:
+            best_counters = [(hero, winrate) for hero, winrate in cached]
+            system.result_cache.put(key, best_counters)
+            return best_counters
+
+        best_counters = system.find_best_heroes(enemy_team, top_n=top_n, exclude_heroes=banned_heroes,
+                                                strategy=strategy)
+        await self.redis_helper.set_cached_result(key, best_counters, self.shared_cache_ttl)
+        return best_counters
+
+    async def _counter_list_view(self, user_id: int, enemy_team: List[str], strategy: str,
+                                 page: int = 0) -> Tuple[List[Tuple[str, float]], str, InlineKeyboardMarkup]:
+        """Страница списка контрпиков и ранжирование, из которого она взята.
+
+        Первая страница - это топ, дальние страницы берутся из полного
+        ранжирования, которое считается один раз при первом листании и
+        дальше читается из кеша.
+        """
+        system = self.winrate_system
+        matrix = system.matrix
+        banned_heroes = await self.redis_helper.get_bans_list(user_id)
+        top_n = self.list_page_size if page == 0 else self.list_max_results
+        ranking = await self.find_best_counters(enemy_team, banned_heroes, top_n, strategy)
+
+        candidates = matrix.num_heroes - len(set(matrix.indices(enemy_team)) | set(matrix.indices(banned_heroes)))
+        num_pages = max(1, -(-min(candidates, self.list_max_results) // self.list_page_size))
+        key = system.ranking_cache_key(enemy_team, top_n, banned_heroes, matrix.version, strategy)
+        text, keyboard = self.renderer.counter_list(matrix.version, matrix.hero_index, key, enemy_team, ranking,
+                                                    strategy, page, self.list_page_size, num_pages)
+        return ranking, text, keyboard
+
+    @timed(PARSE_SECONDS)
     def parse_hero_input(self, text: str) -> Tuple[List[str], List[str]]:
         """Парсит ввод пользователя и находит персонажей"""
         # Разделяем по запятым или пробелам
@@ -183,8 +420,10 @@ class TelegramBot:
         user_id = update.effective_user.id
         text = update.message.text
 
-        if user_id not in self.user_sessions:
-            self.user_sessions[user_id] = {'enemy_team': []}
+        session = await self._load_session(user_id)
+        if session is not None and session['draft'] is not None:
+            await self._draft_input(update, session, text)
+            return
 
         found_heroes, not_found = self.parse_hero_input(text)
 
@@ -196,140 +435,461 @@ class TelegramBot:
             await update.message.reply_text(error_text)
             return
 
-        self.user_sessions[user_id]['enemy_team'] = found_heroes
-        response = f"🎯 **Команда противника:** {', '.join(found_heroes)}\n\n"
+        response = f"⚠️ Не найдены: {', '.join(not_found)}\n\n" if not_found else ""
 
-        if not_found:
-            response += f"⚠️ Не найдены: {', '.join(not_found)}\n\n"
-
-        banned_heroes = self.redis_helper.get_bans_list(user_id)
-        best_counters = self.winrate_system.find_best_heroes(found_heroes, top_n=10, exclude_heroes=banned_heroes)
+        strategy = session['strategy'] if session is not None else self.default_strategy
+        best_counters, text, reply_markup = await self._counter_list_view(user_id, found_heroes, strategy)
+        await self._save_session(user_id, found_heroes, strategy)
 
         if not best_counters:
+            response += f"🎯 **Команда противника:** {', '.join(found_heroes)}\n\n"
             response += "❌ Не удалось найти подходящих персонажей."
             await update.message.reply_text(response, parse_mode='Markdown')
             return
 
-        response += "🏆 **Топ-10 лучших контр-пиков:**\n\n"
-
-        keyboard = []
-        for i, (hero, winrate) in enumerate(best_counters, 1):
-            response += f"{i:2d}. **{hero}** - {winrate:.1%}\n"
-            keyboard.append([InlineKeyboardButton(
-                f"{i}. {hero} ({winrate:.1%})",
-                callback_data=f"details_{hero}"
-            )])
-
-        reply_markup = InlineKeyboardMarkup(keyboard)
-        await update.message.reply_text(response, parse_mode='Markdown', reply_markup=reply_markup)
+        await update.message.reply_text(response + text, parse_mode='Markdown', reply_markup=reply_markup)
 
     async def button_callback(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
-        """Обработчик нажатий на кнопки"""
+        """Обработчик нажатий на кнопки: разбор callback_data и вызов обработчика по коду действия"""
         query = update.callback_query
         user_id = query.from_user.id
 
-        await query.answer()
-
-        if user_id not in self.user_sessions:
+        callback = self.callback_codec.decode(query.data or '')
+        handler = self._callback_handlers.get(callback['op']) if callback is not None else None
+        if handler is not None and callback['op'] in HERO_CALLBACKS:
+            callback['hero'] = self._callback_hero(callback)
+            if callback['hero'] is None:
+                handler = None
+        if handler is None:
+            # Подделанная кнопка, кнопка старого формата или с данными неизвестной версии
+            await query.answer(text="Кнопка устарела, повторите запрос", show_alert=False)
+            return
+        # Обработчики из NOTIFYING_CALLBACKS отвечают на нажатие сами, с уведомлением
+        notifying = callback['op'] in NOTIFYING_CALLBACKS
+        if not notifying:
+            await query.answer()
+
+        session = await self._load_session(user_id)
+        if session is None:
+            if notifying:
+                await query.answer()
             await query.edit_message_text("❌ Сессия истекла. Используйте /start для начала работы.")
             return
+        if callback['op'] in DRAFT_CALLBACKS and session['draft'] is None:
+            await query.edit_message_text("Драфт не начат. Используйте /draft.")
+            return
+        with HANDLER_SECONDS.labels(handler.__name__.lstrip('_')).time():
+            await handler(query, session, callback)
 
-        if query.data.startswith("details_"):
-            hero = query.data.replace("details_", "")
-            enemy_team = self.user_sessions[user_id]['enemy_team']
-
-            details = self.winrate_system.get_hero_details(hero, enemy_team)
-
-            detail_text = f"📊 **Детали для {hero}**\n\n"
-            detail_text += f"📈 **Средний винрейт:** {details['average_winrate']:.1%}\n\n"
-            detail_text += "⚔️ **Матчапы:**\n"
-
-            for enemy, info in details['matchups'].items():
-                winrate = info['winrate']
-                games = info['games']
-                emoji = "🟢" if winrate > 0.6 else "🟡" if winrate > 0.4 else "🔴"
-                detail_text += f"{emoji} vs {enemy}: {winrate:.1%} игр: {games}\n"
-
-            detail_keyboard = [
-                [InlineKeyboardButton("🚫 Добавить в бан", callback_data=f"ban_{hero}")],
-                [InlineKeyboardButton("← Назад к списку", callback_data="back_to_list")]
-            ]
-            reply_markup = InlineKeyboardMarkup(detail_keyboard)
-
-            await query.edit_message_text(detail_text, parse_mode='Markdown', reply_markup=reply_markup)
-
-        elif query.data == "back_to_list":
-            enemy_team = self.user_sessions[user_id]['enemy_team']
-            banned_heroes = self.redis_helper.get_bans_list(user_id)
-            best_counters = self.winrate_system.find_best_heroes(enemy_team, top_n=10, exclude_heroes=banned_heroes)
-
-            response = f"🎯 **Команда противника:** {', '.join(enemy_team)}\n\n"
-            response += "🏆 **Топ-10 лучших контр-пиков:**\n\n"
-
-            keyboard = []
-            for i, (hero, winrate) in enumerate(best_counters, 1):
-                response += f"{i:2d}. **{hero}** - {winrate:.1%}\n"
-                keyboard.append([InlineKeyboardButton(
-                    f"{i}. {hero} ({winrate:.1%})",
-                    callback_data=f"details_{hero}"
-                )])
-
-            reply_markup = InlineKeyboardMarkup(keyboard)
-            await query.edit_message_text(response, parse_mode='Markdown', reply_markup=reply_markup)
-
-        elif query.data.startswith("ban_"):
-            hero = query.data.replace("ban_", "")
-            new_len = self.redis_helper.add_character_to_bans_list(user_id, hero)
-            await query.answer(text=f"Добавлен в баны: {hero} (всего: {new_len})", show_alert=False)
-
-        elif query.data == "show_bans":
-            bans = self.redis_helper.get_bans_list(user_id)
-            if bans:
-                text = "Ваш список банов:\n\n" + "\n".join(f"• {name}" for name in bans)
-            else:
-                text = "Ваш список банов пуст."
+    async def inline_query(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик инлайн-запросов: ответ считается в отдельной задаче.
 
-            # Показываем отдельным сообщением, не ломая текущий экран
-            await query.message.reply_text(text)
+        Запрос приходит на каждое нажатие клавиши; новый запрос пользователя
+        отменяет ответ на предыдущий, если тот еще не отправлен.
+        """
+        query = update.inline_query
+        user_id = query.from_user.id
+        previous = self._inline_tasks.get(user_id)
+        if previous is not None and not previous.done():
+            previous.cancel()
+            INLINE_SUPERSEDED.inc()
+
+        task = asyncio.create_task(self._answer_inline(query))
+        self._inline_tasks[user_id] = task
+
+        def forget(done: asyncio.Task):
+            if self._inline_tasks.get(user_id) is done:
+                del self._inline_tasks[user_id]
+        task.add_done_callback(forget)
+
+    async def _answer_inline(self, query):
+        # Уступаем циклу событий: если следующий запрос уже в очереди, этот отменится до подсчета
+        await asyncio.sleep(0)
+        try:
+            with HANDLER_SECONDS.labels('inline_answer').time():
+                strategy = self.default_strategy
+                suggestions = self.inline_completer.suggest(query.query, strategy, limit=self.inline_completions,
+                                                            top_n=self.list_page_size, budget=self.inline_budget)
+                results = [self.renderer.inline_article(suggestion, strategy) for suggestion in suggestions]
+                await query.answer(results, cache_time=self.inline_cache_time, is_personal=False)
+        except BadRequest as e:
+            # Ответ опоздал: Telegram принимает его только в течение нескольких секунд после запроса
+            logger.info("Инлайн-запрос не отвечен: %s", e)
+        except Exception:
+            logger.exception("Ошибка ответа на инлайн-запрос")
+
+    async def _count_update(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Считает входящие обновления по типу"""
+        update_type = next((name for name in UPDATE_TYPES if getattr(update, name, None) is not None), 'other')
+        UPDATES.labels(update_type).inc()
+
+    def _collect_metrics(self):
+        """Выставляет метрики, которые считаются в момент выгрузки"""
+        for name, cache in (('results', self.winrate_system.result_cache), ('render', self.renderer.cache)):
+            stats = cache.stats()
+            for result, total in (('hit', stats['hits']), ('miss', stats['misses'])):
+                # Счетчики кеша только растут, в метрику добавляется прирост с прошлой выгрузки
+                lookups = CACHE_LOOKUPS.labels(name, result)
+                lookups.inc(total - lookups.value)
+            CACHE_HIT_RATIO.labels(name).set(stats['hit_rate'])
+            CACHE_SIZE.labels(name).set(stats['size'])
+        DATASET_INFO.clear()
+        DATASET_INFO.labels(self.winrate_system.version).set(1)
+        DATASET_HEROES.set(self.winrate_system.num_heroes)
+
+    def _callback(self, op: int, arg: int = 0, page: int = 0) -> str:
+        """callback_data кнопки для текущей версии датасета"""
+        return self.callback_codec.encode(op, self.winrate_system.version, arg, page)
+
+    def _callback_hero(self, callback: Dict) -> Optional[str]:
+        """Герой кнопки по именам версии, в которой она создана; None для неизвестной версии"""
+        system = self.winrate_system
+        for version in system.known_versions():
+            if version_tag(version) == callback['version']:
+                names = system.hero_names_for_version(version)
+                if callback['arg'] < len(names) and names[callback['arg']] in system.matrix.hero_index:
+                    return names[callback['arg']]
+                return None
+        return None
+
+    async def _on_details(self, query, session: Dict, callback: Dict):
+        hero, enemy_team, strategy = callback['hero'], session['enemy'], session['strategy']
+        details = self.winrate_system.get_hero_details(hero, enemy_team, strategy)
+
+        detail_text = f"📊 **Детали для {hero}**\n\n"
+        detail_text += f"📈 **Средний винрейт:** {details['average_winrate']:.1%}\n"
+        if strategy != DEFAULT_STRATEGY:
+            detail_text += f"📐 **Оценка ({STRATEGIES[strategy].title.lower()}):** {details['score']:.1%}\n"
+        detail_text += "\n⚔️ **Матчапы** (в скобках 95% доверительный интервал):\n"
+
+        for enemy, info in details['matchups'].items():
+            winrate = info['winrate']
+            games = info['games']
+            low, high = info['ci']
+            emoji = "🟢" if winrate > 0.6 else "🟡" if winrate > 0.4 else "🔴"
+            detail_text += f"{emoji} vs {enemy}: {winrate:.1%} ({low:.0%}–{high:.0%}) игр: {games}\n"
+
+        hero_idx = self.winrate_system.matrix.hero_index[hero]
+        detail_keyboard = [
+            [InlineKeyboardButton("🚫 Добавить в бан", callback_data=self._callback(callbacks.BAN, hero_idx))],
+            [InlineKeyboardButton("← Назад к списку", callback_data=self._callback(callbacks.BACK_TO_LIST))]
+        ]
+        reply_markup = InlineKeyboardMarkup(detail_keyboard)
+
+        await query.edit_message_text(detail_text, parse_mode='Markdown', reply_markup=reply_markup)
+
+    async def _on_back_to_list(self, query, session: Dict, callback: Dict):
+        await self._show_counter_list(query, session, session['strategy'])
+
+    async def _on_scoring(self, query, session: Dict, callback: Dict):
+        # Пересчет того же запроса другой стратегией, она же становится выбором по умолчанию
+        names = list(STRATEGIES)
+        if callback['arg'] >= len(names) or names[callback['arg']] == session['strategy']:
+            return
+        await self._show_counter_list(query, session, names[callback['arg']])
 
-        elif query.data == "clear_bans":
-            self.redis_helper.clear_bans_list(user_id)
-            await query.answer(text="Список банов очищен", show_alert=False)
+    async def _show_counter_list(self, query, session: Dict, strategy: str):
+        user_id = query.from_user.id
+        enemy_team = session['enemy']
+        _, text, reply_markup = await self._counter_list_view(user_id, enemy_team, strategy)
+        await self._save_session(user_id, enemy_team, strategy)
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=reply_markup)
+
+    async def _on_list_page(self, query, session: Dict, callback: Dict):
+        page = callback['page']
+        ranking, text, reply_markup = await self._counter_list_view(
+            query.from_user.id, session['enemy'], session['strategy'], page)
+        if page * self.list_page_size >= len(ranking):
+            return
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=reply_markup)
 
-        elif query.data.startswith("toggleban_"):
-            # toggleban_<Hero>_<page>
-            _, hero, page_str = query.data.split("_", 2)
-            page = int(page_str)
-            if self.redis_helper.is_character_banned(user_id, hero):
-                self.redis_helper.remove_character_from_bans_list(user_id, hero)
-            else:
-                self.redis_helper.add_character_to_bans_list(user_id, hero)
+    async def _on_ban(self, query, session: Dict, callback: Dict):
+        hero = callback['hero']
+        new_len = await self.redis_helper.add_character_to_bans_list(query.from_user.id, hero)
+        await query.answer(text=f"Добавлен в баны: {hero} (всего: {new_len})", show_alert=False)
 
-            # Перестраиваем клавиатуру текущей страницы
-            keyboard = self._build_ban_keyboard(user_id=user_id, page=page)
-            await query.edit_message_reply_markup(reply_markup=keyboard)
+    async def _on_show_bans(self, query, session: Dict, callback: Dict):
+        bans = await self.redis_helper.get_bans_list(query.from_user.id)
+        if bans:
+            text = "Ваш список банов:\n\n" + "\n".join(f"• {name}" for name in bans)
+        else:
+            text = "Ваш список банов пуст."
+
+        # Показываем отдельным сообщением, не ломая текущий экран
+        await query.message.reply_text(text)
+
+    async def _on_clear_bans(self, query, session: Dict, callback: Dict):
+        await self.redis_helper.clear_bans_list(query.from_user.id)
+        await query.answer(text="Список банов очищен", show_alert=False)
 
-        elif query.data.startswith("banpage_"):
-            page = int(query.data.split("_", 1)[1])
-            keyboard = self._build_ban_keyboard(user_id=user_id, page=page)
+    async def _on_toggle_ban(self, query, session: Dict, callback: Dict):
+        # Бан переключается сразу, а перерисовка клавиатуры откладывается и склеивается
+        # с другими переключениями в этом сообщении
+        await self.redis_helper.toggle_character_ban(query.from_user.id, callback['hero'])
+        page = callback['page']
+        await self.ban_renders.schedule(self._message_key(query), lambda: self._render_ban_page(query, page))
+
+    async def _render_ban_page(self, query, page: int):
+        keyboard = await self._build_ban_keyboard(user_id=query.from_user.id, page=page)
+        try:
             await query.edit_message_reply_markup(reply_markup=keyboard)
+        except BadRequest as e:
+            # Повторные переключения могли вернуть клавиатуру к показанному состоянию
+            if 'not modified' not in str(e):
+                raise
+
+    @staticmethod
+    def _message_key(query):
+        if query.message is None:
+            return query.inline_message_id
+        return query.message.chat_id, query.message.message_id
+
+    async def _on_ban_page(self, query, session: Dict, callback: Dict):
+        # Новая страница рисуется с актуальными банами, отложенная перерисовка старой не нужна
+        self.ban_renders.cancel(self._message_key(query))
+        await self._render_ban_page(query, callback['page'])
+
+    async def _on_noop(self, query, session: Dict, callback: Dict):
+        pass
+
+    async def _on_close_ban(self, query, session: Dict, callback: Dict):
+        self.ban_renders.cancel(self._message_key(query))
+        await query.edit_message_text("Меню банов закрыто. Вводите команду соперников через запятую или пробел")
+
+    async def _on_draft_new(self, query, session: Dict, callback: Dict):
+        # Аргумент - номер формата в DRAFT_FORMATS, страница - сторона пользователя (0 - A, 1 - B)
+        formats = list(DRAFT_FORMATS)
+        if callback['arg'] >= len(formats) or callback['page'] > 1:
+            return
+        session['draft'] = {'format': formats[callback['arg']], 'side': 'AB'[callback['page']], 'history': []}
+        await self._update_draft(query, session)
+
+    async def _on_draft_move(self, query, session: Dict, callback: Dict):
+        hero = callback['hero']
+        draft = session['draft']
+        if hero in draft['history'] or len(draft['history']) >= len(parse_format(DRAFT_FORMATS[draft['format']])):
+            return
+        draft['history'].append(hero)
+        await self._update_draft(query, session)
 
-        elif query.data == "close_ban":
-            await query.edit_message_text("Меню банов закрыто. Вводите команду соперников через запятую или пробел")
+    async def _on_draft_undo(self, query, session: Dict, callback: Dict):
+        if not session['draft']['history']:
+            return
+        session['draft']['history'].pop()
+        await self._update_draft(query, session)
+
+    async def _on_draft_stop(self, query, session: Dict, callback: Dict):
+        session['draft'] = None
+        await self._save_draft(query.from_user.id, session)
+        await query.edit_message_text("Драфт завершен. Вводите команду соперников через запятую или пробел")
+
+    async def _update_draft(self, query, session: Dict):
+        user_id = query.from_user.id
+        await self._save_draft(user_id, session)
+        text, keyboard = await self._draft_view(user_id, session)
+        await query.edit_message_text(text, parse_mode='Markdown', reply_markup=keyboard)
+
+    async def _user_strategy(self, user_id: int) -> str:
+        session = await self._load_session(user_id)
+        return session['strategy'] if session is not None else self.default_strategy
+
+    async def counters_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /counters: лучшие контрпики против одного героя"""
+        user_id = update.effective_user.id
+        query = " ".join(context.args or [])
+        hero = self.winrate_system.find_hero_by_name(query) if query else None
+        if hero is None:
+            await update.message.reply_text("Укажите героя: `/counters Achilles`", parse_mode='Markdown')
+            return
+
+        strategy = await self._user_strategy(user_id)
+        banned_heroes = await self.redis_helper.get_bans_list(user_id)
+        best_counters = await self.find_best_counters([hero], banned_heroes, strategy=strategy)
+        if not best_counters:
+            await update.message.reply_text("❌ Не удалось найти подходящих персонажей.")
+            return
+
+        response = f"🎯 **Контрпики против {hero}** ({STRATEGIES[strategy].title.lower()}):\n\n"
+        for i, (counter, winrate) in enumerate(best_counters, 1):
+            response += f"{i:2d}. **{counter}** - {winrate:.1%}\n"
+        await update.message.reply_text(response, parse_mode='Markdown')
+
+    async def hero_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /hero: профиль героя или общий рейтинг"""
+        user_id = update.effective_user.id
+        strategy = await self._user_strategy(user_id)
+        title = STRATEGIES[strategy].title.lower()
+        query = " ".join(context.args or [])
+        if not query:
+            response = f"🏆 **Рейтинг героев** ({title}):\n\n"
+            for i, (hero, score) in enumerate(self.winrate_system.leaderboard(10, strategy), 1):
+                response += f"{i:2d}. **{hero}** - {score:.1%}\n"
+            await update.message.reply_text(response, parse_mode='Markdown')
+            return
+
+        hero = self.winrate_system.find_hero_by_name(query)
+        if hero is None:
+            await update.message.reply_text(f"❌ Персонаж не найден: {query}")
+            return
+
+        profile = self.winrate_system.hero_profile(hero, strategy)
+        response = f"📊 **{hero}**\n\n"
+        response += f"🏆 Место в рейтинге: {profile['rank']} из {profile['num_heroes']} ({title}: {profile['score']:.1%})\n"
+        response += "\n🟢 **Лучшие матчапы:**\n"
+        response += "".join(f"• vs {enemy}: {winrate:.1%} игр: {games}\n" for enemy, winrate, games in profile['best'])
+        response += "\n🔴 **Худшие матчапы:**\n"
+        response += "".join(f"• vs {enemy}: {winrate:.1%} игр: {games}\n" for enemy, winrate, games in profile['worst'])
+        await update.message.reply_text(response, parse_mode='Markdown')
+
+    async def team_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /team: лучшая команда и пары против команды противника"""
+        user_id = update.effective_user.id
+        found_heroes, not_found = self.parse_hero_input(" ".join(context.args or []))
+        if not found_heroes:
+            await update.message.reply_text("Укажите команду противника: `/team Achilles, Ciri`", parse_mode='Markdown')
+            return
+        if len(found_heroes) > self.team_max_size:
+            await update.message.reply_text(f"❌ В команде может быть не больше {self.team_max_size} персонажей.")
+            return
+
+        strategy = await self._user_strategy(user_id)
+        banned_heroes = await self.redis_helper.get_bans_list(user_id)
+
+        response = f"🎯 **Команда противника:** {', '.join(found_heroes)}\n\n"
+        if not_found:
+            response += f"⚠️ Не найдены: {', '.join(not_found)}\n\n"
+        for mode, title in TEAM_MODES.items():
+            try:
+                # Перебор max-min может занять заметное время, поэтому в отдельном потоке
+                team = await asyncio.to_thread(
+                    self.winrate_system.best_team, found_heroes, banned_heroes, mode, strategy)
+            except ValueError as e:
+                await update.message.reply_text(f"❌ {e}")
+                return
+            response += f"🧩 **{title}** ({team['score']:.1%}"
+            response += ")\n" if team['optimal'] else ", приближенно)\n"
+            for hero, enemy, score in team['pairs']:
+                response += f"• {hero} vs {enemy}: {score:.1%}\n"
+            response += "\n"
+        await update.message.reply_text(response, parse_mode='Markdown')
+
+    async def draft_command(self, update: Update, context: ContextTypes.DEFAULT_TYPE):
+        """Обработчик команды /draft: выбор формата драфта"""
+        user_id = update.effective_user.id
+        session = await self._load_session(user_id) or {'enemy': [], 'strategy': self.default_strategy}
+        session['draft'] = None
+        await self._save_draft(user_id, session)
+
+        text = "🧩 **Помощник по драфту**\n\nВыберите формат (A ходит первым):\n"
+        keyboard = []
+        for i, (name, spec) in enumerate(DRAFT_FORMATS.items()):
+            steps = ", ".join(f"{side} {'бан' if action == 'ban' else 'пик'}" for side, action in parse_format(spec))
+            text += f"• `{name}`: {steps}\n"
+            keyboard.append([
+                InlineKeyboardButton(f"{name}: я A", callback_data=self._callback(callbacks.DRAFT_NEW, i, 0)),
+                InlineKeyboardButton(f"{name}: я B", callback_data=self._callback(callbacks.DRAFT_NEW, i, 1))
+            ])
+        await update.message.reply_text(text, parse_mode='Markdown', reply_markup=InlineKeyboardMarkup(keyboard))
+
+    async def _save_draft(self, user_id: int, session: Dict):
+        await self._save_session(user_id, session['enemy'], strategy=session['strategy'], draft=session['draft'])
+
+    async def _draft_input(self, update: Update, session: Dict, text: str):
+        """Записывает ходы драфта, введенные текстом: герои применяются к шагам по порядку"""
+        user_id = update.effective_user.id
+        draft = session['draft']
+        steps = parse_format(DRAFT_FORMATS[draft['format']])
+        found_heroes, not_found = self.parse_hero_input(text)
+
+        skipped = list(not_found)
+        for hero in found_heroes:
+            if hero in draft['history'] or len(draft['history']) >= len(steps):
+                skipped.append(hero)
+            else:
+                draft['history'].append(hero)
+        await self._save_draft(user_id, session)
+
+        text, keyboard = await self._draft_view(user_id, session)
+        if skipped:
+            text = f"⚠️ Не записаны: {', '.join(skipped)}\n\n" + text
+        await update.message.reply_text(text, parse_mode='Markdown', reply_markup=keyboard)
+
+    async def _draft_view(self, user_id: int, session: Dict) -> Tuple[str, InlineKeyboardMarkup]:
+        """Состояние драфта и рекомендация следующего хода"""
+        draft = session['draft']
+        banned_heroes = await self.redis_helper.get_bans_list(user_id)
+        # Поиск занимает до DRAFT_TIME_BUDGET секунд, поэтому идет в отдельном потоке
+        result = await asyncio.to_thread(
+            self.winrate_system.solve_draft, draft['format'], draft['history'], session['strategy'],
+            banned_heroes, self.draft_time_budget, self.draft_width
+        )
+
+        me = draft['side']
+        opponent = 'B' if me == 'A' else 'A'
+        value = result['value'] if me == 'A' else 1.0 - result['value']
+        action_names = {'ban': 'бан', 'pick': 'пик'}
+
+        text = f"🧩 **Драфт {draft['format']}**\n\n"
+        text += f"🚫 Баны: {', '.join(result['bans']) or '—'}\n"
+        text += f"🟢 Ваши герои: {', '.join(result['picks'][me]) or '—'}\n"
+        text += f"🔴 Герои соперника: {', '.join(result['picks'][opponent]) or '—'}\n\n"
+
+        controls = [InlineKeyboardButton("↩️ Отменить ход", callback_data=self._callback(callbacks.DRAFT_UNDO)),
+                    InlineKeyboardButton("⏹ Завершить", callback_data=self._callback(callbacks.DRAFT_STOP))]
+        if result['step'] == len(result['steps']):
+            text += f"🏁 Драфт окончен. Средний винрейт ваших матчапов: {value:.1%}"
+            return text, InlineKeyboardMarkup([controls])
+
+        side, action = result['steps'][result['step']]
+        text += f"➡️ Сейчас: {'ваш' if side == me else 'соперника'} {action_names[action]}\n"
+        text += f"📈 Ожидаемый винрейт при лучшей игре обеих сторон: {value:.1%}"
+        if not result['complete']:
+            text += f" (просчитано ходов: {result['depth']})"
+        text += "\n\n💡 **Лучшая линия:**\n"
+        for i, (line_side, line_action, hero) in enumerate(result['line'], result['step'] + 1):
+            text += f"{i}. {'Вы' if line_side == me else 'Соперник'}: {action_names[line_action]} {hero}\n"
+        text += "\nНажмите героя или напишите имя, чтобы записать ход."
+
+        keyboard = []
+        candidates = result['candidates']
+        hero_index = self.winrate_system.matrix.hero_index
+        for i in range(0, len(candidates), 2):
+            keyboard.append([
+                InlineKeyboardButton(hero, callback_data=self._callback(callbacks.DRAFT_MOVE, hero_index[hero]))
+                for hero in candidates[i:i + 2]
+            ])
+        keyboard.append(controls)
+        return text, InlineKeyboardMarkup(keyboard)
 
 
 def main():
     """Основная функция для запуска бота"""
     BOT_TOKEN = os.environ["BOT_TOKEN"]
 
+    # polling - опрос getUpdates, webhook - HTTP-сервер, принимающий обновления от Telegram
+    mode = os.getenv('BOT_MODE', 'polling')
+
     bot = TelegramBot(BOT_TOKEN)
-    application = bot.create_application()
+    application = bot.create_application(concurrent_updates=int(os.getenv('CONCURRENT_UPDATES', 64)))
 
     print("🤖 Бот запускается...")
     print("Нажмите Ctrl+C для остановки")
 
     # Запускаем бота
-    application.run_polling(allowed_updates=Update.ALL_TYPES)
+    if mode == 'webhook':
+        url_path = os.getenv('WEBHOOK_PATH', 'telegram')
+        application.run_webhook(
+            listen=os.getenv('WEBHOOK_LISTEN', '0.0.0.0'),
+            port=int(os.getenv('WEBHOOK_PORT', 8443)),
+            url_path=url_path,
+            webhook_url=f"{os.environ['WEBHOOK_URL'].rstrip('/')}/{url_path}",
+            secret_token=os.getenv('WEBHOOK_SECRET') or None,
+            allowed_updates=Update.ALL_TYPES
+        )
+    elif mode == 'polling':
+        application.run_polling(allowed_updates=Update.ALL_TYPES)
+    else:
+        raise ValueError(f"Неизвестный режим запуска BOT_MODE={mode}")
 
 
 if __name__ == "__main__":
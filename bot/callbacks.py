@@ -0,0 +1,53 @@
+"""Компактный подписанный формат callback_data кнопок"""
+import base64
+import binascii
+import hashlib
+import hmac
+from functools import lru_cache
+from typing import Dict, Optional
+
+# Коды действий кнопок
+(DETAILS, BACK_TO_LIST, SCORING, BAN, SHOW_BANS, CLEAR_BANS, TOGGLE_BAN, BAN_PAGE, NOOP, CLOSE_BAN,
+ DRAFT_NEW, DRAFT_MOVE, DRAFT_UNDO, DRAFT_STOP, LIST_PAGE) = range(1, 16)
+
+# Код (1 байт), аргумент (2), страница (2), метка версии (6), подпись (7)
+TAG_SIZE = 6
+MAC_SIZE = 7
+PAYLOAD_SIZE = 5 + TAG_SIZE
+ENCODED_SIZE = (PAYLOAD_SIZE + MAC_SIZE) * 4 // 3
+
+
+@lru_cache(maxsize=64)
+def version_tag(version: str) -> bytes:
+    """Короткая метка версии датасета"""
+    return hashlib.sha1(version.encode('utf-8')).digest()[:TAG_SIZE]
+
+
+class CallbackCodec:
+    def __init__(self, secret: bytes):
+        self.secret = secret
+
+    def _mac(self, payload: bytes) -> bytes:
+        return hmac.new(self.secret, payload, hashlib.sha256).digest()[:MAC_SIZE]
+
+    def encode(self, op: int, version: str, arg: int = 0, page: int = 0) -> str:
+        payload = bytes((op,)) + arg.to_bytes(2, 'big') + page.to_bytes(2, 'big') + version_tag(version)
+        return base64.urlsafe_b64encode(payload + self._mac(payload)).decode('ascii')
+
+    def decode(self, data: str) -> Optional[Dict]:
+        """{'op', 'arg', 'page', 'version'} или None для чужих и поврежденных данных"""
+        if len(data) != ENCODED_SIZE:
+            return None
+        try:
+            raw = base64.urlsafe_b64decode(data)
+        except (ValueError, binascii.Error):
+            return None
+        payload, mac = raw[:PAYLOAD_SIZE], raw[PAYLOAD_SIZE:]
+        if not hmac.compare_digest(mac, self._mac(payload)):
+            return None
+        return {
+            'op': payload[0],
+            'arg': int.from_bytes(payload[1:3], 'big'),
+            'page': int.from_bytes(payload[3:5], 'big'),
+            'version': payload[5:]
+        }
@@ -0,0 +1,7 @@
+"""Имена каналов Redis, общие для бота и парсера.
+
+Модуль без зависимостей, чтобы парсер не тянул за собой код бота.
+"""
+
+# Канал Redis, в который парсер публикует версию нового датасета
+RELOAD_CHANNEL = 'winrates:updated'
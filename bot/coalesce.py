@@ -0,0 +1,58 @@
+"""Склейка частых повторных действий по ключу: выполняется последнее за окно"""
+import asyncio
+import logging
+from typing import Awaitable, Callable, Dict, Hashable
+
+logger = logging.getLogger(__name__)
+
+Action = Callable[[], Awaitable[None]]
+
+
+class Coalescer:
+    def __init__(self, delay: float):
+        self.delay = delay
+        # ключ -> [задача, последнее действие]
+        self._pending: Dict[Hashable, list] = {}
+        self.scheduled = 0
+        self.executed = 0
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    async def schedule(self, key: Hashable, action: Action):
+        self.scheduled += 1
+        if self.delay <= 0:
+            await self._execute(action)
+            return
+        entry = self._pending.get(key)
+        if entry is not None:
+            entry[1] = action
+            return
+        entry = self._pending[key] = [None, action]
+        entry[0] = asyncio.create_task(self._run(key, entry))
+
+    async def _run(self, key: Hashable, entry: list):
+        await asyncio.sleep(self.delay)
+        if self._pending.get(key) is entry:
+            del self._pending[key]
+        await self._execute(entry[1])
+
+    async def _execute(self, action: Action):
+        self.executed += 1
+        try:
+            await action()
+        except Exception:
+            logger.exception("Ошибка отложенного действия")
+
+    def cancel(self, key: Hashable):
+        """Отменяет отложенное действие, например если сообщение уже перерисовано иначе"""
+        entry = self._pending.pop(key, None)
+        if entry is not None:
+            entry[0].cancel()
+
+    async def flush(self):
+        """Выполняет все отложенные действия сразу, например при остановке"""
+        pending, self._pending = self._pending, {}
+        for task, action in pending.values():
+            task.cancel()
+            await self._execute(action)
@@ -0,0 +1,245 @@
+"""Поиск банов и пиков в драфте минимаксом с альфа-бета отсечением"""
+import time
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scoring import DEFAULT_STRATEGY, pairwise_scores
+
+# Форматы драфта: шаги "сторона:действие"
+DRAFT_FORMATS = {
+    'duel': 'A:ban B:ban A:pick B:pick',
+    'duel2': 'A:ban B:ban B:ban A:ban A:pick B:pick',
+    'team3': 'A:ban B:ban A:pick B:pick B:pick A:pick A:pick B:pick',
+}
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+def parse_format(spec: str) -> List[Tuple[str, str]]:
+    """'A:ban B:pick' -> [('A', 'ban'), ('B', 'pick')]"""
+    steps = []
+    for token in spec.split():
+        side, action = token.split(':')
+        if side not in ('A', 'B') or action not in ('ban', 'pick'):
+            raise ValueError(f"Неверный шаг драфта: {token}")
+        steps.append((side, action))
+    return steps
+
+
+class DraftSolver:
+    def __init__(self, matrix, steps: List[Tuple[str, str]], strategy: str = DEFAULT_STRATEGY,
+                 excluded: Iterable[int] = (), width: int = 8, time_budget: float = 1.0):
+        self.matrix = matrix
+        self.steps = steps
+        self.width = width
+        self.time_budget = time_budget
+        self.scores = pairwise_scores(matrix, strategy)
+
+        pool = np.ones(matrix.num_heroes, dtype=bool)
+        pool[list(excluded)] = False
+        self.pool = np.flatnonzero(pool)
+        # Сила героя - средняя оценка против пула, ею заполняются еще не выбранные слоты
+        pool_scores = self.scores[np.ix_(self.pool, self.pool)]
+        self.strength = np.full(matrix.num_heroes, 0.5)
+        if self.pool.size > 1:
+            self.strength[self.pool] = (pool_scores.sum(axis=1) - np.diag(pool_scores)) / (self.pool.size - 1)
+
+        self.total_a = sum(1 for side, action in steps if side == 'A' and action == 'pick')
+        self.total_b = sum(1 for side, action in steps if side == 'B' and action == 'pick')
+
+        self.picks = {'A': [], 'B': []}
+        self.banned = []
+        self.masks = {'A': 0, 'B': 0, 'ban': 0}
+        self.tt: Dict[Tuple[int, int, int], tuple] = {}
+        self.nodes = 0
+        self.tt_hits = 0
+        self._deadline = 0.0
+
+    def _apply(self, side: str, action: str, hero: int):
+        if action == 'pick':
+            self.picks[side].append(hero)
+            self.masks[side] |= 1 << hero
+        else:
+            self.banned.append(hero)
+            self.masks['ban'] |= 1 << hero
+
+    def _undo(self, side: str, action: str, hero: int):
+        if action == 'pick':
+            self.picks[side].pop()
+            self.masks[side] &= ~(1 << hero)
+        else:
+            self.banned.pop()
+            self.masks['ban'] &= ~(1 << hero)
+
+    def evaluate(self) -> float:
+        """Ожидаемая оценка драфта для A; для завершенного драфта - точная"""
+        picks_a, picks_b = self.picks['A'], self.picks['B']
+        if not self.total_a or not self.total_b:
+            return 0.5
+        missing_a = self.total_a - len(picks_a)
+        missing_b = self.total_b - len(picks_b)
+        scores, strength = self.scores, self.strength
+
+        total = 0.0
+        for a in picks_a:
+            for b in picks_b:
+                total += scores.item(a, b)
+            total += missing_b * strength.item(a)
+        for b in picks_b:
+            total += missing_a * (1.0 - strength.item(b))
+        total += missing_a * missing_b * 0.5
+        return total / (self.total_a * self.total_b)
+
+    def available(self) -> np.ndarray:
+        taken = set(self.picks['A']) | set(self.picks['B']) | set(self.banned)
+        if not taken:
+            return self.pool
+        return self.pool[~np.isin(self.pool, list(taken))]
+
+    def pick_gains(self, side: str, heroes: np.ndarray) -> np.ndarray:
+        """Насколько выбор каждого героя улучшает итог для стороны side"""
+        if side == 'A':
+            opponents, missing = self.picks['B'], self.total_b - len(self.picks['B'])
+            gains = self.scores[np.ix_(heroes, opponents)].sum(axis=1) if opponents else np.zeros(heroes.size)
+        else:
+            opponents, missing = self.picks['A'], self.total_a - len(self.picks['A'])
+            gains = (1.0 - self.scores[np.ix_(opponents, heroes)]).sum(axis=0) if opponents else np.zeros(heroes.size)
+        return gains + missing * self.strength[heroes]
+
+    def candidates(self, step: int, first: Optional[int] = None, width: Optional[int] = None) -> List[int]:
+        """Ходы шага по убыванию эвристики; бан - это лучший пик соперника"""
+        side, action = self.steps[step]
+        heroes = self.available()
+        if heroes.size == 0:
+            return []
+        gain_side = side if action == 'pick' else ('B' if side == 'A' else 'A')
+        gains = self.pick_gains(gain_side, heroes)
+        width = width or self.width
+        if width < heroes.size:
+            top = np.argpartition(-gains, width - 1)[:width]
+        else:
+            top = np.arange(heroes.size)
+        order = top[np.lexsort((heroes[top], -gains[top]))]
+        moves = heroes[order].tolist()
+        if first is not None and first in moves:
+            moves.remove(first)
+            moves.insert(0, first)
+        elif first is not None:
+            moves.insert(0, first)
+            del moves[width:]
+        return moves
+
+    def _key(self) -> Tuple[int, int, int]:
+        return self.masks['A'], self.masks['B'], self.masks['ban']
+
+    def _search(self, step: int, depth: int, alpha: float, beta: float) -> float:
+        self.nodes += 1
+        if not self.nodes & 255 and time.perf_counter() > self._deadline:
+            raise SearchTimeout()
+        if step == len(self.steps) or depth == 0:
+            return self.evaluate()
+
+        key = self._key()
+        entry = self.tt.get(key)
+        tt_move = None
+        if entry is not None:
+            entry_depth, entry_value, flag, tt_move = entry
+            if entry_depth >= depth:
+                self.tt_hits += 1
+                if flag == EXACT:
+                    return entry_value
+                if flag == LOWER:
+                    alpha = max(alpha, entry_value)
+                else:
+                    beta = min(beta, entry_value)
+                if alpha >= beta:
+                    return entry_value
+
+        side, action = self.steps[step]
+        maximizing = side == 'A'
+        moves = self.candidates(step, tt_move)
+        if not moves:
+            return self.evaluate()
+
+        alpha_start, beta_start = alpha, beta
+        best = -np.inf if maximizing else np.inf
+        best_move = moves[0]
+        for hero in moves:
+            self._apply(side, action, hero)
+            try:
+                value = self._search(step + 1, depth - 1, alpha, beta)
+            finally:
+                self._undo(side, action, hero)
+            if maximizing:
+                if value > best:
+                    best, best_move = value, hero
+                alpha = max(alpha, best)
+            else:
+                if value < best:
+                    best, best_move = value, hero
+                beta = min(beta, best)
+            if alpha >= beta:
+                break
+
+        if best <= alpha_start:
+            flag = UPPER
+        elif best >= beta_start:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt[key] = (depth, best, flag, best_move)
+        return best
+
+    def _principal_line(self, step: int, depth: int) -> List[Tuple[str, str, int]]:
+        """Лучшая линия из таблицы транспозиций после поиска"""
+        line = []
+        applied = []
+        while step < len(self.steps) and len(line) < depth:
+            entry = self.tt.get(self._key())
+            if entry is None:
+                break
+            side, action = self.steps[step]
+            hero = entry[3]
+            line.append((side, action, hero))
+            self._apply(side, action, hero)
+            applied.append((side, action, hero))
+            step += 1
+        for side, action, hero in reversed(applied):
+            self._undo(side, action, hero)
+        return line
+
+    def solve(self, history: List[int]) -> Dict:
+        """Ищет продолжение драфта после уже сделанных ходов history (индексы героев по шагам)"""
+        for (side, action), hero in zip(self.steps, history):
+            self._apply(side, action, hero)
+        step = len(history)
+        remaining = len(self.steps) - step
+
+        started = time.perf_counter()
+        self._deadline = started + self.time_budget
+        value = self.evaluate()
+        line: List[Tuple[str, str, int]] = []
+        depth_reached = 0
+        for depth in range(1, remaining + 1):
+            try:
+                value = self._search(step, depth, -np.inf, np.inf)
+            except SearchTimeout:
+                break
+            depth_reached = depth
+            line = self._principal_line(step, depth)
+
+        return {
+            'value': float(value),
+            'line': line,
+            'depth': depth_reached,
+            'complete': depth_reached == remaining,
+            'nodes': self.nodes,
+            'tt_hits': self.tt_hits,
+            'tt_size': len(self.tt),
+            'elapsed': time.perf_counter() - started
+        }
@@ -0,0 +1,133 @@
+"""Инлайн-режим: дополнение имен героев и контрпики на каждое нажатие клавиши"""
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from cache import LRUCache
+
+
+def split_lineup(text: str) -> Tuple[List[str], str]:
+    """Законченные имена и недописанное имя; разделители - как в parse_hero_input"""
+    if ',' in text:
+        parts = [part.strip() for part in text.split(',')]
+        partial = parts.pop()
+    else:
+        parts = text.split()
+        partial = '' if not parts or text[-1].isspace() else parts.pop()
+    return [part for part in parts if part], partial
+
+
+class InlineCompleter:
+    def __init__(self, system, sums_cache_size: int = 256, results_cache_size: int = 2048):
+        self.system = system
+        # (стратегия, индексы состава) -> (сумма value, сумма weight или число противников)
+        self.sums_cache = LRUCache(sums_cache_size)
+        # (стратегия, нормализованный запрос, параметры) -> готовые подсказки
+        self.results_cache = LRUCache(results_cache_size)
+        # законченное имя из запроса -> индекс героя или -1
+        self.names_cache = LRUCache(results_cache_size)
+
+    def _resolve(self, dataset, name: str) -> int:
+        key = name.lower()
+        index = self.names_cache.get(key)
+        if index is None:
+            hero = dataset.name_index.find(name)
+            index = dataset.matrix.hero_index[hero] if hero is not None else -1
+            self.names_cache.put(key, index)
+        return index
+
+    def _sums(self, matrix, strategy: str, enemy_idx: Tuple[int, ...]):
+        key = (strategy, enemy_idx)
+        sums = self.sums_cache.get(key)
+        if sums is None:
+            value, weight = matrix.scoring(strategy)
+            if not enemy_idx:
+                total = np.zeros(matrix.num_heroes, dtype=np.float64)
+                counted = 0.0 if weight is None else np.zeros(matrix.num_heroes, dtype=np.float64)
+            else:
+                total, counted = self._sums(matrix, strategy, enemy_idx[:-1])
+                j = enemy_idx[-1]
+                total = total + value[:, j]
+                counted = counted + 1.0 if weight is None else counted + weight[:, j]
+            sums = (total, counted)
+            self.sums_cache.put(key, sums)
+        return sums
+
+    @staticmethod
+    def _scores(total: np.ndarray, counted) -> np.ndarray:
+        if np.isscalar(counted):
+            return total / counted if counted > 0 else np.zeros_like(total)
+        scores = np.zeros_like(total)
+        np.divide(total, counted, out=scores, where=counted > 0)
+        return scores
+
+    def _rank(self, matrix, strategy: str, prefix: Tuple[int, ...], candidate: Optional[int],
+              top_n: int) -> List[Tuple[str, float]]:
+        """Топ против префикса состава и, если задан, еще одного героя"""
+        total, counted = self._sums(matrix, strategy, prefix)
+        enemy_idx = list(prefix)
+        if candidate is not None:
+            value, weight = matrix.scoring(strategy)
+            total = total + value[:, candidate]
+            counted = counted + 1.0 if weight is None else counted + weight[:, candidate]
+            enemy_idx.append(candidate)
+        scores = self._scores(total, counted)
+        allowed = np.ones(matrix.num_heroes, dtype=bool)
+        allowed[enemy_idx] = False
+        return [(matrix.hero_names[i], float(scores[i])) for i in matrix.top_k(scores, allowed, top_n)]
+
+    def suggest(self, text: str, strategy: str, limit: int = 5, top_n: int = 10,
+                max_enemies: int = 10, budget: float = 0.05) -> List[Dict]:
+        """Варианты состава противника для запроса с контрпиками к каждому.
+
+        Каждый вариант - {'enemy_team', 'counters', 'not_found'}. Первый
+        вариант считается всегда, остальные - пока не исчерпан бюджет
+        budget секунд.
+        """
+        deadline = time.perf_counter() + budget
+        dataset = self.system.dataset
+        matrix = dataset.matrix
+        for cache in (self.sums_cache, self.results_cache, self.names_cache):
+            cache.bind_version(dataset.version)
+
+        finished, partial = split_lineup(text)
+        key = (strategy, tuple(name.lower() for name in finished), partial.lower().strip(), limit, top_n)
+        cached = self.results_cache.get(key)
+        if cached is not None:
+            return cached
+
+        prefix, not_found = [], []
+        for name in finished[:max_enemies]:
+            index = self._resolve(dataset, name)
+            if index < 0:
+                not_found.append(name)
+            elif index not in prefix:
+                prefix.append(index)
+        prefix = tuple(prefix)
+
+        if partial and len(prefix) < max_enemies:
+            candidates = [i for i in dataset.name_index.complete(partial, limit + len(prefix)) if i not in prefix]
+            candidates = candidates[:limit]
+            if not candidates:
+                not_found.append(partial)
+        else:
+            candidates = []
+        if not candidates and not prefix:
+            self.results_cache.put(key, [])
+            return []
+
+        names = matrix.hero_names
+        suggestions = []
+        for candidate in candidates or [None]:
+            if suggestions and time.perf_counter() > deadline:
+                break
+            suggestions.append({
+                'enemy_team': [names[i] for i in prefix] + ([names[candidate]] if candidate is not None else []),
+                'counters': self._rank(matrix, strategy, prefix, candidate, top_n),
+                'not_found': not_found
+            })
+        # Обрезанный по бюджету ответ не кешируется: следующий такой же запрос досчитает все варианты
+        if len(suggestions) == max(len(candidates), 1):
+            self.results_cache.put(key, suggestions)
+        return suggestions
@@ -0,0 +1,101 @@
+"""Предрасчитанные на версию датасета списки контрпиков, матчапов и рейтинг героев"""
+import os
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+from scoring import DEFAULT_STRATEGY
+
+# Сколько контрпиков и матчапов хранить на героя
+INDEX_SIZE = int(os.getenv('COUNTERS_INDEX_SIZE', 32))
+# Сколько героев обрабатывать за один блок при построении
+BLOCK_SIZE = 1024
+
+
+class MatchupIndex:
+    def __init__(self, matrix, size: int = INDEX_SIZE):
+        self.matrix = matrix
+        self.size = min(size, max(matrix.num_heroes - 1, 0))
+        # стратегия -> (индексы контрпиков, их оценки) на каждого героя-противника
+        self._counters: Dict[str, Tuple[List[List[int]], List[List[float]]]] = {}
+        # стратегия -> (порядок героев в рейтинге, оценки, место героя)
+        self._leaderboards: Dict[str, Tuple[np.ndarray, np.ndarray, np.ndarray]] = {}
+        self._best, self._worst = self._build_matchups()
+
+    def prepare(self, strategies: Iterable[str]):
+        for strategy in strategies:
+            self.counters(0, strategy)
+            self.leaderboard(strategy)
+
+    def _single_enemy_scores(self, strategy: str, columns: np.ndarray) -> np.ndarray:
+        """Оценки всех героев против каждого противника из columns по отдельности.
+
+        Считаются так же, как average_winrates для команды из одного героя,
+        поэтому совпадают с ней побитово.
+        """
+        value, weight = self.matrix.scoring(strategy)
+        if weight is None:
+            return value[:, columns] / 1.0
+        weight = weight[:, columns]
+        scores = np.zeros(weight.shape, dtype=np.float64)
+        np.divide(value[:, columns], weight, out=scores, where=weight > 0)
+        return scores
+
+    def _blocks(self):
+        for start in range(0, self.matrix.num_heroes, BLOCK_SIZE):
+            yield np.arange(start, min(start + BLOCK_SIZE, self.matrix.num_heroes))
+
+    def _build_matchups(self) -> Tuple[List[List[int]], List[List[int]]]:
+        """Лучшие и худшие учитываемые матчапы каждого героя по винрейту"""
+        matrix = self.matrix
+        best, worst = [], []
+        for rows in self._blocks():
+            winrate = matrix.valid_winrate[rows]
+            valid = matrix.valid[rows]
+            best.extend(matrix.top_k_batch(winrate, valid, self.size))
+            worst.extend(matrix.top_k_batch(-winrate, valid, self.size))
+        return best, worst
+
+    def counters(self, enemy: int, strategy: str = DEFAULT_STRATEGY) -> Tuple[List[int], List[float]]:
+        """Лучшие герои против одного противника по убыванию оценки, сам противник исключен"""
+        index = self._counters.get(strategy)
+        if index is None:
+            matrix = self.matrix
+            heroes, scores = [], []
+            for columns in self._blocks():
+                # Строки - противники, столбцы - герои, которые против них играют
+                block = self._single_enemy_scores(strategy, columns).T
+                allowed = np.ones(block.shape, dtype=bool)
+                allowed[np.arange(columns.size), columns] = False
+                for row, top in zip(block, matrix.top_k_batch(block, allowed, self.size)):
+                    heroes.append(top)
+                    scores.append(row[top].tolist())
+            index = self._counters[strategy] = (heroes, scores)
+        return index[0][enemy], index[1][enemy]
+
+    def best_matchups(self, hero: int) -> List[int]:
+        return self._best[hero]
+
+    def worst_matchups(self, hero: int) -> List[int]:
+        return self._worst[hero]
+
+    def leaderboard(self, strategy: str = DEFAULT_STRATEGY) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Рейтинг героев по оценке против всех остальных героев.
+
+        Возвращает порядок героев, оценку каждого героя и его место (с 0).
+        """
+        board = self._leaderboards.get(strategy)
+        if board is None:
+            value, weight = self.matrix.scoring(strategy)
+            total = value.sum(axis=1) - np.diag(value)
+            if weight is None:
+                counted = np.full(total.shape, float(self.matrix.num_heroes - 1))
+            else:
+                counted = weight.sum(axis=1) - np.diag(weight)
+            scores = np.zeros(total.shape, dtype=np.float64)
+            np.divide(total, counted, out=scores, where=counted > 0)
+            order = np.lexsort((np.arange(scores.size), -scores))
+            position = np.empty_like(order)
+            position[order] = np.arange(order.size)
+            board = self._leaderboards[strategy] = (order, scores, position)
+        return board
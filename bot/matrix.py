@@ -0,0 +1,292 @@
+import hashlib
+import json
+import logging
+import os
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+from scoring import DEFAULT_STRATEGY, get_strategy
+from snapshot import SnapshotError, read_snapshot
+
+logger = logging.getLogger(__name__)
+
+
+# Матчапы с меньшим количеством игр не участвуют в подсчете винрейта
+MIN_GAMES = int(os.getenv('SCORING_MIN_GAMES', 10))
+
+
+def dataset_version(raw: bytes) -> str:
+    """Версия датасета - короткий хеш содержимого файла"""
+    return hashlib.sha1(raw).hexdigest()[:12]
+
+
+class MatchupMatrix:
+    """Плотное представление винрейтов: герои отображены на индексы матрицы"""
+
+    def __init__(self, hero_names: List[str], winrate: np.ndarray, games: np.ndarray, version: str = '',
+                 min_games: int = MIN_GAMES, precomputed: Dict[str, np.ndarray] = None):
+        self.hero_names = hero_names
+        self.version = version
+        self.min_games = min_games
+        self.hero_index = {hero: i for i, hero in enumerate(hero_names)}
+        self.num_heroes = len(hero_names)
+
+        # winrate[i, j] - винрейт героя i против героя j, games[i, j] - количество игр
+        self.winrate = winrate
+        self.games = games
+        # valid - матчапы с min_games играми и больше, valid_winrate - их винрейты (0 у остальных),
+        # valid_count - valid в float64 для подсчета учтенных врагов.
+        # Производные матрицы из снимка (секция -> memmap) вместо своих копий в каждом процессе
+        self._precomputed = precomputed or {}
+        if 'valid' in self._precomputed:
+            self.valid = self._precomputed['valid']
+            self.valid_winrate = self._precomputed['valid_winrate']
+        else:
+            self.valid = games >= min_games
+            self.valid_winrate = np.where(self.valid, winrate, 0.0).astype(np.float64)
+            if winrate.dtype != np.float64:
+                # Винрейты на сайте - целые проценты; округление снимает погрешность float32,
+                # и результаты совпадают с загрузкой из JSON
+                self.valid_winrate = np.round(self.valid_winrate, 6)
+        self.valid_count = self.valid.astype(np.float64)
+        # Матрицы стратегий оценки: имя -> (value, weight)
+        self._scoring = {}
+
+    @classmethod
+    def from_dict(cls, winrates_data: Dict[str, Dict[str, Dict]], version: str = '',
+                  min_games: int = MIN_GAMES) -> 'MatchupMatrix':
+        """Строит матрицы из словаря формата winrates.json"""
+        hero_names = list(winrates_data.keys())
+        hero_index = {hero: i for i, hero in enumerate(hero_names)}
+        size = len(hero_names)
+
+        winrate = np.zeros((size, size), dtype=np.float64)
+        games = np.zeros((size, size), dtype=np.int64)
+        for hero, matchups in winrates_data.items():
+            i = hero_index[hero]
+            for enemy, info in matchups.items():
+                j = hero_index.get(enemy)
+                if j is None:
+                    continue
+                winrate[i, j] = info['percent']
+                games[i, j] = info['games']
+
+        return cls(hero_names, winrate, games, version, min_games)
+
+    @classmethod
+    def from_json(cls, path: str, min_games: int = MIN_GAMES) -> 'MatchupMatrix':
+        with open(path, 'rb') as fp:
+            raw = fp.read()
+        return cls.from_dict(json.loads(raw), dataset_version(raw), min_games)
+
+    @classmethod
+    def from_snapshot(cls, path: str, min_games: int = MIN_GAMES) -> 'MatchupMatrix':
+        """Открывает бинарный снимок через memmap без разбора JSON.
+
+        Производные матрицы, посчитанные с другим порогом min_games,
+        не используются и строятся заново.
+        """
+        hero_names, winrate, games, version, sections = read_snapshot(path)
+        precomputed = {name: array for name, (section_min_games, array) in sections.items()
+                       if section_min_games == min_games}
+        return cls(hero_names, winrate, games, version, min_games, precomputed)
+
+    @classmethod
+    def load(cls, path: str, min_games: int = MIN_GAMES) -> 'MatchupMatrix':
+        """Загружает датасет, предпочитая бинарный снимок рядом с JSON.
+
+        Снимок используется, если он не старше JSON; при его отсутствии или
+        повреждении данные читаются из JSON.
+        """
+        base, ext = os.path.splitext(path)
+        snapshot_path = path if ext == '.bin' else base + '.bin'
+        json_path = base + '.json' if ext == '.bin' else path
+
+        if os.path.exists(snapshot_path) and (
+                not os.path.exists(json_path) or os.path.getmtime(snapshot_path) >= os.path.getmtime(json_path)):
+            try:
+                return cls.from_snapshot(snapshot_path, min_games)
+            except (SnapshotError, OSError, ValueError) as e:
+                logger.warning("Не удалось открыть снимок %s, читаем JSON: %s", snapshot_path, e)
+        return cls.from_json(json_path, min_games)
+
+    def to_dict(self) -> Dict[str, Dict[str, Dict]]:
+        """Восстанавливает словарь формата winrates.json из матриц (без матчапов с 0 игр)"""
+        winrates_data = {}
+        for i, hero in enumerate(self.hero_names):
+            row = {}
+            for j in np.flatnonzero(self.games[i]).tolist():
+                row[self.hero_names[j]] = {'games': self.games.item(i, j),
+                                           'percent': round(float(self.winrate[i, j]), 6)}
+            winrates_data[hero] = row
+        return winrates_data
+
+    def exact_winrate(self) -> np.ndarray:
+        """Винрейты в float64 без погрешности float32 из снимка"""
+        if self.winrate.dtype == np.float64:
+            return self.winrate
+        return np.round(self.winrate.astype(np.float64), 6)
+
+    def scoring(self, strategy: str = DEFAULT_STRATEGY) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Матрицы value и weight стратегии; строятся один раз на датасет или берутся из снимка"""
+        matrices = self._scoring.get(strategy)
+        if matrices is None:
+            value = self._precomputed.get(f'{strategy}.value')
+            if value is not None:
+                matrices = (value, self._precomputed.get(f'{strategy}.weight'))
+            else:
+                matrices = get_strategy(strategy).build(self)
+            self._scoring[strategy] = matrices
+        return matrices
+
+    def prepare_scoring(self, strategies: Iterable[str]):
+        """Заранее строит матрицы стратегий, чтобы первый запрос не платил за это"""
+        for strategy in strategies:
+            self.scoring(strategy)
+
+    def indices(self, heroes: Iterable[str]) -> List[int]:
+        """Переводит имена в индексы, пропуская неизвестные"""
+        return [self.hero_index[hero] for hero in heroes if hero in self.hero_index]
+
+    def average_winrates(self, enemy_idx: List[int], strategy: str = DEFAULT_STRATEGY) -> np.ndarray:
+        """Оценка каждого героя против набора врагов, по умолчанию средний винрейт.
+
+        Суммирование идет по врагам в исходном порядке, поэтому результат
+        побитово совпадает с последовательным подсчетом по словарю.
+        """
+        value, weight = self.scoring(strategy)
+        total = np.zeros(self.num_heroes, dtype=np.float64)
+        for j in enemy_idx:
+            total += value[:, j]
+        if weight is None:
+            counted = np.full(self.num_heroes, float(len(enemy_idx)))
+        else:
+            counted = np.zeros(self.num_heroes, dtype=np.float64)
+            for j in enemy_idx:
+                counted += weight[:, j]
+
+        scores = np.zeros(self.num_heroes, dtype=np.float64)
+        np.divide(total, counted, out=scores, where=counted > 0)
+        return scores
+
+    def score(self, hero_idx: int, enemy_idx: List[int], strategy: str = DEFAULT_STRATEGY) -> float:
+        """Оценка одного героя; совпадает с соответствующим элементом average_winrates"""
+        value, weight = self.scoring(strategy)
+        total = 0.0
+        for j in enemy_idx:
+            total += value.item(hero_idx, j)
+        counted = float(len(enemy_idx)) if weight is None else sum(weight.item(hero_idx, j) for j in enemy_idx)
+        return total / counted if counted > 0 else 0.0
+
+    def top_k(self, scores: np.ndarray, allowed: np.ndarray, k: int) -> List[int]:
+        """Индексы k лучших разрешенных героев по убыванию очков.
+
+        При равенстве очков сохраняется исходный порядок героев, как у
+        стабильной сортировки.
+        """
+        candidates = np.flatnonzero(allowed)
+        if k <= 0 or candidates.size == 0:
+            return []
+
+        candidate_scores = scores[candidates]
+        if k < candidates.size:
+            threshold = candidate_scores[np.argpartition(-candidate_scores, k - 1)[k - 1]]
+            keep = candidate_scores >= threshold
+            candidates = candidates[keep]
+            candidate_scores = candidate_scores[keep]
+
+        order = np.lexsort((candidates, -candidate_scores))
+        return candidates[order[:k]].tolist()
+
+    def rank(self, enemy_team: List[str], top_n: int, exclude_heroes: Iterable[str] = (),
+             strategy: str = DEFAULT_STRATEGY) -> List[Tuple[str, float]]:
+        """Ранжирует героев против команды противника"""
+        enemy_idx = self.indices(enemy_team)
+        scores = self.average_winrates(enemy_idx, strategy)
+
+        allowed = np.ones(self.num_heroes, dtype=bool)
+        allowed[enemy_idx] = False
+        allowed[self.indices(exclude_heroes)] = False
+
+        return [(self.hero_names[i], float(scores[i])) for i in self.top_k(scores, allowed, top_n)]
+
+    def membership(self, teams_idx: List[List[int]]) -> np.ndarray:
+        """Маска команда x герой: входит ли герой в команду"""
+        rows = np.repeat(np.arange(len(teams_idx)), [len(team) for team in teams_idx])
+        cols = np.fromiter((i for team in teams_idx for i in team), dtype=np.int64, count=rows.size)
+        mask = np.zeros((len(teams_idx), self.num_heroes), dtype=bool)
+        mask[rows, cols] = True
+        return mask
+
+    def top_k_batch(self, scores: np.ndarray, allowed: np.ndarray, k: int) -> List[List[int]]:
+        """Построчный top_k для матрицы очков без цикла по строкам"""
+        num_rows = scores.shape[0]
+        if k <= 0 or num_rows == 0:
+            return [[] for _ in range(num_rows)]
+
+        masked = np.where(allowed, scores, -np.inf)
+        if k < self.num_heroes:
+            threshold = -np.partition(-masked, k - 1, axis=1)[:, k - 1]
+            candidates = allowed & (masked >= threshold[:, None])
+        else:
+            candidates = allowed
+
+        rows, cols = np.nonzero(candidates)
+        order = np.lexsort((cols, -masked[rows, cols], rows))
+        rows, cols = rows[order], cols[order]
+
+        starts = np.searchsorted(rows, np.arange(num_rows))
+        ends = np.minimum(np.searchsorted(rows, np.arange(num_rows), side='right'), starts + k)
+        cols = cols.tolist()
+        return [cols[start:end] for start, end in zip(starts.tolist(), ends.tolist())]
+
+    def rank_batch(self, enemy_teams: List[List[str]], top_n: int, exclude_per_team: List[Iterable[str]],
+                   strategy: str = DEFAULT_STRATEGY) -> List[List[Tuple[str, float]]]:
+        """Ранжирует героев сразу против множества команд.
+
+        Столбцы врагов складываются по позициям в команде, как в
+        average_winrates, поэтому очки и порядок при равенстве побитово
+        совпадают с rank.
+        """
+        teams_idx = [self.indices(team) for team in enemy_teams]
+        in_team = self.membership(teams_idx)
+        excluded = self.membership([self.indices(exclude) for exclude in exclude_per_team])
+
+        lengths = np.array([len(team) for team in teams_idx], dtype=np.int64)
+        padded = np.zeros((len(teams_idx), int(lengths.max(initial=0))), dtype=np.int64)
+        for row, team in enumerate(teams_idx):
+            padded[row, :len(team)] = team
+
+        value, weight = self.scoring(strategy)
+        totals = np.zeros(in_team.shape, dtype=np.float64)
+        counted = np.zeros(in_team.shape, dtype=np.float64)
+        for position in range(padded.shape[1]):
+            rows = np.flatnonzero(lengths > position)
+            cols = padded[rows, position]
+            totals[rows] += value[:, cols].T
+            if weight is not None:
+                counted[rows] += weight[:, cols].T
+        if weight is None:
+            counted[:] = lengths[:, None]
+        scores = np.zeros_like(totals)
+        np.divide(totals, counted, out=scores, where=counted > 0)
+
+        allowed = ~(in_team | excluded)
+        names = self.hero_names
+        return [
+            [(names[i], float(row[i])) for i in top]
+            for row, top in zip(scores, self.top_k_batch(scores, allowed, top_n))
+        ]
+
+    def matchup_row(self, hero_idx: int, enemy_idx: List[int]) -> Tuple[list, list, list]:
+        """Винрейты, игры и признак учета для одного героя против списка врагов"""
+        # Поэлементный item() для короткого списка быстрее fancy-индексации
+        return ([self.valid_winrate.item(hero_idx, j) for j in enemy_idx],
+                [self.games.item(hero_idx, j) for j in enemy_idx],
+                [self.valid.item(hero_idx, j) for j in enemy_idx])
+
+    def matchup_rows(self, heroes_idx: List[int], enemy_idx: List[int]) -> Tuple[list, list, list]:
+        """Винрейты, игры и признак учета для героев против списка врагов"""
+        block = np.ix_(heroes_idx, enemy_idx)
+        return self.valid_winrate[block].tolist(), self.games[block].tolist(), self.valid[block].tolist()
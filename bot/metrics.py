@@ -0,0 +1,394 @@
+"""Метрики в текстовом формате Prometheus и семплирующий профайлер цикла событий"""
+import asyncio
+import bisect
+import functools
+import logging
+import sys
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import Counter as StackCounter
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Допустимый интервал семплирования профайлера, с: чаще - поток профайлера съедает процессор
+PROFILE_INTERVALS = (0.001, 1.0)
+
+
+def _escape(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Metric(ABC):
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: Dict[Tuple[str, ...], object] = {}
+
+    def labels(self, *values: str):
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(f"Метрика {self.name} ожидает метки {self.labelnames}")
+            child = self._children[values] = self._new_child()
+        return child
+
+    @abstractmethod
+    def _new_child(self):
+        """Значение метрики для одного набора меток"""
+
+    @abstractmethod
+    def _samples(self) -> List[str]:
+        """Строки значений в формате Prometheus без HELP и TYPE"""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+
+class _Value:
+    __slots__ = ('value',)
+
+    def __init__(self):
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        self.value += amount
+
+
+class _GaugeValue(_Value):
+    __slots__ = ()
+
+    def set(self, value: float):
+        self.value = value
+
+
+class Counter(Metric):
+    kind = 'counter'
+
+    def _new_child(self):
+        return _Value()
+
+    def inc(self, amount: float = 1.0):
+        self.labels().inc(amount)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, values)} {_format_value(child.value)}"
+                for values, child in self._children.items()]
+
+
+class Gauge(Counter):
+    kind = 'gauge'
+
+    def _new_child(self):
+        return _GaugeValue()
+
+    def set(self, value: float):
+        self.labels().set(value)
+
+    def clear(self):
+        self._children.clear()
+
+
+class _HistogramValue:
+    __slots__ = ('buckets', 'counts', 'sum', 'count')
+
+    def __init__(self, buckets: Tuple[float, ...]):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self):
+        return _Timer(self)
+
+
+class _Timer:
+    __slots__ = ('metric', 'started')
+
+    def __init__(self, metric):
+        self.metric = metric
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.metric.observe(time.perf_counter() - self.started)
+
+
+class Histogram(Metric):
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def _new_child(self):
+        return _HistogramValue(self.buckets)
+
+    def observe(self, value: float):
+        self.labels().observe(value)
+
+    def time(self):
+        return self.labels().time()
+
+    def _samples(self):
+        lines = []
+        for values, child in self._children.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float('inf'),), child.counts):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, values, le)} {cumulative}")
+            labels = _format_labels(self.labelnames, values)
+            lines.append(f"{self.name}_sum{labels} {_format_value(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+class Registry:
+    def __init__(self):
+        self._metrics: List[Metric] = []
+
+    def register(self, metric: Metric) -> Metric:
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+PARSE_SECONDS = REGISTRY.register(Histogram(
+    'bot_parse_hero_input_seconds', 'Разбор имен героев из сообщения'))
+SYSTEM_SECONDS = REGISTRY.register(Histogram(
+    'bot_system_seconds', 'Вызовы HeroWinrateSystem', ['method']))
+REDIS_SECONDS = REGISTRY.register(Histogram(
+    'bot_redis_seconds', 'Вызовы RedisHelper', ['method']))
+HANDLER_SECONDS = REGISTRY.register(Histogram(
+    'bot_handler_seconds', 'Обработка обновления обработчиком', ['handler']))
+HANDLER_ERRORS = REGISTRY.register(Counter(
+    'bot_handler_errors_total', 'Исключения в обработчиках', ['handler']))
+UPDATES = REGISTRY.register(Counter(
+    'bot_updates_total', 'Полученные обновления по типу', ['type']))
+INLINE_SUPERSEDED = REGISTRY.register(Counter(
+    'bot_inline_superseded_total', 'Инлайн-запросы, отмененные следующим запросом того же пользователя'))
+TELEGRAM_SECONDS = REGISTRY.register(Histogram(
+    'bot_telegram_api_seconds', 'Запросы к Bot API без ожидания лимитов', ['endpoint']))
+RATE_LIMIT_WAIT_SECONDS = REGISTRY.register(Histogram(
+    'bot_rate_limit_wait_seconds', 'Ожидание токена ограничителя частоты перед запросом'))
+CACHE_LOOKUPS = REGISTRY.register(Counter(
+    'bot_cache_lookups_total', 'Обращения к кешу', ['cache', 'result']))
+CACHE_HIT_RATIO = REGISTRY.register(Gauge(
+    'bot_cache_hit_ratio', 'Доля попаданий в кеш', ['cache']))
+CACHE_SIZE = REGISTRY.register(Gauge(
+    'bot_cache_entries', 'Записей в кеше', ['cache']))
+DATASET_INFO = REGISTRY.register(Gauge(
+    'bot_dataset_info', 'Текущая версия датасета', ['version']))
+DATASET_HEROES = REGISTRY.register(Gauge(
+    'bot_dataset_heroes', 'Героев в текущем датасете'))
+
+
+def timed(histogram: Histogram, *labels: str):
+    """Декоратор: длительность вызова функции или корутины в histogram с метками labels"""
+    child = histogram.labels(*labels)
+
+    def decorator(func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                started = time.perf_counter()
+                try:
+                    return await func(*args, **kwargs)
+                finally:
+                    child.observe(time.perf_counter() - started)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - started)
+        return wrapper
+
+    return decorator
+
+
+def instrument(name: str, callback):
+    """Обработчик PTB с замером времени и подсчетом исключений под меткой name"""
+    latency = HANDLER_SECONDS.labels(name)
+    errors = HANDLER_ERRORS.labels(name)
+
+    @functools.wraps(callback)
+    async def wrapper(update, context):
+        started = time.perf_counter()
+        try:
+            return await callback(update, context)
+        except Exception:
+            errors.inc()
+            raise
+        finally:
+            latency.observe(time.perf_counter() - started)
+
+    return wrapper
+
+
+class SamplingProfiler:
+    """Семплирующий профайлер одного потока на свернутых стеках"""
+
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.005, max_depth: int = 64):
+        self.thread_id = thread_id if thread_id is not None else threading.main_thread().ident
+        self.interval = interval
+        self.max_depth = max_depth
+        self.stacks = StackCounter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self.running:
+            return
+        self.stacks.clear()
+        self.samples = 0
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name='sampling-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> str:
+        """Останавливает профайлер и возвращает стеки: "a;b;c count" по строке, частые сверху"""
+        if self._thread is not None:
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return ''.join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None and len(names) < self.max_depth:
+                code = frame.f_code
+                names.append(f"{code.co_filename.rsplit('/', 1)[-1]}:{code.co_name}")
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+
+class MetricsServer:
+    """HTTP-сервер метрик на asyncio: /metrics и, если разрешено, /profile/start и /profile/stop"""
+
+    def __init__(self, host: str = '0.0.0.0', port: int = 8080, registry: Registry = REGISTRY,
+                 collect: Optional[Callable[[], None]] = None, profiler_enabled: bool = False):
+        self.host = host
+        self.port = port
+        self.registry = registry
+        self.collect = collect
+        self.profiler_enabled = profiler_enabled
+        self.profiler: Optional[SamplingProfiler] = None
+        self._server: Optional[asyncio.AbstractServer] = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        logger.info("Метрики доступны на %s:%d/metrics", self.host, self.port)
+
+    async def stop(self):
+        if self.profiler is not None:
+            self.profiler.stop()
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+            self._server = None
+
+    def respond(self, path: str) -> Tuple[str, str]:
+        """Статус и тело ответа на GET path"""
+        url = urlsplit(path)
+        if url.path == '/metrics':
+            if self.collect is not None:
+                try:
+                    self.collect()
+                except Exception:
+                    logger.exception("Ошибка сбора метрик")
+            return '200 OK', self.registry.render()
+        if self.profiler_enabled and url.path == '/profile/start':
+            try:
+                interval = float(parse_qs(url.query).get('interval', ['0.005'])[0])
+            except ValueError:
+                interval = None
+            low, high = PROFILE_INTERVALS
+            if interval is None or not low <= interval <= high:
+                return '400 Bad Request', f"interval must be between {low} and {high} seconds\n"
+            if self.profiler is None or not self.profiler.running:
+                self.profiler = SamplingProfiler(interval=interval)
+                self.profiler.start()
+            return '200 OK', 'started\n'
+        if self.profiler_enabled and url.path == '/profile/stop':
+            if self.profiler is None:
+                return '409 Conflict', 'not running\n'
+            stacks = self.profiler.stop()
+            self.profiler = None
+            return '200 OK', stacks
+        return '404 Not Found', 'not found\n'
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), 5)
+            # Заголовки не нужны, но их надо дочитать
+            while (await asyncio.wait_for(reader.readline(), 5)) not in (b'\r\n', b'\n', b''):
+                pass
+            parts = request_line.decode('latin-1').split()
+            if len(parts) < 2 or parts[0] != 'GET':
+                status, body = '405 Method Not Allowed', 'only GET\n'
+            else:
+                status, body = self.respond(parts[1])
+            payload = body.encode('utf-8')
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                f"Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(payload)}\r\n"
+                f"Connection: close\r\n\r\n".encode('latin-1') + payload
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
@@ -0,0 +1,177 @@
+import bisect
+import re
+from collections import defaultdict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+# Прозвища и написания, которые не находятся обычным поиском по подстроке
+ALIASES = {
+    'trex': 'T. Rex',
+    'tirex': 'T. Rex',
+    'spidey': 'Spiderman',
+    'spider-man': 'Spiderman',
+}
+
+# Сколько героев с наибольшим числом общих триграмм проверять на опечатку
+FUZZY_CANDIDATES = 64
+
+
+def normalize_name(name: str) -> str:
+    """Приводит имя к виду без регистра, пробелов и знаков препинания"""
+    return re.sub(r'[\W_]+', '', name.lower())
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """Расстояние Левенштейна; при превышении limit возвращает limit + 1"""
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+
+    previous = list(range(len(b) + 1))
+    for i, char_a in enumerate(a, 1):
+        current = [i]
+        for j, char_b in enumerate(b, 1):
+            current.append(min(
+                previous[j] + 1,
+                current[j - 1] + 1,
+                previous[j - 1] + (char_a != char_b)
+            ))
+        if min(current) > limit:
+            return limit + 1
+        previous = current
+    return previous[-1]
+
+
+class HeroNameIndex:
+    """Индекс имен героев для быстрого поиска по вводу пользователя.
+
+    Порядок поиска: точное совпадение, таблица прозвищ, подстрока (первый
+    герой в порядке списка, как при линейном проходе), совпадение без
+    знаков препинания и, наконец, поиск с опечатками.
+    """
+
+    def __init__(self, hero_names: List[str], game_volume: Sequence[int] = None,
+                 aliases: Dict[str, str] = None):
+        self.hero_names = hero_names
+        self.lowered = [hero.lower() for hero in hero_names]
+        self.game_volume = list(game_volume) if game_volume is not None else [0] * len(hero_names)
+
+        self.exact = {}
+        self.normalized = {}
+        for i, name in enumerate(self.lowered):
+            self.exact.setdefault(name, i)
+            self.normalized.setdefault(normalize_name(name), i)
+
+        known = set(hero_names)
+        self.aliases = {
+            alias.lower(): hero for alias, hero in (ALIASES if aliases is None else aliases).items()
+            if hero in known
+        }
+
+        # Отсортированные имена и слова имен для дополнения по началу
+        self.sorted_names = sorted((name, i) for i, name in enumerate(self.lowered))
+        self.sorted_words = sorted((word, i) for i, name in enumerate(self.lowered) for word in name.split()[1:])
+
+        # Для коротких запросов сразу храним первого подходящего героя,
+        # для длинных - списки героев по триграммам в порядке списка
+        self.short = {}
+        self.trigrams = defaultdict(list)
+        for i, name in enumerate(self.lowered):
+            for size in (1, 2):
+                for start in range(len(name) - size + 1):
+                    self.short.setdefault(name[start:start + size], i)
+            for trigram in sorted(self._trigrams(name)):
+                self.trigrams[trigram].append(i)
+        self.trigram_arrays = {trigram: np.array(heroes) for trigram, heroes in self.trigrams.items()}
+
+    @staticmethod
+    def _trigrams(text: str) -> set:
+        return {text[i:i + 3] for i in range(len(text) - 2)}
+
+    def find(self, partial_name: str) -> Optional[str]:
+        """Находит персонажа по точному, частичному или примерному совпадению"""
+        query = partial_name.lower().strip()
+
+        index = self.exact.get(query)
+        if index is not None:
+            return self.hero_names[index]
+
+        if query in self.aliases:
+            return self.aliases[query]
+
+        index = self._find_substring(query)
+        if index is None and normalize_name(query):
+            index = self.normalized.get(normalize_name(query))
+        if index is None:
+            index = self._find_fuzzy(query)
+        return self.hero_names[index] if index is not None else None
+
+    def complete(self, partial_name: str, limit: int = 5) -> List[int]:
+        """Индексы героев для дополнения недописанного имени.
+
+        Сначала имена, которые начинаются с запроса, затем имена со словом
+        на запрос (оба списка по алфавиту), затем содержащие его. Поиска с
+        опечатками нет: на каждое нажатие клавиши он слишком дорог.
+        """
+        query = partial_name.lower().strip()
+        found = []
+        if query in self.aliases:
+            found.append(self.exact[self.aliases[query].lower()])
+        for sorted_list in (self.sorted_names, self.sorted_words):
+            for name, i in sorted_list[bisect.bisect_left(sorted_list, (query,)):]:
+                if len(found) >= limit or not name.startswith(query):
+                    break
+                if i not in found:
+                    found.append(i)
+        if len(found) < limit and len(query) >= 3:
+            postings = [self.trigrams.get(trigram, []) for trigram in self._trigrams(query)]
+            for i in min(postings, key=len):
+                if len(found) >= limit:
+                    break
+                if i not in found and query in self.lowered[i]:
+                    found.append(i)
+        return found[:limit]
+
+    def _find_substring(self, query: str) -> Optional[int]:
+        if not query:
+            return 0 if self.hero_names else None
+        if len(query) < 3:
+            return self.short.get(query)
+
+        postings = [self.trigrams.get(trigram, []) for trigram in self._trigrams(query)]
+        rarest = min(postings, key=len)
+        for i in rarest:
+            if query in self.lowered[i]:
+                return i
+        return None
+
+    def _find_fuzzy(self, query: str) -> Optional[int]:
+        if len(query) < 4:
+            return None
+
+        limit = 1 if len(query) <= 5 else 2
+        query_trigrams = self._trigrams(query)
+        postings = [self.trigram_arrays[trigram] for trigram in query_trigrams if trigram in self.trigram_arrays]
+        if not postings:
+            return None
+
+        # Правка затрагивает не больше трех триграмм, поэтому у имени на расстоянии
+        # до limit не меньше required общих с запросом триграмм
+        required = max(len(query_trigrams) - 3 * limit, 1)
+        shared = np.bincount(np.concatenate(postings), minlength=len(self.hero_names))
+        candidates = np.flatnonzero(shared >= required)
+        if candidates.size > FUZZY_CANDIDATES:
+            order = np.lexsort((candidates, -shared[candidates]))
+            candidates = candidates[order[:FUZZY_CANDIDATES]]
+
+        best = None
+        for i in candidates.tolist():
+            words = [self.lowered[i]] + self.lowered[i].split()
+            distance = min(edit_distance(query, word, limit) for word in words)
+            if distance > limit:
+                continue
+            key = (distance, -self.game_volume[i], i)
+            if best is None or key < best:
+                best = key
+        return best[2] if best is not None else None
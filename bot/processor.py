@@ -0,0 +1,64 @@
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Awaitable, Deque, Dict, Optional
+
+from telegram import Update
+from telegram.ext import BaseUpdateProcessor
+
+logger = logging.getLogger(__name__)
+
+
+class PerUserUpdateProcessor(BaseUpdateProcessor):
+    """Обрабатывает обновления разных пользователей параллельно, а одного - по порядку.
+
+    Для каждого пользователя, у которого есть необработанные обновления,
+    держится очередь. Первое обновление разбирает ее в своем слоте
+    max_concurrent_updates, а следующие только встают в очередь и сразу
+    освобождают слот, поэтому ожидающие обновления не мешают другим
+    пользователям.
+    """
+
+    def __init__(self, max_concurrent_updates: int):
+        super().__init__(max_concurrent_updates)
+        # user_id -> очередь корутин обновлений; первая выполняется сейчас
+        self._queues: Dict[int, Deque[Awaitable[Any]]] = {}
+
+    @staticmethod
+    def _user_id(update: object) -> Optional[int]:
+        if isinstance(update, Update) and update.effective_user is not None:
+            return update.effective_user.id
+        return None
+
+    async def do_process_update(self, update: object, coroutine: Awaitable[Any]) -> None:
+        user_id = self._user_id(update)
+        if user_id is None:
+            await coroutine
+            return
+
+        queue = self._queues.get(user_id)
+        if queue is not None:
+            queue.append(coroutine)
+            return
+
+        queue = self._queues[user_id] = deque([coroutine])
+        try:
+            while queue:
+                try:
+                    await queue[0]
+                except Exception:
+                    logger.exception("Ошибка обработки обновления пользователя %s", user_id)
+                finally:
+                    queue.popleft()
+        finally:
+            del self._queues[user_id]
+            # Остаток очереди при отмене задачи, например при остановке бота
+            for pending in queue:
+                if asyncio.iscoroutine(pending):
+                    pending.close()
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        pass
@@ -0,0 +1,136 @@
+"""Ограничение частоты запросов к Bot API корзинами токенов"""
+import asyncio
+import contextlib
+import logging
+import time
+from datetime import timedelta
+from typing import Any, Callable, Coroutine, Dict, Optional, Union
+
+from telegram.error import RetryAfter
+from telegram.ext import BaseRateLimiter
+
+from metrics import RATE_LIMIT_WAIT_SECONDS, TELEGRAM_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Запросы, которые не отправляют сообщений в чаты и не попадают под лимиты рассылки
+UNLIMITED_ENDPOINTS = {'getUpdates', 'getMe', 'setWebhook', 'deleteWebhook', 'answerCallbackQuery',
+                       'answerInlineQuery'}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self) -> float:
+        """Берет токен, возможно в долг; возвращает, сколько секунд ждать до его появления"""
+        self._refill(time.monotonic())
+        self.tokens -= 1
+        return max(0.0, -self.tokens / self.rate)
+
+    def penalize(self, seconds: float):
+        """Следующий токен появится не раньше чем через seconds секунд (после ответа 429 от Telegram)"""
+        self._refill(time.monotonic())
+        self.tokens = min(self.tokens, 1 - seconds * self.rate)
+
+    def idle(self, now: float) -> bool:
+        """Корзина полна и ничем не отличается от новой"""
+        self._refill(now)
+        return self.tokens >= self.capacity
+
+
+class TokenBucketRateLimiter(BaseRateLimiter[int]):
+    """Общая корзина на бота и корзины на каждый чат.
+
+    rate_limit_args запроса - число повторов после RetryAfter вместо max_retries.
+    """
+
+    # Как часто удалять полные корзины неактивных чатов
+    CLEANUP_INTERVAL = 60.0
+
+    def __init__(self, overall_rate: float = 30.0, chat_rate: float = 1.0, chat_burst: float = 3.0,
+                 group_rate: float = 20 / 60, group_burst: float = 3.0, max_retries: int = 1):
+        self.overall = TokenBucket(overall_rate, overall_rate)
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self._chats: Dict[Union[int, str], TokenBucket] = {}
+        self._cleaned = time.monotonic()
+        self.delayed = 0
+        self.retries = 0
+
+    async def initialize(self) -> None:
+        pass
+
+    async def shutdown(self) -> None:
+        self._chats.clear()
+
+    def _chat_bucket(self, chat_id: Union[int, str]) -> TokenBucket:
+        bucket = self._chats.get(chat_id)
+        if bucket is None:
+            # Отрицательные id и @username - группы и каналы
+            group = isinstance(chat_id, str) or chat_id < 0
+            bucket = self._chats[chat_id] = (TokenBucket(self.group_rate, self.group_burst) if group
+                                             else TokenBucket(self.chat_rate, self.chat_burst))
+        return bucket
+
+    def _cleanup(self, now: float):
+        if now - self._cleaned < self.CLEANUP_INTERVAL:
+            return
+        self._cleaned = now
+        for chat_id in [chat_id for chat_id, bucket in self._chats.items() if bucket.idle(now)]:
+            del self._chats[chat_id]
+
+    def delay(self, endpoint: str, chat_id: Optional[Union[int, str]]) -> float:
+        """Резервирует токены запроса и возвращает время ожидания"""
+        if endpoint in UNLIMITED_ENDPOINTS:
+            return 0.0
+        wait = self.overall.reserve()
+        if chat_id is not None:
+            self._cleanup(time.monotonic())
+            wait = max(wait, self._chat_bucket(chat_id).reserve())
+        return wait
+
+    async def process_request(
+        self,
+        callback: Callable[..., Coroutine[Any, Any, Any]],
+        args: Any,
+        kwargs: Dict[str, Any],
+        endpoint: str,
+        data: Dict[str, Any],
+        rate_limit_args: Optional[int],
+    ):
+        chat_id = data.get('chat_id')
+        # id чата может прийти строкой
+        with contextlib.suppress(ValueError, TypeError):
+            chat_id = int(chat_id)
+
+        max_retries = rate_limit_args if rate_limit_args is not None else self.max_retries
+        for attempt in range(max_retries + 1):
+            wait = self.delay(endpoint, chat_id)
+            if wait > 0:
+                self.delayed += 1
+                await asyncio.sleep(wait)
+            RATE_LIMIT_WAIT_SECONDS.observe(wait)
+            started = time.perf_counter()
+            try:
+                return await callback(*args, **kwargs)
+            except RetryAfter as e:
+                if attempt == max_retries:
+                    raise
+                retry_after = e.retry_after
+                seconds = retry_after.total_seconds() if isinstance(retry_after, timedelta) else float(retry_after)
+                logger.info("Лимит Telegram для %s, повтор через %.1f с", endpoint, seconds)
+                self.retries += 1
+                (self._chat_bucket(chat_id) if chat_id is not None else self.overall).penalize(seconds)
+            finally:
+                TELEGRAM_SECONDS.labels(endpoint).observe(time.perf_counter() - started)
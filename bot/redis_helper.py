@@ -1,58 +1,229 @@
+import asyncio
 import json
+from typing import List
+
+from metrics import REDIS_SECONDS, timed
+
+
+# Переключение бана одной операцией, чтобы одновременные нажатия не теряли изменения
+TOGGLE_BAN_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[1], ARGV[1]) == 1 then
+    redis.call('SREM', KEYS[1], ARGV[1])
+    return 0
+end
+redis.call('SADD', KEYS[1], ARGV[1])
+return 1
+"""
+
+# Перенос старого JSON-списка банов в множество
+MIGRATE_BANS_SCRIPT = """
+local legacy = redis.call('GET', KEYS[1])
+if not legacy then
+    return 0
+end
+local bans = cjson.decode(legacy)
+for _, character in ipairs(bans) do
+    redis.call('SADD', KEYS[2], character)
+end
+redis.call('DEL', KEYS[1])
+return #bans
+"""
+
+
+def bans_key(user_id) -> str:
+    return f"bans:{user_id}"
+
+
+def legacy_bans_key(user_id) -> str:
+    return f"bans_list:{user_id}"
 
 
 class RedisHelper:
     def __init__(self, redis_client):
         self.redis = redis_client
+        self._toggle_ban = self.redis.register_script(TOGGLE_BAN_SCRIPT)
+        self._migrate_bans = self.redis.register_script(MIGRATE_BANS_SCRIPT)
+
+    @timed(REDIS_SECONDS, 'migrate_legacy_bans')
+    def migrate_legacy_bans(self) -> int:
+        """Переносит списки банов из JSON-строк bans_list:* в множества bans:*"""
+        migrated = 0
+        for key in self.redis.scan_iter(match=legacy_bans_key('*'), count=500):
+            user_id = key.split(':', 1)[1]
+            self._migrate_bans(keys=[key, bans_key(user_id)])
+            migrated += 1
+        return migrated
 
+    @timed(REDIS_SECONDS, 'add_character_to_bans_list')
     def add_character_to_bans_list(self, user_id: int, character: str):
         """Добавляет персонажа в список банов пользователя"""
-        key = f"bans_list:{user_id}"
-
-        bans_list = self.redis.get(key)
-        if bans_list:
-            bans_list = json.loads(bans_list)
-        else:
-            bans_list = []
-
-        bans_list.append(character)
-        self.redis.set(key, json.dumps(bans_list, ensure_ascii=False))
-
-        return len(bans_list)
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline()
+        pipe.sadd(key, character)
+        pipe.scard(key)
+        _, size = pipe.execute()
+        return size
 
+    @timed(REDIS_SECONDS, 'get_bans_list')
     def get_bans_list(self, user_id: int):
         """Получает весь список банов пользователя"""
-        key = f"bans_list:{user_id}"
-        bans_list = self.redis.get(key)
-
-        if bans_list:
-            return json.loads(bans_list)
-        else:
-            return []
+        return sorted(self.redis.smembers(bans_key(user_id)))
 
+    @timed(REDIS_SECONDS, 'clear_bans_list')
     def clear_bans_list(self, user_id: int):
         """Очищает список банов пользователя"""
-        key = f"bans_list:{user_id}"
-        self.redis.delete(key)
+        self.redis.delete(bans_key(user_id))
 
+    @timed(REDIS_SECONDS, 'remove_character_from_bans_list')
     def remove_character_from_bans_list(self, user_id: int, character: str):
         """Удаляет персонажа из списка банов пользователя (если есть)"""
-        key = f"bans_list:{user_id}"
-        bans_list_raw = self.redis.get(key)
-        if not bans_list_raw:
-            return 0
-        bans_list = json.loads(bans_list_raw)
-        if character in bans_list:
-            bans_list = [c for c in bans_list if c != character]
-            self.redis.set(key, json.dumps(bans_list, ensure_ascii=False))
-        return len(bans_list)
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline()
+        pipe.srem(key, character)
+        pipe.scard(key)
+        _, size = pipe.execute()
+        return size
 
+    @timed(REDIS_SECONDS, 'is_character_banned')
     def is_character_banned(self, user_id: int, character: str) -> bool:
         """Проверяет, забанен ли персонаж у пользователя"""
-        bans = self.get_bans_list(user_id)
-        return character in bans
+        return bool(self.redis.sismember(bans_key(user_id), character))
+
+    @timed(REDIS_SECONDS, 'get_banned_flags')
+    def get_banned_flags(self, user_id: int, characters: List[str]) -> List[bool]:
+        """Проверяет сразу несколько персонажей за один запрос к Redis"""
+        if not characters:
+            return []
+        return [bool(flag) for flag in self.redis.smismember(bans_key(user_id), characters)]
+
+    @timed(REDIS_SECONDS, 'toggle_character_ban')
+    def toggle_character_ban(self, user_id: int, character: str) -> bool:
+        """Атомарно переключает бан персонажа, возвращает True, если он теперь забанен"""
+        return bool(self._toggle_ban(keys=[bans_key(user_id)], args=[character]))
 
+    @timed(REDIS_SECONDS, 'set_bans_list')
     def set_bans_list(self, user_id: int, bans_list):
         """Полностью перезаписывает список банов пользователя"""
-        key = f"bans_list:{user_id}"
-        self.redis.set(key, json.dumps(bans_list, ensure_ascii=False))
\ No newline at end of file
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        if bans_list:
+            pipe.sadd(key, *bans_list)
+        pipe.execute()
+
+    @timed(REDIS_SECONDS, 'get_cached_result')
+    def get_cached_result(self, key: str):
+        """Получает результат подбора из общего для всех реплик кеша"""
+        cached = self.redis.get(f"result_cache:{key}")
+        if cached:
+            return json.loads(cached)
+        return None
+
+    @timed(REDIS_SECONDS, 'set_cached_result')
+    def set_cached_result(self, key: str, value, ttl: int):
+        """Сохраняет результат подбора в общий кеш на ttl секунд"""
+        self.redis.set(f"result_cache:{key}", json.dumps(value, ensure_ascii=False), ex=ttl)
+
+
+class AsyncRedisHelper:
+    """Асинхронный вариант RedisHelper для клиента redis.asyncio.
+
+    Каждый вызов ограничен таймаутом, чтобы зависший Redis не держал
+    обработчики, а связанные команды отправляются одним пайплайном.
+    """
+
+    def __init__(self, redis_client, timeout: float = 1.0):
+        self.redis = redis_client
+        self.timeout = timeout
+        self._toggle_ban = self.redis.register_script(TOGGLE_BAN_SCRIPT)
+        self._migrate_bans = self.redis.register_script(MIGRATE_BANS_SCRIPT)
+
+    async def _call(self, awaitable):
+        return await asyncio.wait_for(awaitable, self.timeout)
+
+    async def _execute(self, pipe):
+        return await self._call(pipe.execute())
+
+    @timed(REDIS_SECONDS, 'migrate_legacy_bans')
+    async def migrate_legacy_bans(self) -> int:
+        """Переносит списки банов из JSON-строк bans_list:* в множества bans:*"""
+        migrated = 0
+        async for key in self.redis.scan_iter(match=legacy_bans_key('*'), count=500):
+            user_id = key.split(':', 1)[1]
+            await self._call(self._migrate_bans(keys=[key, bans_key(user_id)]))
+            migrated += 1
+        return migrated
+
+    @timed(REDIS_SECONDS, 'add_character_to_bans_list')
+    async def add_character_to_bans_list(self, user_id: int, character: str):
+        """Добавляет персонажа в список банов пользователя"""
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline()
+        pipe.sadd(key, character)
+        pipe.scard(key)
+        _, size = await self._execute(pipe)
+        return size
+
+    @timed(REDIS_SECONDS, 'get_bans_list')
+    async def get_bans_list(self, user_id: int):
+        """Получает весь список банов пользователя"""
+        return sorted(await self._call(self.redis.smembers(bans_key(user_id))))
+
+    @timed(REDIS_SECONDS, 'clear_bans_list')
+    async def clear_bans_list(self, user_id: int):
+        """Очищает список банов пользователя"""
+        await self._call(self.redis.delete(bans_key(user_id)))
+
+    @timed(REDIS_SECONDS, 'remove_character_from_bans_list')
+    async def remove_character_from_bans_list(self, user_id: int, character: str):
+        """Удаляет персонажа из списка банов пользователя (если есть)"""
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline()
+        pipe.srem(key, character)
+        pipe.scard(key)
+        _, size = await self._execute(pipe)
+        return size
+
+    @timed(REDIS_SECONDS, 'is_character_banned')
+    async def is_character_banned(self, user_id: int, character: str) -> bool:
+        """Проверяет, забанен ли персонаж у пользователя"""
+        return bool(await self._call(self.redis.sismember(bans_key(user_id), character)))
+
+    @timed(REDIS_SECONDS, 'get_banned_flags')
+    async def get_banned_flags(self, user_id: int, characters: List[str]) -> List[bool]:
+        """Проверяет сразу несколько персонажей за один запрос к Redis"""
+        if not characters:
+            return []
+        flags = await self._call(self.redis.smismember(bans_key(user_id), characters))
+        return [bool(flag) for flag in flags]
+
+    @timed(REDIS_SECONDS, 'toggle_character_ban')
+    async def toggle_character_ban(self, user_id: int, character: str) -> bool:
+        """Атомарно переключает бан персонажа, возвращает True, если он теперь забанен"""
+        return bool(await self._call(self._toggle_ban(keys=[bans_key(user_id)], args=[character])))
+
+    @timed(REDIS_SECONDS, 'set_bans_list')
+    async def set_bans_list(self, user_id: int, bans_list):
+        """Полностью перезаписывает список банов пользователя"""
+        key = bans_key(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.delete(key)
+        if bans_list:
+            pipe.sadd(key, *bans_list)
+        await self._execute(pipe)
+
+    @timed(REDIS_SECONDS, 'get_cached_result')
+    async def get_cached_result(self, key: str):
+        """Получает результат подбора из общего для всех реплик кеша"""
+        cached = await self._call(self.redis.get(f"result_cache:{key}"))
+        if cached:
+            return json.loads(cached)
+        return None
+
+    @timed(REDIS_SECONDS, 'set_cached_result')
+    async def set_cached_result(self, key: str, value, ttl: int):
+        """Сохраняет результат подбора в общий кеш на ttl секунд"""
+        await self._call(self.redis.set(f"result_cache:{key}", json.dumps(value, ensure_ascii=False), ex=ttl))
+
+    async def close(self):
+        await self.redis.aclose()
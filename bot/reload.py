@@ -0,0 +1,99 @@
+import asyncio
+import logging
+import os
+from typing import Optional, Tuple
+
+from channels import RELOAD_CHANNEL
+from system import HeroWinrateSystem
+
+logger = logging.getLogger(__name__)
+
+# Сколько секунд ждать сообщения в канале за одно чтение
+LISTEN_TIMEOUT = 30
+
+
+class DatasetWatcher:
+    """Подхватывает новые винрейты без перезапуска бота.
+
+    Источники сигнала: изменение файлов winrates.json / winrates.bin
+    (опрос раз в poll_interval секунд) и сообщение в канале Redis.
+    Новый датасет строится в отдельном потоке и подменяется атомарно.
+    """
+
+    def __init__(self, system: HeroWinrateSystem, redis_client=None, poll_interval: float = 30,
+                 channel: str = RELOAD_CHANNEL):
+        self.system = system
+        self.redis = redis_client
+        self.poll_interval = poll_interval
+        self.channel = channel
+        self._lock = asyncio.Lock()
+        self._tasks = []
+        self._signature = self._files_signature()
+
+    def _files_signature(self) -> Tuple:
+        base = os.path.splitext(self.system.data_path)[0]
+        signature = []
+        for path in (base + '.json', base + '.bin'):
+            try:
+                stat = os.stat(path)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        return tuple(signature)
+
+    async def reload(self) -> Optional[str]:
+        """Загружает датасет заново; возвращает новую версию, если она сменилась"""
+        async with self._lock:
+            self._signature = self._files_signature()
+            try:
+                dataset = await asyncio.to_thread(self.system.load_dataset, self.system.data_path)
+            except Exception:
+                logger.exception("Не удалось загрузить новый датасет, продолжаем на версии %s",
+                                 self.system.version)
+                return None
+
+            if dataset.version == self.system.version:
+                return None
+            previous = self.system.version
+            self.system.swap_dataset(dataset)
+            logger.info("Датасет винрейтов обновлен: %s -> %s", previous, dataset.version)
+            return dataset.version
+
+    async def _poll_files(self):
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            if self._files_signature() != self._signature:
+                await self.reload()
+
+    async def _listen_channel(self):
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(self.channel)
+                # Сигналы, отправленные без подписки, теряются, но новые файлы видны по подписи
+                if self._files_signature() != self._signature:
+                    await self.reload()
+                while True:
+                    # Таймаут ожидания свой, а не socket_timeout пула: тишина в канале - не ошибка
+                    message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=LISTEN_TIMEOUT)
+                    if message is not None and message.get('data') != self.system.version:
+                        await self.reload()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Подписка на %s прервалась, переподключаемся", self.channel)
+                await asyncio.sleep(5)
+            finally:
+                await pubsub.aclose()
+
+    def start(self):
+        if self.poll_interval > 0:
+            self._tasks.append(asyncio.create_task(self._poll_files()))
+        if self.redis is not None and self.channel:
+            self._tasks.append(asyncio.create_task(self._listen_channel()))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
@@ -0,0 +1,124 @@
+"""Кеш отрисовки клавиатур банов и страниц списка контрпиков"""
+import hashlib
+from typing import Dict, List, Tuple
+
+from telegram import InlineKeyboardButton, InlineKeyboardMarkup, InlineQueryResultArticle, InputTextMessageContent
+
+import callbacks
+from cache import LRUCache
+from scoring import STRATEGIES
+
+
+class Renderer:
+    def __init__(self, codec: callbacks.CallbackCodec, maxsize: int = 512):
+        self.codec = codec
+        self.cache = LRUCache(maxsize)
+
+    def strategy_row(self, version: str, current: str) -> List[InlineKeyboardButton]:
+        """Кнопки выбора стратегии оценки, текущая отмечена"""
+        return [
+            InlineKeyboardButton(f"{'• ' if name == current else ''}{strategy.title}",
+                                 callback_data=self.codec.encode(callbacks.SCORING, version, i))
+            for i, (name, strategy) in enumerate(STRATEGIES.items())
+        ]
+
+    def nav_row(self, version: str, page: int, num_pages: int, op: int) -> List[InlineKeyboardButton]:
+        """Стрелки страниц и номер текущей страницы"""
+        encode = self.codec.encode
+        nav = []
+        if page > 0:
+            nav.append(InlineKeyboardButton("⬅️", callback_data=encode(op, version, page=page - 1)))
+        nav.append(InlineKeyboardButton(f"{page + 1}/{num_pages}", callback_data=encode(callbacks.NOOP, version)))
+        if page + 1 < num_pages:
+            nav.append(InlineKeyboardButton("➡️", callback_data=encode(op, version, page=page + 1)))
+        return nav
+
+    def ban_keyboard(self, version: str, hero_names: List[str], page: int, page_size: int,
+                     banned_flags: List[bool]) -> InlineKeyboardMarkup:
+        """Страница банов: кешированные кнопки героев с отметками пользователя"""
+        self.cache.bind_version(version)
+        key = ('ban', page, page_size)
+        static = self.cache.get(key)
+        if static is None:
+            static = self._ban_page(version, hero_names, page, page_size)
+            self.cache.put(key, static)
+
+        buttons, tail = static
+        rows = [[pair[banned]] for pair, banned in zip(buttons, banned_flags)]
+        return InlineKeyboardMarkup(rows + list(tail))
+
+    def _ban_page(self, version: str, hero_names: List[str], page: int, page_size: int):
+        total = len(hero_names)
+        start = page * page_size
+        buttons = []
+        for hero_idx, hero in enumerate(hero_names[start:start + page_size], start):
+            callback_data = self.codec.encode(callbacks.TOGGLE_BAN, version, hero_idx, page)
+            # Кнопки в состояниях (не забанен, забанен)
+            buttons.append(tuple(InlineKeyboardButton(f"{mark} {hero}", callback_data=callback_data)
+                                 for mark in ("✅", "🚫")))
+        tail = (
+            tuple(self.nav_row(version, page, (total + page_size - 1) // page_size, callbacks.BAN_PAGE)),
+            (InlineKeyboardButton("Закрыть", callback_data=self.codec.encode(callbacks.CLOSE_BAN, version)),)
+        )
+        return buttons, tail
+
+    def counter_list(self, version: str, hero_index: Dict[str, int], ranking_key: str, enemy_team: List[str],
+                     ranking: List[Tuple[str, float]], strategy: str, page: int, page_size: int,
+                     num_pages: int) -> Tuple[str, InlineKeyboardMarkup]:
+        """Текст и клавиатура страницы page списка контрпиков.
+
+        ranking - ранжирование, из которого берется страница; для первой
+        страницы достаточно ее топа, для остальных нужен полный список.
+        """
+        self.cache.bind_version(version)
+        # Ключ ранжирования не зависит от порядка противников, а заголовок зависит
+        key = ('counters', ranking_key, tuple(enemy_team), page, num_pages)
+        rendered = self.cache.get(key)
+        if rendered is not None:
+            return rendered
+
+        start = page * page_size
+        title = STRATEGIES[strategy].title.lower()
+        text = f"🎯 **Команда противника:** {', '.join(enemy_team)}\n\n"
+        if page == 0:
+            text += f"🏆 **Топ-{page_size} лучших контр-пиков** ({title}):\n\n"
+        else:
+            text += f"🏆 **Контр-пики, страница {page + 1}** ({title}):\n\n"
+
+        keyboard = []
+        for i, (hero, winrate) in enumerate(ranking[start:start + page_size], start + 1):
+            text += f"{i:2d}. **{hero}** - {winrate:.1%}\n"
+            keyboard.append([InlineKeyboardButton(
+                f"{i}. {hero} ({winrate:.1%})",
+                callback_data=self.codec.encode(callbacks.DETAILS, version, hero_index[hero])
+            )])
+        if num_pages > 1:
+            keyboard.append(self.nav_row(version, page, num_pages, callbacks.LIST_PAGE))
+        keyboard.append(self.strategy_row(version, strategy))
+
+        rendered = (text, InlineKeyboardMarkup(keyboard))
+        self.cache.put(key, rendered)
+        return rendered
+
+    @staticmethod
+    def inline_article(suggestion: Dict, strategy: str) -> InlineQueryResultArticle:
+        """Результат инлайн-запроса: состав противника, в описании - лучшие контрпики"""
+        enemy_team = suggestion['enemy_team']
+        counters = suggestion['counters']
+        title = STRATEGIES[strategy].title.lower()
+        text = f"🎯 **Команда противника:** {', '.join(enemy_team)}\n\n"
+        if counters:
+            text += f"🏆 **Топ-{len(counters)} лучших контр-пиков** ({title}):\n\n"
+            text += ''.join(f"{i:2d}. **{hero}** - {winrate:.1%}\n" for i, (hero, winrate) in enumerate(counters, 1))
+        else:
+            text += "❌ Не удалось найти подходящих персонажей."
+
+        description = ', '.join(f"{hero} {winrate:.1%}" for hero, winrate in counters[:3])
+        if suggestion['not_found']:
+            description = f"⚠️ Не найдены: {', '.join(suggestion['not_found'])}\n{description}"
+        return InlineQueryResultArticle(
+            id=hashlib.sha1('|'.join(enemy_team).encode('utf-8')).hexdigest()[:16],
+            title=', '.join(enemy_team),
+            description=description,
+            input_message_content=InputTextMessageContent(text, parse_mode='Markdown')
+        )
@@ -0,0 +1,127 @@
+"""Стратегии оценки героя против команды противника"""
+import math
+from abc import ABC, abstractmethod
+from typing import Optional, Tuple
+
+import numpy as np
+
+DEFAULT_STRATEGY = 'mean'
+
+# z для 95% доверительного интервала
+Z_95 = 1.959964
+
+
+class ScoringStrategy(ABC):
+    name = ''
+    title = ''
+
+    @abstractmethod
+    def build(self, matrix) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Матрицы value и weight стратегии для MatchupMatrix"""
+
+
+class MeanStrategy(ScoringStrategy):
+    """Среднее винрейтов матчапов, сыгранных не меньше min_games раз"""
+    name = 'mean'
+    title = 'Среднее'
+
+    def build(self, matrix):
+        return matrix.valid_winrate, matrix.valid_count
+
+
+class GamesWeightedStrategy(ScoringStrategy):
+    """Среднее, взвешенное количеством игр: все игры против команды как одна выборка"""
+    name = 'weighted'
+    title = 'По играм'
+
+    def build(self, matrix):
+        weight = np.where(matrix.valid, matrix.games, 0).astype(np.float64)
+        return matrix.valid_winrate * weight, weight
+
+
+class BetaShrinkageStrategy(ScoringStrategy):
+    """Апостериорное среднее с априорным Beta: мало игр - оценка ближе к prior_mean.
+
+    Учитываются все матчапы; враг без игр дает prior_mean.
+    """
+    name = 'bayes'
+    title = 'Байес'
+
+    def __init__(self, prior_games: float = 20.0, prior_mean: float = 0.5):
+        self.prior_games = prior_games
+        self.prior_mean = prior_mean
+
+    def build(self, matrix):
+        games = matrix.games.astype(np.float64)
+        wins = matrix.exact_winrate() * games
+        value = (wins + self.prior_games * self.prior_mean) / (games + self.prior_games)
+        return value, None
+
+
+class WilsonStrategy(ScoringStrategy):
+    """Нижняя граница доверительного интервала Уилсона: осторожная оценка.
+
+    Враг без игр дает 0.
+    """
+    name = 'wilson'
+    title = 'Уилсон'
+
+    def __init__(self, z: float = Z_95):
+        self.z = z
+
+    def build(self, matrix):
+        games = matrix.games.astype(np.float64)
+        low, _ = wilson_bounds(matrix.exact_winrate(), games, self.z)
+        return low, None
+
+
+STRATEGIES = {
+    strategy.name: strategy
+    for strategy in (MeanStrategy(), GamesWeightedStrategy(), BetaShrinkageStrategy(), WilsonStrategy())
+}
+
+
+def get_strategy(name: str) -> ScoringStrategy:
+    strategy = STRATEGIES.get(name)
+    if strategy is None:
+        raise ValueError(f"Неизвестная стратегия оценки: {name}")
+    return strategy
+
+
+def pairwise_scores(matrix, strategy: str = DEFAULT_STRATEGY, columns=None) -> np.ndarray:
+    """Оценка каждого отдельного матчапа по стратегии; матчапы без данных считаются равными (0.5).
+
+    columns ограничивает результат столбцами этих противников.
+    """
+    value, weight = matrix.scoring(strategy)
+    if columns is not None:
+        value = value[:, columns]
+        weight = weight[:, columns] if weight is not None else None
+    if weight is None:
+        return value
+    scores = np.full(value.shape, 0.5)
+    np.divide(value, weight, out=scores, where=weight > 0)
+    return scores
+
+
+def wilson_bounds(winrate: np.ndarray, games: np.ndarray, z: float = Z_95) -> Tuple[np.ndarray, np.ndarray]:
+    """Границы интервала Уилсона поэлементно; при 0 игр - (0, 1)"""
+    n = np.maximum(games, 1.0)
+    z2 = z * z
+    center = winrate + z2 / (2 * n)
+    margin = z * np.sqrt(winrate * (1 - winrate) / n + z2 / (4 * n * n))
+    denominator = 1 + z2 / n
+    low = np.where(games > 0, (center - margin) / denominator, 0.0)
+    high = np.where(games > 0, (center + margin) / denominator, 1.0)
+    return np.clip(low, 0.0, 1.0), np.clip(high, 0.0, 1.0)
+
+
+def wilson_interval(winrate: float, games: int, z: float = Z_95) -> Tuple[float, float]:
+    """Интервал Уилсона для одного матчапа"""
+    if games <= 0:
+        return 0.0, 1.0
+    z2 = z * z
+    center = winrate + z2 / (2 * games)
+    margin = z * math.sqrt(winrate * (1 - winrate) / games + z2 / (4 * games * games))
+    denominator = 1 + z2 / games
+    return max(0.0, (center - margin) / denominator), min(1.0, (center + margin) / denominator)
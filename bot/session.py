@@ -0,0 +1,117 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+from scoring import DEFAULT_STRATEGY
+
+# Сессия хранится компактно: герои - индексами в матрице текущей версии датасета
+# {'enemy': [3, 17], 'version': 'bf64886384ef', 'strategy': 'mean',
+#  'draft': {'format': 'duel', 'side': 'A', 'history': [12, 40]} или None вне драфта}
+
+
+def new_session(version: str, enemy: List[int] = None, strategy: str = DEFAULT_STRATEGY,
+                draft: Dict = None) -> Dict:
+    return {'enemy': enemy or [], 'version': version, 'strategy': strategy, 'draft': draft}
+
+
+class InMemorySessionStore:
+    """Сессии в памяти процесса с ограничением по количеству и времени жизни"""
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 7 * 24 * 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._sessions = OrderedDict()
+
+    async def get(self, user_id: int) -> Optional[Dict]:
+        entry = self._sessions.get(user_id)
+        if entry is None:
+            return None
+        expires_at, session = entry
+        if expires_at < time.monotonic():
+            del self._sessions[user_id]
+            return None
+        self._sessions.move_to_end(user_id)
+        return session
+
+    async def set(self, user_id: int, session: Dict):
+        self._sessions[user_id] = (time.monotonic() + self.ttl, session)
+        self._sessions.move_to_end(user_id)
+        while len(self._sessions) > self.maxsize:
+            self._sessions.popitem(last=False)
+
+    async def delete(self, user_id: int):
+        self._sessions.pop(user_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class RedisSessionStore:
+    """Сессии в хешах Redis session:{user_id} с истечением срока жизни.
+
+    Общее хранилище позволяет запускать несколько процессов бота и не
+    терять сессии при перезапуске.
+    """
+
+    def __init__(self, redis_client, ttl: int = 7 * 24 * 3600, timeout: float = 1.0):
+        self.redis = redis_client
+        self.ttl = ttl
+        self.timeout = timeout
+
+    @staticmethod
+    def _key(user_id: int) -> str:
+        return f"session:{user_id}"
+
+    @staticmethod
+    def _encode(session: Dict) -> Dict[str, str]:
+        return {
+            'enemy': ','.join(map(str, session['enemy'])),
+            'version': session['version'],
+            'strategy': session.get('strategy', DEFAULT_STRATEGY),
+            'draft': RedisSessionStore._encode_draft(session.get('draft'))
+        }
+
+    @staticmethod
+    def _encode_draft(draft: Optional[Dict]) -> str:
+        if not draft:
+            return ''
+        return f"{draft['format']}:{draft['side']}:{','.join(map(str, draft['history']))}"
+
+    @staticmethod
+    def _decode_draft(value: str) -> Optional[Dict]:
+        if not value:
+            return None
+        draft_format, side, history = value.split(':')
+        return {'format': draft_format, 'side': side, 'history': [int(hero) for hero in history.split(',') if hero]}
+
+    @staticmethod
+    def _decode(fields: Dict[str, str]) -> Dict:
+        enemy = [int(hero) for hero in fields.get('enemy', '').split(',') if hero]
+        return new_session(fields.get('version', ''), enemy, fields.get('strategy', DEFAULT_STRATEGY),
+                           RedisSessionStore._decode_draft(fields.get('draft', '')))
+
+    async def get(self, user_id: int) -> Optional[Dict]:
+        fields = await asyncio.wait_for(self.redis.hgetall(self._key(user_id)), self.timeout)
+        if not fields:
+            return None
+        return self._decode(fields)
+
+    async def set(self, user_id: int, session: Dict):
+        key = self._key(user_id)
+        pipe = self.redis.pipeline(transaction=True)
+        pipe.hset(key, mapping=self._encode(session))
+        pipe.expire(key, self.ttl)
+        await asyncio.wait_for(pipe.execute(), self.timeout)
+
+    async def delete(self, user_id: int):
+        await asyncio.wait_for(self.redis.delete(self._key(user_id)), self.timeout)
+
+
+def create_session_store(backend: str, redis_client=None, maxsize: int = 10000, ttl: int = 7 * 24 * 3600):
+    """Создает хранилище сессий по названию бэкенда: memory или redis"""
+    if backend == 'memory':
+        return InMemorySessionStore(maxsize=maxsize, ttl=ttl)
+    if backend == 'redis':
+        return RedisSessionStore(redis_client, ttl=ttl)
+    raise ValueError(f"Неизвестное хранилище сессий: {backend}")
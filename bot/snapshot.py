@@ -0,0 +1,144 @@
+"""Бинарный снимок винрейтов для быстрой загрузки через numpy.memmap"""
+import os
+import struct
+import sys
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+
+# Формат (little-endian): заголовок HEADER, таблица доп. секций SECTION (имя, dtype, порог min_games,
+# смещение), имена героев через '\n', winrate float32 и games uint32 [N x N], доп. секции [N x N].
+# Матрицы выровнены по 64 байтам; процессы бота на одном хосте делят страницы файла
+MAGIC = b'UPWRSNAP'
+FORMAT_VERSION = 2
+# Снимки версии 1 не содержат доп. секций и читаются так же
+SUPPORTED_VERSIONS = (1, 2)
+HEADER = struct.Struct('<8sHHIQQQQ16s')
+SECTION = struct.Struct('<16s8sIQ')
+ALIGNMENT = 64
+
+# Стратегии оценки, матрицы которых тоже пишутся в снимок; по умолчанию ни одной:
+# каждая матрица - 8 байт на пару героев, а строятся они при загрузке быстро
+SNAPSHOT_STRATEGIES = [name for name in os.getenv('SNAPSHOT_STRATEGIES', '').split(',') if name]
+
+
+class SnapshotError(ValueError):
+    pass
+
+
+def _align(offset: int) -> int:
+    return (offset + ALIGNMENT - 1) // ALIGNMENT * ALIGNMENT
+
+
+def derived_arrays(matrix, strategies: Iterable[str]) -> List[Tuple[str, str, np.ndarray]]:
+    """Производные матрицы для снимка: (имя секции, dtype, массив)"""
+    arrays = [('valid', '|b1', matrix.valid), ('valid_winrate', '<f8', matrix.valid_winrate)]
+    for strategy in strategies:
+        value, weight = matrix.scoring(strategy)
+        if any(part is matrix.valid_winrate or part is matrix.valid_count for part in (value, weight)):
+            # Стратегия собрана из масок и без снимка ничего не строит
+            continue
+        arrays.append((f'{strategy}.value', '<f8', value))
+        if weight is not None:
+            arrays.append((f'{strategy}.weight', '<f8', weight))
+    return arrays
+
+
+def write_snapshot(path: str, matrix, strategies: Iterable[str] = SNAPSHOT_STRATEGIES):
+    """Записывает MatchupMatrix в бинарный снимок через временный файл"""
+    names = '\n'.join(matrix.hero_names).encode('utf-8')
+    size = matrix.num_heroes
+    sections = derived_arrays(matrix, strategies)
+    for name, _, _ in sections:
+        if len(name.encode('ascii')) > 16:
+            raise ValueError(f"Слишком длинное имя секции снимка: {name}")
+
+    names_offset = HEADER.size + SECTION.size * len(sections)
+    winrate_offset = _align(names_offset + len(names))
+    games_offset = _align(winrate_offset + size * size * 4)
+
+    # Смещения доп. секций; одинаковые массивы (например, матрицы стратегии mean) не дублируются
+    offset = _align(games_offset + size * size * 4)
+    offsets, table, data = {}, [], []
+    for name, dtype, array in sections:
+        if id(array) not in offsets:
+            offsets[id(array)] = offset
+            data.append((offset, dtype, array))
+            offset = _align(offset + size * size * np.dtype(dtype).itemsize)
+        table.append(SECTION.pack(name.encode('ascii'), dtype.encode('ascii'), matrix.min_games,
+                                  offsets[id(array)]))
+
+    header = HEADER.pack(MAGIC, FORMAT_VERSION, len(sections), size, names_offset, len(names),
+                         winrate_offset, games_offset, matrix.version.encode('ascii'))
+
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fp:
+        fp.write(header)
+        fp.write(b''.join(table))
+        fp.write(names)
+        for section_offset, dtype, array in [(winrate_offset, '<f4', matrix.winrate),
+                                             (games_offset, '<u4', matrix.games)] + data:
+            fp.write(b'\0' * (section_offset - fp.tell()))
+            np.ascontiguousarray(array, dtype=dtype).tofile(fp)
+    os.replace(tmp_path, path)
+
+
+def snapshot_is_current(path: str, version: str) -> bool:
+    """Снимок существует, записан текущим форматом и соответствует версии датасета"""
+    try:
+        with open(path, 'rb') as fp:
+            header = fp.read(HEADER.size)
+    except OSError:
+        return False
+    if len(header) < HEADER.size:
+        return False
+    magic, format_version, *_, snapshot_version = HEADER.unpack(header)
+    return (magic == MAGIC and format_version == FORMAT_VERSION
+            and snapshot_version.rstrip(b'\0').decode('ascii', 'replace') == version)
+
+
+def read_snapshot(path: str) -> Tuple[list, np.ndarray, np.ndarray, str, Dict[str, Tuple[int, np.ndarray]]]:
+    """Открывает снимок: имена, winrate и games как memmap, версия датасета
+    и доп. секции: имя -> (порог min_games, memmap)"""
+    with open(path, 'rb') as fp:
+        header = fp.read(HEADER.size)
+        if len(header) < HEADER.size:
+            raise SnapshotError(f"Снимок {path} поврежден: короткий заголовок")
+        (magic, format_version, num_sections, size, names_offset, names_size,
+         winrate_offset, games_offset, version) = HEADER.unpack(header)
+        if magic != MAGIC:
+            raise SnapshotError(f"{path} не является снимком винрейтов")
+        if format_version not in SUPPORTED_VERSIONS:
+            raise SnapshotError(f"Неподдерживаемая версия формата снимка: {format_version}")
+        table = fp.read(SECTION.size * num_sections)
+        if len(table) < SECTION.size * num_sections:
+            raise SnapshotError(f"Снимок {path} поврежден: короткая таблица секций")
+        fp.seek(names_offset)
+        names = fp.read(names_size).decode('utf-8')
+
+    hero_names = names.split('\n') if size else []
+    if len(hero_names) != size:
+        raise SnapshotError(f"Снимок {path} поврежден: {len(hero_names)} имен вместо {size}")
+
+    winrate = np.memmap(path, dtype='<f4', mode='r', offset=winrate_offset, shape=(size, size))
+    games = np.memmap(path, dtype='<u4', mode='r', offset=games_offset, shape=(size, size))
+    sections = {}
+    for name, dtype, min_games, offset in SECTION.iter_unpack(table):
+        sections[name.rstrip(b'\0').decode('ascii')] = (
+            min_games, np.memmap(path, dtype=dtype.rstrip(b'\0').decode('ascii'), mode='r', offset=offset,
+                                 shape=(size, size)))
+    return hero_names, winrate, games, version.rstrip(b'\0').decode('ascii'), sections
+
+
+def main():
+    """Конвертирует winrates.json в снимок: python bot/snapshot.py parser/winrates.json"""
+    from matrix import MatchupMatrix
+
+    json_path = sys.argv[1] if len(sys.argv) > 1 else 'parser/winrates.json'
+    snapshot_path = os.path.splitext(json_path)[0] + '.bin'
+    write_snapshot(snapshot_path, MatchupMatrix.from_json(json_path))
+    print(f"Снимок записан: {snapshot_path}")
+
+
+if __name__ == "__main__":
+    main()
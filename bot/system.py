@@ -1,82 +1,347 @@
-import json
+import os
+from collections import OrderedDict
 from typing import List, Dict, Tuple, Optional
 
+import numpy as np
 
-class HeroWinrateSystem:
-    def __init__(self):
-        with open('parser/winrates.json', 'r') as fp:
-            winrates_data = json.load(fp)
+from assignment import TEAM_MODES, best_assignment, max_min_team
+from cache import LRUCache, ban_set_hash
+from draft import DRAFT_FORMATS, DraftSolver, parse_format
+from leaderboard import MatchupIndex
+from matrix import MatchupMatrix
+from metrics import SYSTEM_SECONDS, timed
+from names import HeroNameIndex
+from scoring import DEFAULT_STRATEGY, STRATEGIES, get_strategy, pairwise_scores, wilson_interval
 
+# Стратегии, матрицы которых строятся при загрузке датасета; остальные - при первом запросе
+PRECOMPUTED_STRATEGIES = [name for name in os.getenv('SCORING_STRATEGIES', ','.join(STRATEGIES)).split(',') if name]
 
-        self.winrates = winrates_data
-        self.hero_names = list(winrates_data.keys())
-        self.num_heroes = len(self.hero_names)
 
-    def find_hero_by_name(self, partial_name: str) -> Optional[str]:
-        """Находит персонажа по частичному совпадению имени"""
-        partial_name = partial_name.lower().strip()
+class Dataset:
+    """Одна версия данных: матрица винрейтов, индекс имен и предрасчитанные списки контрпиков"""
 
-        # Точное совпадение
-        for hero in self.hero_names:
-            if hero.lower() == partial_name:
-                return hero
+    def __init__(self, matrix: MatchupMatrix):
+        self.matrix = matrix
+        self.version = matrix.version
+        self.name_index = HeroNameIndex(matrix.hero_names, game_volume=matrix.games.sum(axis=1).tolist())
+        matrix.prepare_scoring(PRECOMPUTED_STRATEGIES)
+        self.index = MatchupIndex(matrix)
+        self.index.prepare(PRECOMPUTED_STRATEGIES)
 
-        # Частичное совпадение
-        matches = [hero for hero in self.hero_names if partial_name in hero.lower()]
-        return matches[0] if matches else None
 
-    def calculate_total_winrate(self, hero: str, enemy_team: List[str]) -> float:
+class HeroWinrateSystem:
+    # Сколько последних версий датасета помнить для перевода индексов героев в имена
+    KNOWN_VERSIONS = 4
+
+    def __init__(self, data_path: str = None, cache_size: int = 1024):
+        # Рядом с winrates.json может лежать бинарный снимок winrates.bin - он загружается быстрее
+        self.data_path = data_path or os.getenv('WINRATES_PATH', 'parser/winrates.json')
+        self.result_cache = LRUCache(cache_size)
+        self._known_versions = OrderedDict()
+        self.swap_dataset(self.load_dataset(self.data_path))
+
+    @staticmethod
+    def load_dataset(data_path: str) -> Dataset:
+        """Загружает и индексирует датасет; не меняет состояние, можно вызывать из потока"""
+        return Dataset(MatchupMatrix.load(data_path))
+
+    def swap_dataset(self, dataset: Dataset):
+        """Атомарно переключает систему на новую версию данных.
+
+        Методы берут датасет один раз в начале вызова, поэтому уже начатые
+        запросы досчитываются на старой версии.
+        """
+        self.dataset = dataset
+        self._winrates = None
+        self.result_cache.bind_version(dataset.version)
+        self._known_versions[dataset.version] = dataset.matrix.hero_names
+        self._known_versions.move_to_end(dataset.version)
+        while len(self._known_versions) > self.KNOWN_VERSIONS:
+            self._known_versions.popitem(last=False)
+
+    def hero_names_for_version(self, version: str) -> Optional[List[str]]:
+        """Список героев одной из последних версий датасета"""
+        return self._known_versions.get(version)
+
+    def known_versions(self) -> List[str]:
+        """Последние версии датасета, начиная с текущей"""
+        return list(reversed(self._known_versions))
+
+    @property
+    def version(self) -> str:
+        return self.dataset.version
+
+    @property
+    def matrix(self) -> MatchupMatrix:
+        return self.dataset.matrix
+
+    @property
+    def name_index(self) -> HeroNameIndex:
+        return self.dataset.name_index
+
+    @property
+    def hero_names(self) -> List[str]:
+        return self.dataset.matrix.hero_names
+
+    @property
+    def num_heroes(self) -> int:
+        return self.dataset.matrix.num_heroes
+
+    @property
+    def winrates(self) -> Dict[str, Dict[str, Dict]]:
+        """Винрейты в виде вложенных словарей, строятся из матриц при первом обращении"""
+        if self._winrates is None:
+            self._winrates = self.matrix.to_dict()
+        return self._winrates
+
+    def find_hero_by_name(self, partial_name: str) -> Optional[str]:
+        """Находит персонажа по частичному совпадению имени"""
+        return self.name_index.find(partial_name)
+
+    def calculate_total_winrate(self, hero: str, enemy_team: List[str],
+                                strategy: str = DEFAULT_STRATEGY) -> float:
         """Вычисляет суммарный винрейт персонажа против команды противника"""
         if not enemy_team:
             return 0.0
 
-        total_winrate = 0.0
-        counted = 0
-        for enemy in enemy_team:
-            if enemy in self.winrates[hero]:
-                games = self.winrates[hero][enemy]['games']
-                if games >= 10:
-                    total_winrate += self.winrates[hero][enemy]['percent']
-                    counted += 1
-
-        if counted == 0:
-            return 0.0
-        return total_winrate / counted
+        matrix = self.matrix
+        return matrix.score(matrix.hero_index[hero], matrix.indices(enemy_team), strategy)
 
+    @timed(SYSTEM_SECONDS, 'find_best_heroes')
     def find_best_heroes(self, enemy_team: List[str], top_n: int = 10,
-                             exclude_heroes: List[str] = None) -> List[Tuple[str, float]]:
+                             exclude_heroes: List[str] = None,
+                             strategy: str = DEFAULT_STRATEGY) -> List[Tuple[str, float]]:
         """Находит топ персонажей с максимальным винрейтом против вражеской команды"""
         if exclude_heroes is None:
             exclude_heroes = []
 
+        matrix = self.matrix
+        get_strategy(strategy)
+
         # Проверяем валидность входных данных
-        invalid_enemies = [char for char in enemy_team if char not in self.hero_names]
+        invalid_enemies = [char for char in enemy_team if char not in matrix.hero_index]
         if invalid_enemies:
             raise ValueError(f"Неизвестные персонажи в команде противника: {invalid_enemies}")
 
-        hero_scores = []
+        if len(enemy_team) == 1:
+            best_heroes = self._rank_single(enemy_team[0], top_n, exclude_heroes, strategy)
+            if best_heroes is not None:
+                return best_heroes
+
+        key = self.ranking_cache_key(enemy_team, top_n, exclude_heroes, matrix.version, strategy)
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return list(cached)
+
+        best_heroes = matrix.rank(enemy_team, top_n, exclude_heroes, strategy)
+        self.result_cache.put(key, best_heroes)
+        return list(best_heroes)
+
+    def _rank_single(self, enemy: str, top_n: int, exclude_heroes: List[str],
+                     strategy: str) -> Optional[List[Tuple[str, float]]]:
+        """Топ против одного противника из предрасчитанного списка.
+
+        None, если после исключения банов в списке осталось меньше top_n героев,
+        а за его пределами есть другие.
+        """
+        dataset = self.dataset
+        matrix = dataset.matrix
+        heroes, scores = dataset.index.counters(matrix.hero_index[enemy], strategy)
+        excluded = set(matrix.indices(exclude_heroes))
+        best_heroes = [(matrix.hero_names[i], score) for i, score in zip(heroes, scores) if i not in excluded]
+        if len(best_heroes) < top_n and len(heroes) < matrix.num_heroes - 1:
+            return None
+        return best_heroes[:max(top_n, 0)]
+
+    def hero_profile(self, hero: str, strategy: str = DEFAULT_STRATEGY, top_n: int = 5) -> Dict:
+        """Место героя в общем рейтинге, его лучшие и худшие матчапы"""
+        dataset = self.dataset
+        matrix = dataset.matrix
+        if hero not in matrix.hero_index:
+            raise ValueError(f"Персонаж {hero} не найден")
+        get_strategy(strategy)
 
-        for hero in self.hero_names:
-            if hero in exclude_heroes or hero in enemy_team:
-                continue
+        hero_idx = matrix.hero_index[hero]
+        order, scores, position = dataset.index.leaderboard(strategy)
 
-            avg_winrate = self.calculate_total_winrate(hero, enemy_team)
-            hero_scores.append((hero, avg_winrate))
+        def matchups(indices: List[int]) -> List[Tuple[str, float, int]]:
+            return [(matrix.hero_names[j], matrix.valid_winrate.item(hero_idx, j), matrix.games.item(hero_idx, j))
+                    for j in indices[:top_n]]
 
-        # Сортируем по убыванию винрейта
-        hero_scores.sort(key=lambda x: x[1], reverse=True)
+        return {
+            'hero': hero,
+            'strategy': strategy,
+            'rank': int(position[hero_idx]) + 1,
+            'num_heroes': matrix.num_heroes,
+            'score': float(scores[hero_idx]),
+            'best': matchups(dataset.index.best_matchups(hero_idx)),
+            'worst': matchups(dataset.index.worst_matchups(hero_idx))
+        }
 
-        return hero_scores[:top_n]
+    def leaderboard(self, top_n: int = 10, strategy: str = DEFAULT_STRATEGY) -> List[Tuple[str, float]]:
+        """Лучшие герои по оценке против всех остальных героев"""
+        get_strategy(strategy)
+        dataset = self.dataset
+        order, scores, _ = dataset.index.leaderboard(strategy)
+        return [(dataset.matrix.hero_names[i], float(scores[i])) for i in order[:top_n].tolist()]
+
+    def ranking_cache_key(self, enemy_team: List[str], top_n: int, exclude_heroes: List[str] = None,
+                          version: str = None, strategy: str = DEFAULT_STRATEGY) -> str:
+        """Ключ кеша подбора: версия данных, стратегия, команда без учета порядка, баны и размер топа"""
+        version = version or self.version
+        return (f"{version}:rank:{strategy}:{top_n}:{ban_set_hash(exclude_heroes or [])}:"
+                f"{'|'.join(sorted(enemy_team))}")
+
+    def find_best_heroes_batch(self, enemy_teams: List[List[str]],
+                               exclude_per_team: List[List[str]] = None,
+                               top_n: int = 10, strategy: str = DEFAULT_STRATEGY) -> List[Dict]:
+        """Находит лучших персонажей сразу для множества команд противника"""
+        if exclude_per_team is None:
+            exclude_per_team = [[] for _ in enemy_teams]
+        if len(exclude_per_team) != len(enemy_teams):
+            raise ValueError("Количество списков исключений не совпадает с количеством команд")
+
+        matrix = self.matrix
+        invalid_enemies = sorted({char for team in enemy_teams for char in team if char not in matrix.hero_index})
+        if invalid_enemies:
+            raise ValueError(f"Неизвестные персонажи в команде противника: {invalid_enemies}")
 
-    def get_hero_details(self, hero: str, enemy_team: List[str]) -> Dict:
+        get_strategy(strategy)
+        rankings = matrix.rank_batch(enemy_teams, top_n, [exclude or [] for exclude in exclude_per_team], strategy)
+
+        results = []
+        for enemy_team, best_heroes in zip(enemy_teams, rankings):
+            heroes = [hero for hero, _ in best_heroes]
+            rows = matrix.matchup_rows(matrix.indices(heroes), matrix.indices(enemy_team))
+            # Очки из ранжирования совпадают с matrix.score, пересчитывать их не нужно
+            results.append({
+                'enemy_team': enemy_team,
+                'best_heroes': best_heroes,
+                'details': {
+                    hero: self._build_details(hero, enemy_team, winrates, games, valid, strategy, score)
+                    for (hero, score), winrates, games, valid in zip(best_heroes, *rows)
+                }
+            })
+        return results
+
+    @timed(SYSTEM_SECONDS, 'get_hero_details')
+    def get_hero_details(self, hero: str, enemy_team: List[str], strategy: str = DEFAULT_STRATEGY) -> Dict:
         """Получает детальную информацию о персонаже против команды противника"""
-        if hero not in self.hero_names:
+        matrix = self.matrix
+        if hero not in matrix.hero_index:
             raise ValueError(f"Персонаж {hero} не найден")
+        get_strategy(strategy)
+
+        # Порядок противников влияет на порядок матчапов, поэтому входит в ключ
+        key = f"{matrix.version}:details:{strategy}:{hero}:{'|'.join(enemy_team)}"
+        cached = self.result_cache.get(key)
+        if cached is not None:
+            return cached
+
+        # Неизвестные противники не имеют матчапов и пропускаются
+        enemy_team = [enemy for enemy in enemy_team if enemy in matrix.hero_index]
+        hero_idx = matrix.hero_index[hero]
+        enemy_idx = matrix.indices(enemy_team)
+        winrates, games, valid = matrix.matchup_row(hero_idx, enemy_idx)
+        details = self._build_details(hero, enemy_team, winrates, games, valid, strategy,
+                                      matrix.score(hero_idx, enemy_idx, strategy))
+        self.result_cache.put(key, details)
+        return details
 
+    def solve_draft(self, draft_format: str, history: List[str], strategy: str = DEFAULT_STRATEGY,
+                    exclude_heroes: List[str] = (), time_budget: float = 1.0, width: int = 8,
+                    num_candidates: int = 6) -> Dict:
+        """Ищет лучшее продолжение драфта после сделанных ходов.
+
+        draft_format - имя из DRAFT_FORMATS или строка шагов "A:ban B:pick ...",
+        history - герои уже сделанных шагов по порядку. Исключенные герои не
+        участвуют в поиске, если их еще не выбрали в history.
+        """
+        matrix = self.matrix
+        get_strategy(strategy)
+        steps = parse_format(DRAFT_FORMATS.get(draft_format, draft_format))
+
+        unknown = [hero for hero in history if hero not in matrix.hero_index]
+        if unknown:
+            raise ValueError(f"Неизвестные персонажи в драфте: {unknown}")
+        if len(history) > len(steps) or len(set(history)) != len(history):
+            raise ValueError("Ходы драфта не соответствуют формату")
+
+        history_idx = matrix.indices(history)
+        excluded = [i for i in matrix.indices(exclude_heroes) if i not in history_idx]
+        solver = DraftSolver(matrix, steps, strategy, excluded, width=width, time_budget=time_budget)
+        result = solver.solve(history_idx)
+
+        names = matrix.hero_names
+        step = len(history)
+        first = result['line'][0][2] if result['line'] else None
+        result.update({
+            'steps': steps,
+            'step': step,
+            'picks': {side: [names[i] for i in solver.picks[side]] for side in ('A', 'B')},
+            'bans': [names[i] for i in solver.banned],
+            'line': [(side, action, names[hero]) for side, action, hero in result['line']],
+            'candidates': ([names[i] for i in solver.candidates(step, first, num_candidates)]
+                           if step < len(steps) else [])
+        })
+        return result
+
+    def best_team(self, enemy_team: List[str], exclude_heroes: List[str] = (), mode: str = 'assign',
+                  strategy: str = DEFAULT_STRATEGY) -> Dict:
+        """Лучшая команда против команды противника, каждый герой играет против одного врага.
+
+        mode='assign' - пары выбираем мы (венгерский алгоритм), mode='maxmin' -
+        пары выбирает соперник, команда с лучшим гарантированным результатом.
+        Герои команды противника и исключенные в подбор не попадают.
+        """
+        if mode not in TEAM_MODES:
+            raise ValueError(f"Неизвестный режим подбора команды: {mode}")
+        matrix = self.matrix
+        get_strategy(strategy)
+
+        invalid_enemies = [char for char in enemy_team if char not in matrix.hero_index]
+        if invalid_enemies:
+            raise ValueError(f"Неизвестные персонажи в команде противника: {invalid_enemies}")
+
+        enemy_idx = matrix.indices(enemy_team)
+        pool = np.ones(matrix.num_heroes, dtype=bool)
+        pool[enemy_idx] = False
+        pool[matrix.indices(exclude_heroes)] = False
+        pool_idx = np.flatnonzero(pool)
+        if pool_idx.size < len(enemy_idx):
+            raise ValueError("Недостаточно доступных персонажей для команды")
+
+        scores = pairwise_scores(matrix, strategy, columns=enemy_idx)[pool_idx]
+        if mode == 'assign':
+            rows, total = best_assignment(scores)
+            optimal = True
+        else:
+            rows, total, optimal = max_min_team(scores)
+
+        names = matrix.hero_names
+        return {
+            'mode': mode,
+            'strategy': strategy,
+            'pairs': [(names[pool_idx[row]], enemy, float(scores[row, i]))
+                      for i, (row, enemy) in enumerate(zip(rows, enemy_team))],
+            'score': total / len(enemy_idx) if enemy_idx else 0.0,
+            'optimal': optimal
+        }
+
+    @staticmethod
+    def _build_details(hero: str, enemy_team: List[str], winrates: List[float],
+                       games: List[int], valid: List[bool],
+                       strategy: str = DEFAULT_STRATEGY, score: float = 0.0) -> Dict:
+        """Собирает словарь деталей из строк матрицы для одного героя.
+
+        Для каждого матчапа добавляется 95% доверительный интервал Уилсона.
+        """
         details = {
             'hero': hero,
             'matchups': {},
             'average_winrate': 0.0,
+            'strategy': strategy,
+            'score': score,
             'best_matchup': None,
             'worst_matchup': None
         }
@@ -86,24 +351,22 @@ class HeroWinrateSystem:
         best_wr = -1.0
         worst_wr = 2.0
 
-        for enemy in enemy_team:
-            if enemy in self.winrates[hero]:
-                winrate = self.winrates[hero][enemy]['percent']
-                games = self.winrates[hero][enemy]['games']
-                if games >= 10:
-                    details['matchups'][enemy] = {}
-                    details['matchups'][enemy]['winrate'] = winrate
-                    details['matchups'][enemy]['games'] = games
-                    total_winrate += winrate
-                    counted += 1
-
-                    if winrate > best_wr:
-                        best_wr = winrate
-                        details['best_matchup'] = (enemy, winrate)
-
-                    if winrate < worst_wr:
-                        worst_wr = winrate
-                        details['worst_matchup'] = (enemy, winrate)
+        for enemy, winrate, enemy_games, counts in zip(enemy_team, winrates, games, valid):
+            if counts:
+                details['matchups'][enemy] = {}
+                details['matchups'][enemy]['winrate'] = winrate
+                details['matchups'][enemy]['games'] = enemy_games
+                details['matchups'][enemy]['ci'] = wilson_interval(winrate, enemy_games)
+                total_winrate += winrate
+                counted += 1
+
+                if winrate > best_wr:
+                    best_wr = winrate
+                    details['best_matchup'] = (enemy, winrate)
+
+                if winrate < worst_wr:
+                    worst_wr = winrate
+                    details['worst_matchup'] = (enemy, winrate)
 
         if counted > 0:
             details['average_winrate'] = total_winrate / counted
@@ -135,10 +398,11 @@ def main():
         details = system.get_hero_details(hero, enemy_team)
         print(f"\n{i}. {hero} (средний винрейт: {avg_winrate:.1%})")
         print("   Матчапы:")
-        for enemy, winrate in details['matchups'].items():
-            print(f"     vs {enemy}: {winrate:.1%}")
-        print(f"   Лучший матчап: vs {details['best_matchup'][0]} ({details['best_matchup'][1]:.1%})")
-        print(f"   Худший матчап: vs {details['worst_matchup'][0]} ({details['worst_matchup'][1]:.1%})")
+        for enemy, matchup in details['matchups'].items():
+            print(f"     vs {enemy}: {matchup['winrate']:.1%} ({matchup['games']} игр)")
+        if details['best_matchup'] is not None:
+            print(f"   Лучший матчап: vs {details['best_matchup'][0]} ({details['best_matchup'][1]:.1%})")
+            print(f"   Худший матчап: vs {details['worst_matchup'][0]} ({details['worst_matchup'][1]:.1%})")
 
 
 if __name__ == "__main__":
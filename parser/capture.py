@@ -0,0 +1,140 @@
+"""Перехват данных матчапов из сетевых ответов XHR/fetch страницы"""
+import asyncio
+import logging
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Таблицы матчапов в ответах: строки [{"fighter": "Alice", "opponent": "Medusa", "games": 95, "winrate": 72}]
+# или вложенный словарь формата winrates.json {герой: {противник: {games, percent}}}
+HERO_KEYS = ('hero', 'fighter', 'character', 'heroName', 'hero_name')
+ENEMY_KEYS = ('opponent', 'enemy', 'against', 'vs', 'opponentName', 'opponent_name')
+GAMES_KEYS = ('games', 'plays', 'matches', 'total', 'count', 'gamesPlayed', 'games_played')
+WINS_KEYS = ('wins', 'won')
+RATE_KEYS = ('winrate', 'win_rate', 'winRate', 'percent', 'rate')
+
+# Ресурсы, не нужные ни для данных, ни для разбора карточек: не загружаются
+BLOCKED_RESOURCES = ('image', 'font', 'media')
+
+
+def _field(row: Dict, keys):
+    for key in keys:
+        if key in row:
+            return row[key]
+    return None
+
+
+def _name(value) -> Optional[str]:
+    if isinstance(value, dict):
+        value = value.get('name')
+    return value if isinstance(value, str) else None
+
+
+def _parse_row(row) -> Optional[tuple]:
+    """(герой, противник, игры, винрейт, винрейт передан полем) или None"""
+    if not isinstance(row, dict):
+        return None
+    hero = _name(_field(row, HERO_KEYS))
+    enemy = _name(_field(row, ENEMY_KEYS))
+    games = _field(row, GAMES_KEYS)
+    if hero is None or enemy is None or not isinstance(games, (int, float)):
+        return None
+    rate, wins = _field(row, RATE_KEYS), _field(row, WINS_KEYS)
+    if rate is not None:
+        return hero, enemy, int(games), float(rate), True
+    if wins is not None and games:
+        return hero, enemy, int(games), float(wins) / games, False
+    return None
+
+
+def _is_nested_table(value) -> bool:
+    if not isinstance(value, dict) or not value:
+        return False
+    found = False
+    for matchups in value.values():
+        if not isinstance(matchups, dict):
+            return False
+        for matchup in matchups.values():
+            if not (isinstance(matchup, dict) and 'games' in matchup and 'percent' in matchup):
+                return False
+            found = True
+    return found
+
+
+def extract_matchups(payload) -> Dict[str, Dict]:
+    """Ищет в JSON-ответе таблицы матчапов и возвращает их в формате winrates.json"""
+    rows = []
+    stack = [payload]
+    while stack:
+        value = stack.pop()
+        if _is_nested_table(value):
+            rows.extend((hero, enemy, int(m['games']), float(m['percent']), True)
+                        for hero, matchups in value.items() for enemy, m in matchups.items())
+        elif isinstance(value, list):
+            parsed = [_parse_row(row) for row in value]
+            if parsed and all(row is not None for row in parsed):
+                rows.extend(parsed)
+            else:
+                stack.extend(item for item in value if isinstance(item, (dict, list)))
+        elif isinstance(value, dict):
+            stack.extend(item for item in value.values() if isinstance(item, (dict, list)))
+
+    # Шкала переданных винрейтов одна на весь ответ: 1% в процентах - это 1, а не 100%
+    scale = 100 if any(rate > 1 for _, _, _, rate, given in rows if given) else 1
+    data = {}
+    for hero, enemy, games, rate, given in rows:
+        if given:
+            rate /= scale
+        # Карточки показывают целые проценты, храним так же
+        data.setdefault(hero, {})[enemy] = {'games': games, 'percent': round(rate * 100) / 100}
+    return data
+
+
+class NetworkCapture:
+    """Слушает ответы страницы и собирает из них матчапы"""
+
+    def __init__(self):
+        self.data: Dict[str, Dict] = {}
+        self.responses = 0
+        self.recognized = 0
+        self._pending = set()
+
+    async def attach(self, page, block_resources: bool = True):
+        page.on('response', self._on_response)
+        if block_resources:
+            await page.route('**/*', self._route)
+
+    @staticmethod
+    async def _route(route):
+        if route.request.resource_type in BLOCKED_RESOURCES:
+            await route.abort()
+        else:
+            # fallback, а не continue_: запрос должен дойти до маршрутов HAR
+            await route.fallback()
+
+    def _on_response(self, response):
+        if response.request.resource_type not in ('xhr', 'fetch') and \
+                'json' not in response.headers.get('content-type', ''):
+            return
+        task = asyncio.ensure_future(self._read(response))
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    async def _read(self, response):
+        self.responses += 1
+        try:
+            payload = await response.json()
+        except Exception:
+            return
+        matchups = extract_matchups(payload)
+        if not matchups:
+            return
+        self.recognized += 1
+        for hero, enemies in matchups.items():
+            self.data.setdefault(hero, {}).update(enemies)
+        logger.info("Перехвачен ответ %s: %d героев", response.url, len(matchups))
+
+    async def drain(self):
+        """Дожидается разбора уже полученных ответов"""
+        while self._pending:
+            await asyncio.gather(*list(self._pending), return_exceptions=True)
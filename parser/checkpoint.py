@@ -0,0 +1,167 @@
+"""Контрольные точки парсера и сравнение с предыдущим датасетом"""
+import hashlib
+import json
+import logging
+import os
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+def matchups_hash(matchups: Dict) -> str:
+    """Хеш набора карточек героя, не зависящий от порядка противников"""
+    raw = json.dumps(matchups, sort_keys=True, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(raw).hexdigest()[:16]
+
+
+def atomic_write(path: str, raw: bytes):
+    """Пишет файл через временный файл и rename, читатель не увидит его наполовину"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as fp:
+        fp.write(raw)
+        fp.flush()
+        os.fsync(fp.fileno())
+    os.replace(tmp_path, path)
+
+
+def load_dataset(path: str) -> Dict:
+    """Предыдущий winrates.json или пустой словарь, если его нет"""
+    try:
+        with open(path, 'rb') as fp:
+            return json.loads(fp.read())
+    except FileNotFoundError:
+        return {}
+    except ValueError:
+        logger.warning("Предыдущий датасет %s поврежден, сравнение пропущено", path)
+        return {}
+
+
+class Checkpoint:
+    """Журнал собранных героев: первая строка - заголовок запуска, дальше по строке на героя.
+
+    {"url": "...", "started_at": 1700000000}
+    {"hero": "Alice", "hash": "3f2a...", "matchups": {...}}
+    """
+
+    def __init__(self, path: str, url: str):
+        self.path = path
+        self.url = url
+        self.heroes = {}
+        self._fp = None
+
+    def load(self) -> Dict[str, Dict]:
+        """Читает журнал прошлого незавершенного запуска с той же страницы"""
+        self.heroes = {}
+        try:
+            with open(self.path, 'r', encoding='utf-8') as fp:
+                lines = fp.read().split('\n')
+        except FileNotFoundError:
+            return self.heroes
+
+        try:
+            header = json.loads(lines[0])
+        except ValueError:
+            logger.warning("Контрольная точка %s повреждена, начинаем заново", self.path)
+            return self.heroes
+        if header.get('url') != self.url:
+            logger.info("Контрольная точка %s от другой страницы, начинаем заново", self.path)
+            return self.heroes
+
+        for line in lines[1:]:
+            if not line:
+                continue
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                # Последняя строка могла не дописаться при падении
+                break
+            self.heroes[entry['hero']] = entry['matchups']
+        return self.heroes
+
+    def open(self, resume: bool = True):
+        """Открывает журнал на дозапись; без resume начинает его заново"""
+        if resume and self.heroes:
+            # Переписываем уцелевшие строки, отрезая возможный недописанный хвост
+            lines = [json.dumps({'url': self.url, 'started_at': int(time.time())})]
+            lines += [self._line(hero, matchups) for hero, matchups in self.heroes.items()]
+            atomic_write(self.path, ('\n'.join(lines) + '\n').encode('utf-8'))
+            self._fp = open(self.path, 'a', encoding='utf-8')
+        else:
+            self.heroes = {}
+            self._fp = open(self.path, 'w', encoding='utf-8')
+            self._fp.write(json.dumps({'url': self.url, 'started_at': int(time.time())}) + '\n')
+            self._fp.flush()
+
+    @staticmethod
+    def _line(hero: str, matchups: Dict) -> str:
+        return json.dumps({'hero': hero, 'hash': matchups_hash(matchups), 'matchups': matchups},
+                          ensure_ascii=False)
+
+    def add(self, hero: str, matchups: Dict):
+        self.heroes[hero] = matchups
+        self._fp.write(self._line(hero, matchups) + '\n')
+        self._fp.flush()
+        os.fsync(self._fp.fileno())
+
+    def close(self):
+        if self._fp is not None:
+            self._fp.close()
+            self._fp = None
+
+    def remove(self):
+        """Удаляет журнал после успешной записи датасета"""
+        self.close()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def diff_datasets(previous: Dict, current: Dict) -> Dict:
+    """Изменения между двумя датасетами: герои и отдельные матчапы"""
+    added = [hero for hero in current if hero not in previous]
+    removed = [hero for hero in previous if hero not in current]
+    unchanged = []
+    changes: List[Dict] = []
+
+    for hero, matchups in current.items():
+        old = previous.get(hero)
+        if old is None:
+            continue
+        if matchups_hash(old) == matchups_hash(matchups):
+            unchanged.append(hero)
+            continue
+        for enemy in sorted(set(old) | set(matchups)):
+            before, after = old.get(enemy), matchups.get(enemy)
+            if before != after:
+                changes.append({'hero': hero, 'enemy': enemy, 'before': before, 'after': after})
+
+    return {
+        'added': added,
+        'removed': removed,
+        'changed': sorted({change['hero'] for change in changes}),
+        'unchanged': len(unchanged),
+        'matchups': changes
+    }
+
+
+def format_changelog(diff: Dict, limit: Optional[int] = 50) -> str:
+    """Краткий текстовый список изменений для лога"""
+    lines = [
+        f"Героев добавлено: {len(diff['added'])}, удалено: {len(diff['removed'])}, "
+        f"изменено: {len(diff['changed'])}, без изменений: {diff['unchanged']}"
+    ]
+    if diff['added']:
+        lines.append("Новые: " + ', '.join(diff['added']))
+    if diff['removed']:
+        lines.append("Удалены: " + ', '.join(diff['removed']))
+
+    for change in diff['matchups'][:limit]:
+        before, after = change['before'], change['after']
+        old = f"{before['percent']:.0%} ({before['games']})" if before else "-"
+        new = f"{after['percent']:.0%} ({after['games']})" if after else "-"
+        lines.append(f"  {change['hero']} vs {change['enemy']}: {old} -> {new}")
+    if limit is not None and len(diff['matchups']) > limit:
+        lines.append(f"  ... и еще {len(diff['matchups']) - limit}")
+    return '\n'.join(lines)
@@ -0,0 +1,68 @@
+"""Собирает HAR-файл из matchups.html для проверки парсера без сети.
+
+    python parser/fixtures/make_har.py /tmp/matchups.har
+    python parser/main.py --url https://fixture.invalid/tools/matchups --har /tmp/matchups.har
+
+В HAR две записи: сама страница и ответ api/matchups.json со строками
+матчапов, которые распознает сетевой режим парсера.
+"""
+import json
+import os
+import re
+import sys
+from datetime import datetime, timezone
+from urllib.parse import urljoin
+
+FIXTURE_URL = 'https://fixture.invalid/tools/matchups'
+HTML_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'matchups.html')
+
+
+def fixture_data(html: str):
+    """Встроенная в страницу копия данных"""
+    match = re.search(r'const INLINE_DATA = (\{.*?\n\});', html, re.S)
+    return json.loads(match.group(1))
+
+
+def _entry(url: str, mime_type: str, text: str):
+    size = len(text.encode('utf-8'))
+    return {
+        'startedDateTime': datetime.now(timezone.utc).isoformat(),
+        'time': 0,
+        'request': {
+            'method': 'GET', 'url': url, 'httpVersion': 'HTTP/1.1', 'cookies': [],
+            'headers': [], 'queryString': [], 'headersSize': -1, 'bodySize': 0
+        },
+        'response': {
+            'status': 200, 'statusText': 'OK', 'httpVersion': 'HTTP/1.1', 'cookies': [],
+            'headers': [{'name': 'Content-Type', 'value': mime_type}],
+            'content': {'size': size, 'mimeType': mime_type, 'text': text},
+            'redirectURL': '', 'headersSize': -1, 'bodySize': size
+        },
+        'cache': {},
+        'timings': {'send': 0, 'wait': 0, 'receive': 0}
+    }
+
+
+def build_har(path: str, url: str = FIXTURE_URL):
+    with open(HTML_PATH, encoding='utf-8') as fp:
+        html = fp.read()
+
+    rows = [
+        {'fighter': hero, 'opponent': enemy, 'games': matchup['games'], 'winrate': round(matchup['percent'] * 100)}
+        for hero, matchups in fixture_data(html).items()
+        for enemy, matchup in matchups.items()
+    ]
+    har = {'log': {
+        'version': '1.2',
+        'creator': {'name': 'make_har', 'version': '1'},
+        'entries': [
+            _entry(url, 'text/html; charset=utf-8', html),
+            _entry(urljoin(url, 'api/matchups.json'), 'application/json', json.dumps({'matchups': rows}))
+        ]
+    }}
+    with open(path, 'w', encoding='utf-8') as fp:
+        json.dump(har, fp)
+
+
+if __name__ == "__main__":
+    build_har(sys.argv[1] if len(sys.argv) > 1 else 'matchups.har')
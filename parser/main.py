@@ -1,41 +1,298 @@
+import argparse
 import asyncio
 import json
-from collections import defaultdict
+import logging
+import os
+import sys
 
 from playwright.async_api import async_playwright
 
-async def main():
-    async with async_playwright() as p:
-        browser = await p.chromium.launch(headless=True)  # без GUI
-        page = await browser.new_page()
-        page.set_default_timeout(5000)
-        await page.goto("https://www.the-unmatched.club/tools/matchups")
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'bot'))
+
+from capture import NetworkCapture
+from channels import RELOAD_CHANNEL
+from checkpoint import Checkpoint, atomic_write, diff_datasets, format_changelog, load_dataset
+from matrix import MatchupMatrix, dataset_version
+from snapshot import snapshot_is_current, write_snapshot
+
+logging.basicConfig(
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+    level=logging.INFO
+)
+logger = logging.getLogger(__name__)
+
+MATCHUPS_URL = "https://www.the-unmatched.club/tools/matchups"
+HEADER_SELECTOR = '.absolute.z-\\[2\\].top-0.right-0.flex.gap-2.text-sm.text-white.bg-gray-900\\/60.p-1.rounded-bl-lg'
+CARD_SELECTOR = '.card-content.svelte-7yksa3'
+
+# Тексты всех карточек одним вызовом вместо inner_text на каждую
+READ_CARDS_JS = "selector => Array.from(document.querySelectorAll(selector), card => card.innerText)"
+
+# Герой выбран, когда комбобокс показывает его имя, а карточки отрисованы и
+# отличаются от карточек предыдущего героя
+HERO_READY_JS = """([hero, headerSelector, cardSelector, previous]) => {
+    const combobox = document.querySelector('button[role="combobox"]');
+    if (!combobox || !combobox.innerText.includes(hero)) return false;
+    if (!document.querySelector(headerSelector)) return false;
+    const card = document.querySelector(cardSelector);
+    return card !== null && card.innerText !== previous;
+}"""
+
+
+def parse_cards(texts):
+    """Разбирает тексты карточек 'игры\\nпроцент%\\nпротивник' в матчапы героя"""
+    matchups = {}
+    for text in texts:
+        values = text.split('\n')
+        games, percent, enemy_name = values[0], values[1], values[2]
+        matchups[enemy_name] = {'games': int(games), 'percent': float(percent.rstrip('%')) / 100}
+    return matchups
+
+
+class HeroPage:
+    """Вкладка в собственном контексте браузера, переиспользуемая для многих героев.
+
+    С har сеть подменяется записанным HAR-файлом, с record_har ответы
+    записываются в него. С capture сетевые ответы разбираются на лету.
+    """
+
+    def __init__(self, browser, url: str, timeout: int, har: str = None, record_har: bool = False,
+                 capture: NetworkCapture = None):
+        self.browser = browser
+        self.url = url
+        self.timeout = timeout
+        self.har = har
+        self.record_har = record_har
+        self.capture = capture
+        self.context = None
+        self.page = None
+        self.previous_card = None
 
-        elements = await page.query_selector_all('button[data-button-root]')
+    async def open(self):
+        if self.context is not None:
+            await self.context.close()
+        self.context = await self.browser.new_context()
+        if self.har:
+            await self.context.route_from_har(self.har, not_found='abort', update=self.record_har)
+        self.page = await self.context.new_page()
+        self.page.set_default_timeout(self.timeout)
+        if self.capture is not None:
+            await self.capture.attach(self.page)
+        await self.page.goto(self.url)
+        self.previous_card = None
+
+        # Открываем список героев
+        elements = await self.page.query_selector_all('button[data-button-root]')
         await elements[1].click()
-        elements = await page.query_selector_all('div[data-cmdk-item]')
-        heroes = [await element.inner_text() for element in elements]
 
-        data = defaultdict(lambda: defaultdict(dict))
+    async def list_heroes(self):
+        await self.page.wait_for_selector('div[data-cmdk-item]')
+        return await self.page.eval_on_selector_all(
+            'div[data-cmdk-item]', "items => items.map(item => item.innerText)")
+
+    async def scrape_hero(self, hero: str):
+        await self.page.click(f'div[data-cmdk-item][data-value="{hero}"]')
+        await self.page.wait_for_function(
+            HERO_READY_JS, arg=[hero, HEADER_SELECTOR, CARD_SELECTOR, self.previous_card])
+
+        texts = await self.page.evaluate(READ_CARDS_JS, CARD_SELECTOR)
+        self.previous_card = texts[0] if texts else None
+
+        # Снова открываем список для следующего героя
+        await self.page.click(f'button[role="combobox"]:has-text("{hero}")')
+        return parse_cards(texts)
+
+    async def close(self):
+        if self.context is not None:
+            await self.context.close()
+
+
+async def worker(page: HeroPage, queue: asyncio.Queue, data, failed, retries: int,
+                 checkpoint: Checkpoint = None):
+    while True:
+        try:
+            hero, attempt = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+
+        try:
+            data[hero] = await page.scrape_hero(hero)
+            if checkpoint is not None:
+                checkpoint.add(hero, data[hero])
+        except Exception as e:
+            logger.warning("Не удалось собрать %s (попытка %d): %s", hero, attempt + 1, e)
+            if attempt + 1 < retries:
+                queue.put_nowait((hero, attempt + 1))
+            else:
+                failed.append(hero)
+            # После ошибки состояние страницы неизвестно, открываем ее заново
+            try:
+                await page.open()
+            except Exception as e:
+                logger.warning("Не удалось переоткрыть страницу: %s", e)
+
+
+async def capture_network(page: HeroPage, heroes, data, checkpoint: Checkpoint = None):
+    """Забирает матчапы из ответов, полученных при загрузке страницы"""
+    await page.page.wait_for_load_state('networkidle')
+    await page.capture.drain()
+
+    captured = 0
+    for hero in heroes:
+        matchups = page.capture.data.get(hero)
+        if matchups is None or hero in data:
+            continue
+        data[hero] = matchups
+        captured += 1
+        if checkpoint is not None:
+            checkpoint.add(hero, matchups)
+    logger.info("Из сети получено %d героев (ответов %d, распознано %d)",
+                captured, page.capture.responses, page.capture.recognized)
 
-        for hero in heroes:
-            selector = f'div[data-cmdk-item][data-value="{hero}"]'
-            element = await page.wait_for_selector(selector)
-            await element.click()
 
-            selector = await page.wait_for_selector('.absolute.z-\\[2\\].top-0.right-0.flex.gap-2.text-sm.text-white.bg-gray-900\\/60.p-1.rounded-bl-lg')
-            enemies = await page.query_selector_all('.card-content.svelte-7yksa3')
-            for num, enemy in enumerate(enemies):
-                text = await enemy.inner_text()
-                values = text.split('\n')
-                games, percent, enemy_name = values[0], values[1], values[2]
-                data[hero][enemy_name]['games'] = int(games)
-                data[hero][enemy_name]['percent'] = float(percent.rstrip('%')) / 100
+async def scrape(url: str = MATCHUPS_URL, workers: int = 4, retries: int = 3,
+                 timeout: int = 5000, headless: bool = True, heroes=None,
+                 checkpoint: Checkpoint = None, mode: str = 'auto',
+                 har: str = None, record_har: bool = False):
+    """Собирает матчапы всех героев.
 
-            await page.click(f'button[role="combobox"]:has-text("{hero}")')
+    mode: network - только из сетевых ответов страницы, dom - разбором
+    карточек в нескольких вкладках параллельно, auto - из сети, а героев,
+    которых там не нашлось, разбором карточек. Герои, уже записанные в
+    контрольную точку, повторно не собираются.
+    """
+    data = dict(checkpoint.heroes) if checkpoint is not None else {}
+    if record_har:
+        # В один HAR-файл пишет только одна вкладка
+        workers = 1
 
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=headless)  # без GUI
+        capture = NetworkCapture() if mode != 'dom' else None
+        pages = [HeroPage(browser, url, timeout, har, record_har, capture)]
+        await pages[0].open()
+
+        if heroes is None:
+            heroes = await pages[0].list_heroes()
+        if capture is not None:
+            await capture_network(pages[0], heroes, data, checkpoint)
+
+        queue = asyncio.Queue()
+        for hero in heroes:
+            if hero not in data:
+                queue.put_nowait((hero, 0))
+        if data:
+            logger.info("Собрано %d из %d героев, осталось разобрать %d",
+                        len(heroes) - queue.qsize(), len(heroes), queue.qsize())
+
+        failed = []
+        if mode == 'network':
+            failed = [hero for hero in heroes if hero not in data]
+        elif not queue.empty():
+            pages += [HeroPage(browser, url, timeout, har) for _ in range(max(1, workers) - 1)]
+            await asyncio.gather(*(page.open() for page in pages[1:]))
+            await asyncio.gather(*(worker(page, queue, data, failed, retries, checkpoint) for page in pages))
+
+        await asyncio.gather(*(page.close() for page in pages))
         await browser.close()
-        with open('winrates.json', 'w') as fp:
-            json.dump(data, fp)
 
-asyncio.run(main())
\ No newline at end of file
+    if failed:
+        logger.error("Не собраны после %d попыток: %s", retries, ', '.join(failed))
+
+    # Порядок героев как на сайте, независимо от порядка завершения вкладок
+    return {hero: data[hero] for hero in heroes if hero in data}, failed
+
+
+def write_results(data, out_dir: str = '.'):
+    """Атомарно записывает датасет и журнал изменений; возвращает сводку изменений"""
+    json_path = os.path.join(out_dir, 'winrates.json')
+    snapshot_path = os.path.join(out_dir, 'winrates.bin')
+    diff = diff_datasets(load_dataset(json_path), data)
+    logger.info("Изменения датасета:\n%s", format_changelog(diff))
+
+    if not (diff['added'] or diff['removed'] or diff['changed']):
+        # JSON не трогаем, чтобы боты не перечитывали тот же датасет; снимок дописываем,
+        # если его нет или он старого формата
+        if os.path.exists(json_path):
+            ensure_snapshot(json_path, snapshot_path)
+        return diff
+
+    raw = json.dumps(data).encode('utf-8')
+    atomic_write(json_path, raw)
+    atomic_write(os.path.join(out_dir, 'winrates.changelog.json'),
+                 json.dumps(diff, ensure_ascii=False, indent=1).encode('utf-8'))
+
+    # Бинарный снимок для быстрой загрузки ботом, версия совпадает с версией JSON
+    version = dataset_version(raw)
+    write_snapshot(snapshot_path, MatchupMatrix.from_dict(json.loads(raw), version))
+    notify_bots(version)
+    return diff
+
+
+def ensure_snapshot(json_path: str, snapshot_path: str):
+    """Перезаписывает снимок, если он отсутствует, устарел или не соответствует JSON"""
+    with open(json_path, 'rb') as fp:
+        version = dataset_version(fp.read())
+    if (snapshot_is_current(snapshot_path, version)
+            and os.path.getmtime(snapshot_path) >= os.path.getmtime(json_path)):
+        return
+    logger.info("Снимок %s отсутствует или устарел, записываем заново", snapshot_path)
+    write_snapshot(snapshot_path, MatchupMatrix.from_json(json_path))
+
+
+def notify_bots(version: str):
+    """Сообщает запущенным ботам о новом датасете, если указан Redis и канал не отключен"""
+    channel = os.getenv('DATASET_RELOAD_CHANNEL', RELOAD_CHANNEL)
+    if not os.getenv('REDIS_HOST') or not channel:
+        return
+    import redis
+
+    client = redis.Redis(
+        host=os.environ['REDIS_HOST'],
+        port=int(os.getenv('REDIS_PORT', 6379)),
+        db=int(os.getenv('REDIS_DB', 0))
+    )
+    client.publish(channel, version)
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Сбор винрейтов матчапов")
+    parser.add_argument('--url', default=MATCHUPS_URL,
+                        help='страница матчапов, например file://.../parser/fixtures/matchups.html')
+    parser.add_argument('--workers', type=int, default=4, help='количество параллельных вкладок')
+    parser.add_argument('--retries', type=int, default=3, help='попыток на одного героя')
+    parser.add_argument('--timeout', type=int, default=5000, help='таймаут ожидания, мс')
+    parser.add_argument('--out-dir', default='.', help='куда записать winrates.json и winrates.bin')
+    parser.add_argument('--checkpoint', default=None,
+                        help='журнал собранных героев, по умолчанию winrates.checkpoint.jsonl в --out-dir')
+    parser.add_argument('--fresh', action='store_true', help='не продолжать с контрольной точки')
+    parser.add_argument('--mode', choices=('auto', 'network', 'dom'), default='auto',
+                        help='откуда брать данные: сетевые ответы, карточки или сеть с разбором карточек')
+    parser.add_argument('--har', default=None, help='HAR-файл: отвечать из него вместо сети')
+    parser.add_argument('--record-har', action='store_true', help='записать ответы сети в --har')
+    args = parser.parse_args()
+    if args.record_har and not args.har:
+        parser.error('--record-har требует --har')
+
+    checkpoint = Checkpoint(args.checkpoint or os.path.join(args.out_dir, 'winrates.checkpoint.jsonl'), args.url)
+    if not args.fresh:
+        checkpoint.load()
+    checkpoint.open(resume=not args.fresh)
+    try:
+        data, failed = await scrape(args.url, args.workers, args.retries, args.timeout,
+                                    checkpoint=checkpoint, mode=args.mode,
+                                    har=args.har, record_har=args.record_har)
+    finally:
+        checkpoint.close()
+
+    if failed:
+        # Неполный датасет не публикуем, следующий запуск доберет оставшихся героев
+        logger.error("Датасет не записан, контрольная точка сохранена: %s", checkpoint.path)
+        sys.exit(1)
+
+    write_results(data, args.out_dir)
+    checkpoint.remove()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
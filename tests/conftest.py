@@ -0,0 +1,31 @@
+import json
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+# Модули бота и парсера импортируются плоско, как при запуске из их каталогов
+sys.path.insert(0, os.path.join(ROOT, 'bot'))
+sys.path.insert(0, os.path.join(ROOT, 'parser'))
+sys.path.insert(0, os.path.join(ROOT, 'benchmarks'))
+
+WINRATES_PATH = os.path.join(ROOT, 'parser', 'winrates.json')
+
+
+@pytest.fixture(scope='session')
+def winrates():
+    """Настоящий датасет парсера"""
+    with open(WINRATES_PATH) as fp:
+        return json.load(fp)
+
+
+@pytest.fixture(scope='session')
+def system(tmp_path_factory):
+    """Система на копии датасета, чтобы рядом не появлялись чужие снимки"""
+    from system import HeroWinrateSystem
+
+    path = tmp_path_factory.mktemp('data') / 'winrates.json'
+    shutil.copy(WINRATES_PATH, path)
+    return HeroWinrateSystem(str(path))
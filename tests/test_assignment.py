@@ -0,0 +1,71 @@
+from itertools import combinations, permutations
+
+import numpy as np
+import pytest
+
+from assignment import best_assignment, hungarian, max_min_team
+
+
+def brute_force(scores: np.ndarray):
+    """Лучшая сумма, если пары выбираем мы, и если их выбирает соперник"""
+    pool_size, k = scores.shape
+    best_assign = best_maxmin = -np.inf
+    for team in combinations(range(pool_size), k):
+        totals = [sum(scores[team[p[i]], i] for i in range(k)) for p in permutations(range(k))]
+        best_assign = max(best_assign, max(totals))
+        best_maxmin = max(best_maxmin, min(totals))
+    return best_assign, best_maxmin
+
+
+def test_hungarian_matches_brute_force():
+    rng = np.random.default_rng(0)
+    for _ in range(50):
+        n = int(rng.integers(1, 5))
+        cost = rng.random((n, int(rng.integers(n, 8))))
+        columns = hungarian(cost)
+        assert len(set(columns.tolist())) == n
+        best = min(cost[np.arange(n), list(p)].sum() for p in permutations(range(cost.shape[1]), n))
+        assert cost[np.arange(n), columns].sum() == pytest.approx(best)
+
+
+def test_hungarian_rejects_tall_matrix():
+    with pytest.raises(ValueError):
+        hungarian(np.zeros((3, 2)))
+
+
+@pytest.mark.parametrize('k', [1, 2, 3, 4])
+def test_team_modes_match_brute_force(k):
+    rng = np.random.default_rng(k)
+    for _ in range(20):
+        scores = rng.random((int(rng.integers(k, 11)), k))
+        exact_assign, exact_maxmin = brute_force(scores)
+
+        rows, total = best_assignment(scores)
+        assert total == pytest.approx(exact_assign)
+        assert scores[rows, np.arange(k)].sum() == pytest.approx(total)
+
+        rows, total, optimal = max_min_team(scores)
+        assert optimal
+        assert total == pytest.approx(exact_maxmin)
+        assert len(set(rows.tolist())) == k
+        # Пары в ответе - худшие для команды
+        worst = min(scores[rows[list(p)], np.arange(k)].sum() for p in permutations(range(k)))
+        assert scores[rows, np.arange(k)].sum() == pytest.approx(worst)
+
+
+def test_max_min_certifies_realistic_pool():
+    # Оценки вокруг 0.5 с небольшим разбросом, как у винрейтов ростера
+    rng = np.random.default_rng(7)
+    scores = np.clip(rng.normal(0.5, 0.08, size=(30, 4)), 0, 1)
+    combos = np.array(list(combinations(range(30), 4)))
+    perms = np.array(list(permutations(range(4))))
+    exact = scores[combos[:, perms], np.arange(4)].sum(axis=2).min(axis=1).max()
+
+    _, total, optimal = max_min_team(scores, start_candidates=4)
+    assert optimal
+    assert total == pytest.approx(exact)
+
+
+def test_max_min_empty_team():
+    rows, total, optimal = max_min_team(np.zeros((3, 0)))
+    assert rows.size == 0 and total == 0.0 and optimal
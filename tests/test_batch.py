@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+from matrix import MatchupMatrix
+
+
+@pytest.fixture(scope='module')
+def matrix(winrates):
+    return MatchupMatrix.from_dict(winrates)
+
+
+def random_teams(heroes, count, seed=0):
+    rng = np.random.default_rng(seed)
+    teams, excludes = [], []
+    for _ in range(count):
+        teams.append([heroes[i] for i in rng.choice(len(heroes), size=int(rng.integers(0, 6)), replace=False)])
+        excludes.append([heroes[i] for i in rng.choice(len(heroes), size=int(rng.integers(0, 4)), replace=False)])
+    return teams, excludes
+
+
+def test_rank_batch_matches_rank(matrix):
+    teams, excludes = random_teams(matrix.hero_names, 300)
+    for top_n in (1, 10, 100):
+        batch = matrix.rank_batch(teams, top_n, excludes)
+        assert batch == [matrix.rank(team, top_n, exclude) for team, exclude in zip(teams, excludes)]
+
+
+def test_rank_batch_empty(matrix):
+    assert matrix.rank_batch([], 10, []) == []
+    assert matrix.rank_batch([['Achilles']], 0, [[]]) == [[]]
+
+
+def test_find_best_heroes_batch(system):
+    teams, excludes = random_teams(system.hero_names, 20, seed=1)
+    results = system.find_best_heroes_batch(teams, excludes, top_n=5)
+    for team, exclude, result in zip(teams, excludes, results):
+        assert result['enemy_team'] == team
+        assert result['best_heroes'] == system.find_best_heroes(team, 5, exclude)
+        for hero, score in result['best_heroes']:
+            assert result['details'][hero] == system.get_hero_details(hero, team)
+
+
+def test_find_best_heroes_batch_validates_input(system):
+    with pytest.raises(ValueError):
+        system.find_best_heroes_batch([['Achilles'], ['Alice']], [[]])
+    with pytest.raises(ValueError):
+        system.find_best_heroes_batch([['Nobody']])
@@ -0,0 +1,37 @@
+import random
+
+import pytest
+
+from bench_suite import name_queries, percentiles
+from matrix import MatchupMatrix
+from synth import generate_winrates
+
+
+def test_synthetic_roster_is_reproducible():
+    first = generate_winrates(50, density=0.3, seed=5)
+    assert first == generate_winrates(50, density=0.3, seed=5)
+    assert first != generate_winrates(50, density=0.3, seed=6)
+
+
+def test_synthetic_roster_shape():
+    data = generate_winrates(200, density=0.25, seed=1)
+    assert len(data) == 200
+    pairs = sum(len(row) for row in data.values())
+    assert pairs == pytest.approx(200 * 199 * 0.25, rel=0.1)
+    for hero, row in data.items():
+        assert hero not in row
+        assert all(m['games'] >= 1 and 0 <= m['percent'] <= 1 for m in row.values())
+    assert MatchupMatrix.from_dict(data).num_heroes == 200
+
+
+def test_percentiles():
+    summary = percentiles([0.001 * i for i in range(1, 101)])
+    assert summary['count'] == 100
+    assert summary['p50_ms'] == pytest.approx(51)
+    assert summary['p99_ms'] == pytest.approx(100)
+    assert summary['max_ms'] == pytest.approx(100)
+
+
+def test_name_queries_are_reproducible():
+    heroes = ['Achilles', 'Alice', 'Angel']
+    assert name_queries(random.Random(0), heroes, 20) == name_queries(random.Random(0), heroes, 20)
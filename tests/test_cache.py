@@ -0,0 +1,61 @@
+from cache import LRUCache, ban_set_hash
+
+
+def test_evicts_least_recently_used():
+    cache = LRUCache(2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert 'b' not in cache
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.evictions == 1
+
+
+def test_version_change_clears_cache():
+    cache = LRUCache(4)
+    cache.bind_version('v1')
+    cache.put('a', 1)
+    cache.bind_version('v1')
+    assert len(cache) == 1
+    cache.bind_version('v2')
+    assert len(cache) == 0
+    assert cache.stats()['invalidations'] == 1
+
+
+def test_stats():
+    cache = LRUCache(4)
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['hit_rate']) == (1, 1, 0.5)
+
+
+def test_zero_size_stores_nothing():
+    cache = LRUCache(0)
+    cache.put('a', 1)
+    assert cache.get('a') is None
+
+
+def test_ban_set_hash_ignores_order_and_duplicates():
+    assert ban_set_hash(['Alice', 'Achilles']) == ban_set_hash(['Achilles', 'Alice', 'Alice'])
+    assert ban_set_hash(['Alice']) != ban_set_hash(['Achilles'])
+
+
+def test_ranking_cache_key_normalizes_team(system):
+    key = system.ranking_cache_key(['Alice', 'Achilles'], 10, ['Angel', 'Buffy'])
+    assert key == system.ranking_cache_key(['Achilles', 'Alice'], 10, ['Buffy', 'Angel'])
+    assert key != system.ranking_cache_key(['Achilles', 'Alice'], 5, ['Buffy', 'Angel'])
+
+
+def test_find_best_heroes_uses_cache(system):
+    team = ['Achilles', 'Alice', 'Angel']
+    first = system.find_best_heroes(team, 5)
+    hits = system.result_cache.hits
+    second = system.find_best_heroes(list(reversed(team)), 5)
+    assert system.result_cache.hits == hits + 1
+    assert second == first
+    # Изменение возвращенного списка не портит кеш
+    second.clear()
+    assert system.find_best_heroes(team, 5) == first
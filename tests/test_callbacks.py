@@ -0,0 +1,34 @@
+import base64
+
+import callbacks
+from callbacks import ENCODED_SIZE, CallbackCodec, version_tag
+
+
+def test_round_trip():
+    codec = CallbackCodec(b'secret')
+    data = codec.encode(callbacks.TOGGLE_BAN, 'bf64886384ef', 1234, 7)
+    assert len(data) == ENCODED_SIZE
+    assert len(data.encode('utf-8')) <= 64
+    assert codec.decode(data) == {'op': callbacks.TOGGLE_BAN, 'arg': 1234, 'page': 7,
+                                  'version': version_tag('bf64886384ef')}
+
+
+def test_tampered_data_is_rejected():
+    codec = CallbackCodec(b'secret')
+    raw = bytearray(base64.urlsafe_b64decode(codec.encode(callbacks.DETAILS, 'v1', 5)))
+    raw[1] ^= 1
+    assert codec.decode(base64.urlsafe_b64encode(bytes(raw)).decode('ascii')) is None
+    # Подпись другим ключом
+    assert codec.decode(CallbackCodec(b'other').encode(callbacks.DETAILS, 'v1', 5)) is None
+
+
+def test_foreign_data_is_rejected():
+    codec = CallbackCodec(b'secret')
+    assert codec.decode('ban_Alice') is None
+    assert codec.decode('!' * ENCODED_SIZE) is None
+    assert codec.decode('') is None
+
+
+def test_version_tag_distinguishes_versions():
+    assert version_tag('v1') != version_tag('v2')
+    assert len(version_tag('v1')) == callbacks.TAG_SIZE
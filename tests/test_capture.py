@@ -0,0 +1,55 @@
+from capture import extract_matchups
+
+
+def test_rows_in_percent():
+    payload = {'data': [
+        {'fighter': 'Alice', 'opponent': 'Medusa', 'games': 95, 'winrate': 72},
+        {'fighter': 'Medusa', 'opponent': 'Alice', 'games': 95, 'winrate': 28},
+    ]}
+    assert extract_matchups(payload) == {
+        'Alice': {'Medusa': {'games': 95, 'percent': 0.72}},
+        'Medusa': {'Alice': {'games': 95, 'percent': 0.28}},
+    }
+
+
+def test_low_percent_keeps_response_scale():
+    # 1 и 0.8 в ответе, где остальные винрейты в процентах, - это 1% и 0.8%, а не 100% и 80%
+    payload = [
+        {'hero': 'Alice', 'opponent': 'Medusa', 'games': 100, 'winrate': 1},
+        {'hero': 'Alice', 'opponent': 'Sinbad', 'games': 100, 'winrate': 0.8},
+        {'hero': 'Medusa', 'opponent': 'Alice', 'games': 100, 'winrate': 99},
+    ]
+    data = extract_matchups(payload)
+    assert data['Alice']['Medusa']['percent'] == 0.01
+    assert data['Alice']['Sinbad']['percent'] == 0.01
+    assert data['Medusa']['Alice']['percent'] == 0.99
+
+
+def test_fractions_and_wins():
+    payload = [
+        {'hero': 'Alice', 'opponent': 'Medusa', 'games': 10, 'winrate': 1},
+        {'hero': 'Medusa', 'opponent': 'Alice', 'games': 10, 'wins': 0},
+    ]
+    assert extract_matchups(payload) == {
+        'Alice': {'Medusa': {'games': 10, 'percent': 1.0}},
+        'Medusa': {'Alice': {'games': 10, 'percent': 0.0}},
+    }
+
+
+def test_wins_are_not_rescaled_in_percent_response():
+    payload = [
+        {'hero': 'Alice', 'opponent': 'Medusa', 'games': 10, 'winrate': 70},
+        {'hero': 'Medusa', 'opponent': 'Alice', 'games': 10, 'wins': 3},
+    ]
+    data = extract_matchups(payload)
+    assert data['Alice']['Medusa']['percent'] == 0.7
+    assert data['Medusa']['Alice']['percent'] == 0.3
+
+
+def test_nested_table():
+    payload = {'matchups': {'Alice': {'Medusa': {'games': 12, 'percent': 0.58}}}}
+    assert extract_matchups(payload) == {'Alice': {'Medusa': {'games': 12, 'percent': 0.58}}}
+
+
+def test_unrelated_payload():
+    assert extract_matchups({'user': {'name': 'x'}, 'items': [1, 2]}) == {}
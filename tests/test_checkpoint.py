@@ -0,0 +1,70 @@
+import json
+
+from checkpoint import Checkpoint, diff_datasets, format_changelog, load_dataset, matchups_hash
+
+URL = 'https://example.com/matchups'
+ALICE = {'Medusa': {'games': 12, 'percent': 0.58}}
+MEDUSA = {'Alice': {'games': 12, 'percent': 0.42}}
+
+
+def test_resume_after_crash(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = Checkpoint(path, URL)
+    checkpoint.open(resume=False)
+    checkpoint.add('Alice', ALICE)
+    checkpoint.add('Medusa', MEDUSA)
+    checkpoint.close()
+    # Недописанная при падении строка
+    with open(path, 'a') as fp:
+        fp.write('{"hero": "Sin')
+
+    resumed = Checkpoint(path, URL)
+    assert resumed.load() == {'Alice': ALICE, 'Medusa': MEDUSA}
+    resumed.open()
+    resumed.add('Sinbad', {})
+    resumed.close()
+    assert Checkpoint(path, URL).load() == {'Alice': ALICE, 'Medusa': MEDUSA, 'Sinbad': {}}
+
+
+def test_checkpoint_of_other_page_is_ignored(tmp_path):
+    path = str(tmp_path / 'checkpoint.jsonl')
+    checkpoint = Checkpoint(path, URL)
+    checkpoint.open(resume=False)
+    checkpoint.add('Alice', ALICE)
+    checkpoint.remove()
+    assert Checkpoint(path, URL).load() == {}
+
+    checkpoint.open(resume=False)
+    checkpoint.add('Alice', ALICE)
+    checkpoint.close()
+    assert Checkpoint(path, 'file:///other.html').load() == {}
+
+
+def test_matchups_hash_ignores_order():
+    first = {'a': {'games': 1, 'percent': 0.5}, 'b': {'games': 2, 'percent': 0.1}}
+    second = {'b': {'games': 2, 'percent': 0.1}, 'a': {'games': 1, 'percent': 0.5}}
+    assert matchups_hash(first) == matchups_hash(second)
+
+
+def test_diff_datasets():
+    previous = {'Alice': ALICE, 'Medusa': MEDUSA, 'Sinbad': {}}
+    current = {'Alice': {'Medusa': {'games': 13, 'percent': 0.6}}, 'Medusa': MEDUSA, 'Buffy': {}}
+    diff = diff_datasets(previous, current)
+    assert diff['added'] == ['Buffy']
+    assert diff['removed'] == ['Sinbad']
+    assert diff['changed'] == ['Alice']
+    assert diff['unchanged'] == 1
+    assert diff['matchups'] == [{'hero': 'Alice', 'enemy': 'Medusa', 'before': ALICE['Medusa'],
+                                 'after': {'games': 13, 'percent': 0.6}}]
+    changelog = format_changelog(diff)
+    assert 'Alice vs Medusa: 58% (12) -> 60% (13)' in changelog
+    assert 'Новые: Buffy' in changelog
+
+
+def test_load_dataset(tmp_path):
+    path = tmp_path / 'winrates.json'
+    assert load_dataset(str(path)) == {}
+    path.write_text('{"Alice": ')
+    assert load_dataset(str(path)) == {}
+    path.write_text(json.dumps({'Alice': ALICE}))
+    assert load_dataset(str(path)) == {'Alice': ALICE}
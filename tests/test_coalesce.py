@@ -0,0 +1,42 @@
+import asyncio
+
+from coalesce import Coalescer
+
+
+def test_coalescer_runs_last_action_once():
+    executed = []
+
+    async def scenario():
+        coalescer = Coalescer(0.02)
+        for i in range(5):
+            await coalescer.schedule('message', lambda i=i: record(i))
+        await coalescer.schedule('other', lambda: record('other'))
+        assert len(coalescer) == 2
+        await asyncio.sleep(0.05)
+        assert len(coalescer) == 0
+        assert coalescer.scheduled == 6 and coalescer.executed == 2
+
+    async def record(value):
+        executed.append(value)
+
+    asyncio.run(scenario())
+    assert sorted(executed, key=str) == [4, 'other']
+
+
+def test_coalescer_cancel_and_flush():
+    executed = []
+
+    async def record(value):
+        executed.append(value)
+
+    async def scenario():
+        coalescer = Coalescer(10)
+        await coalescer.schedule('a', lambda: record('a'))
+        await coalescer.schedule('b', lambda: record('b'))
+        coalescer.cancel('a')
+        await coalescer.flush()
+        # Без задержки действие выполняется сразу
+        await Coalescer(0).schedule('c', lambda: record('c'))
+
+    asyncio.run(scenario())
+    assert executed == ['b', 'c']
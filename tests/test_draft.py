@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+from draft import DRAFT_FORMATS, DraftSolver, parse_format
+from matrix import MatchupMatrix
+from scoring import pairwise_scores
+
+
+def random_matrix(num_heroes: int, seed: int) -> MatchupMatrix:
+    rng = np.random.default_rng(seed)
+    names = [f'h{i}' for i in range(num_heroes)]
+    data = {hero: {} for hero in names}
+    for i in range(num_heroes):
+        for j in range(i + 1, num_heroes):
+            percent = round(float(rng.random()), 2)
+            games = int(rng.integers(10, 100))
+            data[names[i]][names[j]] = {'games': games, 'percent': percent}
+            data[names[j]][names[i]] = {'games': games, 'percent': round(1 - percent, 2)}
+    return MatchupMatrix.from_dict(data)
+
+
+def brute_force(scores: np.ndarray, steps, taken=(), picks=((), ())) -> float:
+    """Точный минимакс по всем ходам"""
+    if len(taken) == len(steps):
+        picks_a, picks_b = picks
+        return float(np.mean([scores[a, b] for a in picks_a for b in picks_b]))
+    side, action = steps[len(taken)]
+    values = []
+    for hero in range(scores.shape[0]):
+        if hero in taken:
+            continue
+        new_picks = picks
+        if action == 'pick':
+            new_picks = (picks[0] + (hero,), picks[1]) if side == 'A' else (picks[0], picks[1] + (hero,))
+        values.append(brute_force(scores, steps, taken + (hero,), new_picks))
+    return max(values) if side == 'A' else min(values)
+
+
+@pytest.mark.parametrize('spec', [DRAFT_FORMATS['duel'], 'A:pick B:pick B:pick A:pick',
+                                  'B:ban A:pick B:pick A:pick B:pick'])
+def test_full_width_search_is_exact(spec):
+    steps = parse_format(spec)
+    for seed in range(3):
+        matrix = random_matrix(6, seed)
+        solver = DraftSolver(matrix, steps, width=6, time_budget=30)
+        result = solver.solve([])
+        assert result['complete']
+        assert result['value'] == pytest.approx(brute_force(pairwise_scores(matrix), steps))
+        assert len(result['line']) == len(steps)
+
+
+def test_solve_continues_history():
+    matrix = random_matrix(6, 0)
+    steps = parse_format(DRAFT_FORMATS['duel'])
+    result = DraftSolver(matrix, steps, width=6, time_budget=30).solve([0, 1])
+    assert result['value'] == pytest.approx(brute_force(pairwise_scores(matrix), steps, (0, 1)))
+    assert [side for side, _, _ in result['line']] == ['A', 'B']
+    assert all(hero not in (0, 1) for _, _, hero in result['line'])
+
+
+def test_parse_format():
+    assert parse_format('A:ban B:pick') == [('A', 'ban'), ('B', 'pick')]
+    with pytest.raises(ValueError):
+        parse_format('C:pick')
+
+
+def test_solve_draft_validates_history(system):
+    with pytest.raises(ValueError):
+        system.solve_draft('duel', ['Nobody'])
+    with pytest.raises(ValueError):
+        system.solve_draft('duel', ['Alice', 'Alice'])
+    result = system.solve_draft('duel', ['Alice', 'Achilles'], time_budget=0.5)
+    assert result['bans'] == ['Alice', 'Achilles']
+    assert result['step'] == 2
+    assert result['candidates'] and 'Alice' not in result['candidates']
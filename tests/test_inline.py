@@ -0,0 +1,48 @@
+import pytest
+
+from inline import InlineCompleter, split_lineup
+from scoring import STRATEGIES
+
+
+def test_split_lineup():
+    assert split_lineup('ciri, achil') == (['ciri'], 'achil')
+    assert split_lineup('ciri, achilles, ') == (['ciri', 'achilles'], '')
+    assert split_lineup('ciri achil') == (['ciri'], 'achil')
+    assert split_lineup('ciri ') == (['ciri'], '')
+    assert split_lineup('') == ([], '')
+
+
+@pytest.mark.parametrize('strategy', list(STRATEGIES))
+def test_counters_match_find_best_heroes(system, strategy):
+    completer = InlineCompleter(system)
+    for text in ('alice, achilles, an', 'alice, achilles, angel', 'bu'):
+        suggestions = completer.suggest(text, strategy, budget=10)
+        assert suggestions
+        for suggestion in suggestions:
+            expected = system.find_best_heroes(suggestion['enemy_team'], 10, strategy=strategy)
+            assert suggestion['counters'] == expected
+
+
+def test_completion_variants(system):
+    completer = InlineCompleter(system)
+    suggestions = completer.suggest('alice, an', 'mean', limit=3, budget=10)
+    assert 1 <= len(suggestions) <= 3
+    for suggestion in suggestions:
+        assert suggestion['enemy_team'][0] == 'Alice'
+        assert suggestion['enemy_team'][1].lower().startswith('an')
+        assert suggestion['not_found'] == []
+
+
+def test_unknown_names_are_reported(system):
+    completer = InlineCompleter(system)
+    suggestions = completer.suggest('qqqq, alice', 'mean', budget=10)
+    assert suggestions[0]['not_found'] == ['qqqq']
+    assert completer.suggest('qqqq', 'mean') == []
+
+
+def test_results_are_cached(system):
+    completer = InlineCompleter(system)
+    first = completer.suggest('alice, achil', 'mean', budget=10)
+    hits = completer.results_cache.hits
+    assert completer.suggest('Alice, ACHIL', 'mean', budget=10) == first
+    assert completer.results_cache.hits == hits + 1
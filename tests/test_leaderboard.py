@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+import leaderboard
+from leaderboard import MatchupIndex
+from matrix import MatchupMatrix
+from scoring import STRATEGIES
+
+
+@pytest.fixture(scope='module')
+def matrix(winrates):
+    return MatchupMatrix.from_dict(winrates)
+
+
+@pytest.mark.parametrize('strategy', list(STRATEGIES))
+def test_counters_match_rank(matrix, strategy):
+    index = MatchupIndex(matrix, size=10)
+    for enemy in range(matrix.num_heroes):
+        heroes, scores = index.counters(enemy, strategy)
+        expected = matrix.rank([matrix.hero_names[enemy]], 10, (), strategy)
+        assert [(matrix.hero_names[i], score) for i, score in zip(heroes, scores)] == expected
+
+
+def test_blocks_give_same_index(matrix, monkeypatch):
+    full = MatchupIndex(matrix)
+    monkeypatch.setattr(leaderboard, 'BLOCK_SIZE', 7)
+    blocked = MatchupIndex(matrix)
+    for hero in range(matrix.num_heroes):
+        assert blocked.counters(hero) == full.counters(hero)
+        assert blocked.best_matchups(hero) == full.best_matchups(hero)
+        assert blocked.worst_matchups(hero) == full.worst_matchups(hero)
+
+
+def test_best_and_worst_matchups(matrix):
+    index = MatchupIndex(matrix, size=5)
+    for hero in range(matrix.num_heroes):
+        valid = np.flatnonzero(matrix.valid[hero])
+        winrate = matrix.valid_winrate[hero, valid]
+        best = valid[np.lexsort((valid, -winrate))][:5].tolist()
+        worst = valid[np.lexsort((valid, winrate))][:5].tolist()
+        assert index.best_matchups(hero) == best
+        assert index.worst_matchups(hero) == worst
+
+
+def test_leaderboard(matrix):
+    order, scores, position = MatchupIndex(matrix).leaderboard('mean')
+    for hero in (0, 10, 40):
+        enemy_idx = [i for i in range(matrix.num_heroes) if i != hero]
+        assert scores[hero] == pytest.approx(matrix.score(hero, enemy_idx))
+    assert all(scores[order[:-1]] >= scores[order[1:]])
+    assert position[order].tolist() == list(range(matrix.num_heroes))
+
+
+def test_hero_profile(system):
+    profile = system.hero_profile('Alice', top_n=3)
+    board = system.leaderboard(top_n=system.num_heroes)
+    assert board[profile['rank'] - 1][0] == 'Alice'
+    assert len(profile['best']) == 3
+    assert profile['best'][0][1] >= profile['worst'][0][1]
+    with pytest.raises(ValueError):
+        system.hero_profile('Nobody')
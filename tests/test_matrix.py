@@ -0,0 +1,61 @@
+import numpy as np
+import pytest
+
+from matrix import MatchupMatrix
+
+
+def reference_best_heroes(winrates, enemy_team, top_n, exclude_heroes=()):
+    """Подбор по словарю, как до перехода на матрицы"""
+    hero_scores = []
+    for hero in winrates:
+        if hero in exclude_heroes or hero in enemy_team:
+            continue
+        total, counted = 0.0, 0
+        for enemy in enemy_team:
+            matchup = winrates[hero].get(enemy)
+            if matchup is not None and matchup['games'] >= 10:
+                total += matchup['percent']
+                counted += 1
+        hero_scores.append((hero, total / counted if counted else 0.0))
+    hero_scores.sort(key=lambda x: x[1], reverse=True)
+    return hero_scores[:top_n]
+
+
+@pytest.fixture(scope='module')
+def matrix(winrates):
+    return MatchupMatrix.from_dict(winrates)
+
+
+def test_rank_matches_dict_computation(winrates, matrix):
+    rng = np.random.default_rng(1)
+    heroes = list(winrates)
+    for _ in range(200):
+        team = [heroes[i] for i in rng.choice(len(heroes), size=int(rng.integers(1, 6)), replace=False)]
+        exclude = [heroes[i] for i in rng.choice(len(heroes), size=int(rng.integers(0, 4)), replace=False)]
+        top_n = int(rng.integers(1, 70))
+        assert matrix.rank(team, top_n, exclude) == reference_best_heroes(winrates, team, top_n, exclude)
+
+
+def test_score_matches_average_winrates(winrates, matrix):
+    enemy_idx = matrix.indices(['Achilles', 'Alice', 'Angel'])
+    scores = matrix.average_winrates(enemy_idx)
+    for hero_idx in range(matrix.num_heroes):
+        assert matrix.score(hero_idx, enemy_idx) == scores[hero_idx]
+
+
+def test_to_dict_round_trip(winrates, matrix):
+    expected = {hero: {enemy: m for enemy, m in row.items() if m['games']} for hero, row in winrates.items()}
+    assert matrix.to_dict() == expected
+
+
+def test_top_k_keeps_hero_order_on_ties():
+    matrix = MatchupMatrix.from_dict({hero: {} for hero in 'abcde'})
+    scores = np.array([0.5, 0.7, 0.5, 0.7, 0.5])
+    allowed = np.array([True, True, True, False, True])
+    assert matrix.top_k(scores, allowed, 3) == [1, 0, 2]
+    assert matrix.top_k(scores, allowed, 10) == [1, 0, 2, 4]
+    assert matrix.top_k(scores, allowed, 0) == []
+
+
+def test_unknown_heroes_are_skipped(matrix):
+    assert matrix.indices(['Achilles', 'Nobody']) == [matrix.hero_index['Achilles']]
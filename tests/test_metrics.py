@@ -0,0 +1,113 @@
+import asyncio
+import time
+
+import pytest
+
+from metrics import (HANDLER_ERRORS, HANDLER_SECONDS, Counter, Gauge, Histogram, MetricsServer, Registry,
+                     SamplingProfiler, instrument, timed)
+
+
+def test_render_prometheus_text():
+    registry = Registry()
+    counter = registry.register(Counter('app_updates_total', 'Обновления', ['kind']))
+    gauge = registry.register(Gauge('app_ratio', 'Доля'))
+    histogram = registry.register(Histogram('app_seconds', 'Время', buckets=(0.1, 1.0)))
+    counter.labels('message').inc()
+    counter.labels('message').inc(2)
+    counter.labels('a"b').inc()
+    gauge.set(0.25)
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE app_updates_total counter' in lines
+    assert 'app_updates_total{kind="message"} 3.0' in lines
+    assert 'app_updates_total{kind="a\\"b"} 1.0' in lines
+    assert 'app_ratio 0.25' in lines
+    assert 'app_seconds_bucket{le="0.1"} 1' in lines
+    assert 'app_seconds_bucket{le="1.0"} 2' in lines
+    assert 'app_seconds_bucket{le="+Inf"} 3' in lines
+    assert 'app_seconds_sum 5.55' in lines
+    assert 'app_seconds_count 3' in lines
+
+
+def test_labels_must_match():
+    counter = Counter('app_total', 'x', ['kind'])
+    with pytest.raises(ValueError):
+        counter.labels('a', 'b')
+
+
+def test_timed_and_instrument():
+    histogram = Histogram('app_call_seconds', 'x', ['name'])
+
+    @timed(histogram, 'sync')
+    def work():
+        return 1
+
+    @timed(histogram, 'async')
+    async def async_work():
+        return 2
+
+    async def failing(update, context):
+        raise RuntimeError('ошибка')
+
+    assert work() == 1
+    assert asyncio.run(async_work()) == 2
+    assert histogram.labels('sync').count == 1
+    assert histogram.labels('async').count == 1
+
+    handler = instrument('test_failing', failing)
+    with pytest.raises(RuntimeError):
+        asyncio.run(handler(None, None))
+    assert HANDLER_ERRORS.labels('test_failing').value == 1
+    assert HANDLER_SECONDS.labels('test_failing').count == 1
+
+
+@pytest.mark.parametrize('query', ['interval=0', 'interval=5', 'interval=abc', 'interval=nan'])
+def test_profiler_rejects_bad_interval(query):
+    server = MetricsServer(profiler_enabled=True)
+    status, _ = server.respond(f'/profile/start?{query}')
+    assert status == '400 Bad Request'
+    assert server.profiler is None
+
+
+def test_profiler_endpoints():
+    server = MetricsServer(profiler_enabled=True)
+    assert server.respond('/profile/stop')[0] == '409 Conflict'
+    assert server.respond('/profile/start?interval=0.001') == ('200 OK', 'started\n')
+    deadline = time.monotonic() + 1
+    while time.monotonic() < deadline:
+        sum(range(1000))
+    status, stacks = server.respond('/profile/stop')
+    assert status == '200 OK'
+    assert 'test_metrics.py:test_profiler_endpoints' in stacks
+    assert MetricsServer().respond('/profile/start')[0] == '404 Not Found'
+
+
+def test_profiler_samples_thread():
+    profiler = SamplingProfiler(interval=0.001)
+    profiler.start()
+    time.sleep(0.05)
+    profiler.stop()
+    assert profiler.samples > 0
+    assert not profiler.running
+
+
+def test_server_serves_metrics():
+    registry = Registry()
+    gauge = registry.register(Gauge('app_heroes', 'Герои'))
+
+    async def scenario():
+        server = MetricsServer('127.0.0.1', 0, registry, collect=lambda: gauge.set(63))
+        await server.start()
+        port = server._server.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection('127.0.0.1', port)
+        writer.write(b'GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n')
+        response = (await reader.read()).decode('utf-8')
+        writer.close()
+        await server.stop()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.startswith('HTTP/1.1 200 OK')
+    assert 'app_heroes 63' in response
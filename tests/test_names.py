@@ -0,0 +1,52 @@
+import time
+
+from names import HeroNameIndex, edit_distance
+
+HEROES = ['Achilles', 'Alice', 'Bloody Mary', 'Sherlock Holmes', 'Dr. Jekyll & Mr. Hyde', 'T. Rex', 'Spiderman']
+
+
+def test_edit_distance():
+    assert edit_distance('alice', 'alice', 2) == 0
+    assert edit_distance('alcie', 'alice', 2) == 2
+    assert edit_distance('achilles', 'alice', 2) == 3
+
+
+def test_find_order():
+    index = HeroNameIndex(HEROES)
+    assert index.find('alice') == 'Alice'
+    assert index.find('trex') == 'T. Rex'
+    assert index.find('holmes') == 'Sherlock Holmes'
+    assert index.find('drjekyll') == 'Dr. Jekyll & Mr. Hyde'
+    assert index.find('achiles') == 'Achilles'
+    assert index.find('sherlok') == 'Sherlock Holmes'
+    assert index.find('zzzzqq') is None
+
+
+def test_find_substring_matches_linear_scan():
+    index = HeroNameIndex(HEROES)
+    for query in ('a', 'li', 'ck', 'e', 'mar'):
+        expected = next(hero for hero in HEROES if query in hero.lower())
+        assert index.find(query) == expected
+
+
+def test_fuzzy_prefers_popular_hero():
+    index = HeroNameIndex(['Alicia', 'Alicea'], game_volume=[10, 500])
+    assert index.find('alicxa') == 'Alicea'
+
+
+def test_complete():
+    index = HeroNameIndex(HEROES)
+    assert [HEROES[i] for i in index.complete('al')] == ['Alice']
+    assert [HEROES[i] for i in index.complete('mary')] == ['Bloody Mary']
+    assert index.complete('qqq') == []
+
+
+def test_fuzzy_miss_latency_flat_at_10k():
+    names = [f"Hero {i:05d}" for i in range(10000)]
+    index = HeroNameIndex(names)
+    queries = ['hero 0050x', 'hreo 00123', 'hero 9999x', 'heor 01234', 'xyzw 00001', 'qqqq 12345']
+    index.find(queries[0])
+    started = time.perf_counter()
+    for query in queries:
+        index.find(query)
+    assert (time.perf_counter() - started) / len(queries) < 0.03
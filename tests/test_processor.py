@@ -0,0 +1,56 @@
+import asyncio
+import datetime
+
+from telegram import Chat, Message, Update, User
+
+from processor import PerUserUpdateProcessor
+
+
+def make_update(update_id: int, user_id: int = None) -> Update:
+    chat = Chat(user_id or 1, 'private')
+    user = User(user_id, 'user', False) if user_id is not None else None
+    return Update(update_id, message=Message(update_id, datetime.datetime.now(), chat, from_user=user))
+
+
+def test_updates_of_one_user_run_in_order():
+    log = []
+
+    async def work(user_id, n, delay):
+        log.append(('start', user_id, n))
+        await asyncio.sleep(delay)
+        if n == 2:
+            raise RuntimeError('ошибка обработчика')
+        log.append(('end', user_id, n))
+
+    async def scenario():
+        processor = PerUserUpdateProcessor(2)
+        tasks = [asyncio.create_task(processor.process_update(make_update(n, 1), work(1, n, 0.01)))
+                 for n in range(5)]
+        tasks.append(asyncio.create_task(processor.process_update(make_update(9, 2), work(2, 9, 0))))
+        await asyncio.gather(*tasks)
+        assert not processor._queues
+
+    asyncio.run(scenario())
+    first_user = [entry for entry in log if entry[1] == 1]
+    # Каждое обновление начинается после завершения предыдущего, ошибка не останавливает очередь
+    assert [n for event, _, n in first_user if event == 'start'] == [0, 1, 2, 3, 4]
+    assert first_user[:2] == [('start', 1, 0), ('end', 1, 0)]
+    assert ('end', 1, 2) not in log
+    # Второй пользователь не ждет очередь первого
+    assert log.index(('end', 2, 9)) < log.index(('end', 1, 0))
+
+
+def test_updates_without_user_are_not_queued():
+    running = []
+
+    async def work():
+        running.append(1)
+        await asyncio.sleep(0.01)
+        assert len(running) == 2
+
+    async def scenario():
+        processor = PerUserUpdateProcessor(2)
+        await asyncio.gather(processor.process_update(make_update(1), work()),
+                             processor.process_update(make_update(2), work()))
+
+    asyncio.run(scenario())
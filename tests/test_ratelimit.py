@@ -0,0 +1,81 @@
+import asyncio
+from datetime import timedelta
+
+import pytest
+from telegram.error import RetryAfter
+
+import ratelimit
+from ratelimit import TokenBucket, TokenBucketRateLimiter
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = Clock()
+    monkeypatch.setattr(ratelimit.time, 'monotonic', clock)
+    return clock
+
+
+def test_bucket_allows_burst_then_waits(clock):
+    bucket = TokenBucket(rate=2.0, capacity=3.0)
+    assert [bucket.reserve() for _ in range(3)] == [0.0, 0.0, 0.0]
+    # Ожидание резервируется: следующие запросы встают в очередь
+    assert bucket.reserve() == pytest.approx(0.5)
+    assert bucket.reserve() == pytest.approx(1.0)
+    clock.now += 1.0
+    assert bucket.reserve() == pytest.approx(0.5)
+
+
+def test_bucket_penalty_and_idle(clock):
+    bucket = TokenBucket(rate=1.0, capacity=2.0)
+    bucket.penalize(5)
+    assert bucket.reserve() == pytest.approx(5.0)
+    assert not bucket.idle(clock.now)
+    clock.now += 10
+    assert bucket.idle(clock.now)
+
+
+def test_limiter_uses_chat_and_group_buckets(clock):
+    limiter = TokenBucketRateLimiter(overall_rate=30, chat_rate=1, chat_burst=1, group_rate=0.5, group_burst=1)
+    assert limiter.delay('sendMessage', 1) == 0.0
+    assert limiter.delay('sendMessage', 1) == pytest.approx(1.0)
+    assert limiter.delay('sendMessage', 2) == 0.0
+    assert limiter.delay('sendMessage', -100) == 0.0
+    assert limiter.delay('sendMessage', -100) == pytest.approx(2.0)
+    assert limiter.delay('answerCallbackQuery', 1) == 0.0
+
+
+def test_limiter_drops_idle_chats(clock):
+    limiter = TokenBucketRateLimiter()
+    limiter.delay('sendMessage', 1)
+    clock.now += limiter.CLEANUP_INTERVAL + 10
+    limiter.delay('sendMessage', 2)
+    assert list(limiter._chats) == [2]
+
+
+def test_limiter_retries_after_flood_error():
+    calls = []
+
+    async def callback():
+        calls.append(1)
+        if len(calls) == 1:
+            raise RetryAfter(timedelta(seconds=0.01))
+        return 'ok'
+
+    async def scenario():
+        limiter = TokenBucketRateLimiter(max_retries=1)
+        assert await limiter.process_request(callback, (), {}, 'sendMessage', {'chat_id': '5'}, None) == 'ok'
+        assert limiter.retries == 1
+        calls.clear()
+        with pytest.raises(RetryAfter):
+            await limiter.process_request(callback, (), {}, 'sendMessage', {'chat_id': 6}, 0)
+
+    asyncio.run(scenario())
+    assert len(calls) == 1
@@ -0,0 +1,95 @@
+import asyncio
+import json
+
+import pytest
+
+from redis_helper import AsyncRedisHelper, RedisHelper, bans_key, legacy_bans_key
+
+fakeredis = pytest.importorskip('fakeredis')
+
+
+@pytest.fixture
+def helper():
+    return RedisHelper(fakeredis.FakeRedis(decode_responses=True))
+
+
+def test_add_and_remove(helper):
+    assert helper.add_character_to_bans_list(1, 'Alice') == 1
+    assert helper.add_character_to_bans_list(1, 'Alice') == 1
+    assert helper.add_character_to_bans_list(1, 'Achilles') == 2
+    assert helper.get_bans_list(1) == ['Achilles', 'Alice']
+    assert helper.remove_character_from_bans_list(1, 'Alice') == 1
+    assert helper.remove_character_from_bans_list(1, 'Nobody') == 1
+    assert helper.get_bans_list(2) == []
+
+
+def test_toggle_and_flags(helper):
+    assert helper.toggle_character_ban(1, 'Alice') is True
+    assert helper.is_character_banned(1, 'Alice')
+    assert helper.get_banned_flags(1, ['Alice', 'Achilles']) == [True, False]
+    assert helper.get_banned_flags(1, []) == []
+    assert helper.toggle_character_ban(1, 'Alice') is False
+    assert not helper.is_character_banned(1, 'Alice')
+
+
+def test_set_and_clear(helper):
+    helper.set_bans_list(1, ['Alice', 'Achilles'])
+    helper.set_bans_list(1, ['Angel'])
+    assert helper.get_bans_list(1) == ['Angel']
+    helper.set_bans_list(1, [])
+    assert helper.get_bans_list(1) == []
+    helper.add_character_to_bans_list(1, 'Alice')
+    helper.clear_bans_list(1)
+    assert helper.get_bans_list(1) == []
+
+
+def test_migrate_legacy_bans(helper):
+    helper.redis.set(legacy_bans_key(7), json.dumps(['Alice', 'Achilles']))
+    assert helper.migrate_legacy_bans() == 1
+    assert helper.redis.get(legacy_bans_key(7)) is None
+    assert helper.redis.smembers(bans_key(7)) == {'Alice', 'Achilles'}
+    assert helper.migrate_legacy_bans() == 0
+
+
+def test_cached_result(helper):
+    assert helper.get_cached_result('key') is None
+    helper.set_cached_result('key', [['Alice', 0.5]], ttl=60)
+    assert helper.get_cached_result('key') == [['Alice', 0.5]]
+    assert 0 < helper.redis.ttl('result_cache:key') <= 60
+
+
+def test_async_helper_matches_sync():
+    async def scenario():
+        helper = AsyncRedisHelper(fakeredis.FakeAsyncRedis(decode_responses=True))
+        await helper.redis.set(legacy_bans_key(1), json.dumps(['Angel']))
+        assert await helper.migrate_legacy_bans() == 1
+        assert await helper.add_character_to_bans_list(1, 'Alice') == 2
+        assert await helper.toggle_character_ban(1, 'Achilles') is True
+        assert await helper.get_bans_list(1) == ['Achilles', 'Alice', 'Angel']
+        assert await helper.get_banned_flags(1, ['Alice', 'Buffy']) == [True, False]
+        assert await helper.remove_character_from_bans_list(1, 'Alice') == 2
+        await helper.set_bans_list(1, ['Buffy'])
+        assert await helper.is_character_banned(1, 'Buffy')
+        await helper.set_cached_result('key', {'a': 1}, ttl=60)
+        assert await helper.get_cached_result('key') == {'a': 1}
+        await helper.clear_bans_list(1)
+        assert await helper.get_bans_list(1) == []
+        await helper.close()
+
+    asyncio.run(scenario())
+
+
+def test_async_helper_times_out():
+    class HangingRedis:
+        def register_script(self, script):
+            return None
+
+        async def sismember(self, key, member):
+            await asyncio.sleep(10)
+
+    async def scenario():
+        helper = AsyncRedisHelper(HangingRedis(), timeout=0.01)
+        with pytest.raises(asyncio.TimeoutError):
+            await helper.is_character_banned(1, 'Alice')
+
+    asyncio.run(scenario())
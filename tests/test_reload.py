@@ -0,0 +1,105 @@
+import asyncio
+import logging
+from types import SimpleNamespace
+
+import reload
+from reload import DatasetWatcher
+
+
+class StubSystem:
+    def __init__(self, data_path: str):
+        self.data_path = data_path
+        self.version = 'v1'
+        self.loads = 0
+
+    def load_dataset(self, path: str):
+        self.loads += 1
+        return SimpleNamespace(version=f'v{self.loads + 1}')
+
+    def swap_dataset(self, dataset):
+        self.version = dataset.version
+
+
+class FakePubSub:
+    def __init__(self, messages: asyncio.Queue):
+        self.messages = messages
+
+    async def subscribe(self, channel: str):
+        pass
+
+    async def get_message(self, ignore_subscribe_messages: bool = False, timeout: float = 0.0):
+        assert timeout is not None
+        try:
+            return await asyncio.wait_for(self.messages.get(), timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def aclose(self):
+        pass
+
+
+class FakeRedis:
+    def __init__(self):
+        self.messages = asyncio.Queue()
+
+    def pubsub(self):
+        return FakePubSub(self.messages)
+
+
+async def wait_for_version(system, version: str):
+    for _ in range(200):
+        if system.version == version:
+            return
+        await asyncio.sleep(0.01)
+
+
+def test_idle_channel_is_not_an_error(tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(reload, 'LISTEN_TIMEOUT', 0.01)
+    system = StubSystem(str(tmp_path / 'winrates.json'))
+
+    async def scenario():
+        client = FakeRedis()
+        watcher = DatasetWatcher(system, redis_client=client, poll_interval=0, channel='updates')
+        watcher.start()
+        await asyncio.sleep(0.1)
+        await client.messages.put({'type': 'message', 'data': 'v2'})
+        await wait_for_version(system, 'v2')
+        await watcher.stop()
+
+    with caplog.at_level(logging.WARNING):
+        asyncio.run(scenario())
+    assert system.version == 'v2'
+    assert system.loads == 1
+    assert not caplog.records
+
+
+def test_same_version_signal_is_ignored(tmp_path, monkeypatch):
+    monkeypatch.setattr(reload, 'LISTEN_TIMEOUT', 0.01)
+    system = StubSystem(str(tmp_path / 'winrates.json'))
+
+    async def scenario():
+        client = FakeRedis()
+        watcher = DatasetWatcher(system, redis_client=client, poll_interval=0, channel='updates')
+        watcher.start()
+        await client.messages.put({'type': 'message', 'data': 'v1'})
+        await asyncio.sleep(0.05)
+        await watcher.stop()
+
+    asyncio.run(scenario())
+    assert system.loads == 0
+
+
+def test_files_changed_before_subscribe_reload(tmp_path, monkeypatch):
+    monkeypatch.setattr(reload, 'LISTEN_TIMEOUT', 0.01)
+    json_path = tmp_path / 'winrates.json'
+    system = StubSystem(str(json_path))
+
+    async def scenario():
+        watcher = DatasetWatcher(system, redis_client=FakeRedis(), poll_interval=0, channel='updates')
+        json_path.write_text('{}')
+        watcher.start()
+        await wait_for_version(system, 'v2')
+        await watcher.stop()
+
+    asyncio.run(scenario())
+    assert system.version == 'v2'
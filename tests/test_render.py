@@ -0,0 +1,46 @@
+from callbacks import CallbackCodec
+from render import Renderer
+
+HEROES = ['Achilles', 'Alice', 'Angel', 'Buffy', 'Ciri']
+INDEX = {hero: i for i, hero in enumerate(HEROES)}
+
+
+def button_texts(markup):
+    return [[button.text for button in row] for row in markup.inline_keyboard]
+
+
+def test_ban_keyboard_marks_banned_heroes():
+    renderer = Renderer(CallbackCodec(b'secret'))
+    texts = button_texts(renderer.ban_keyboard('v1', HEROES, 0, 3, [False, True, False]))
+    assert texts[:3] == [['✅ Achilles'], ['🚫 Alice'], ['✅ Angel']]
+    assert texts[3] == ['1/2', '➡️']
+    assert texts[4] == ['Закрыть']
+
+    texts = button_texts(renderer.ban_keyboard('v1', HEROES, 1, 3, [True, False]))
+    assert texts[:2] == [['🚫 Buffy'], ['✅ Ciri']]
+    assert texts[2] == ['⬅️', '2/2']
+
+
+def test_ban_keyboard_reuses_buttons_until_version_changes():
+    renderer = Renderer(CallbackCodec(b'secret'))
+    first = renderer.ban_keyboard('v1', HEROES, 0, 3, [False, False, False])
+    second = renderer.ban_keyboard('v1', HEROES, 0, 3, [True, False, False])
+    assert second.inline_keyboard[1][0] is first.inline_keyboard[1][0]
+    assert second.inline_keyboard[0][0] is not first.inline_keyboard[0][0]
+
+    third = renderer.ban_keyboard('v2', HEROES, 0, 3, [False, False, False])
+    assert third.inline_keyboard[1][0] is not first.inline_keyboard[1][0]
+
+
+def test_counter_list_pages_are_cached():
+    renderer = Renderer(CallbackCodec(b'secret'))
+    ranking = [(hero, 0.6 - i / 100) for i, hero in enumerate(HEROES)]
+    text, markup = renderer.counter_list('v1', INDEX, 'key', ['Medusa'], ranking, 'mean', 1, 2, 3)
+    assert '3. **Angel** - 58.0%' in text
+    assert '4. **Buffy** - 57.0%' in text
+    assert 'Alice' not in text
+    assert button_texts(markup)[2] == ['⬅️', '2/3', '➡️']
+
+    hits = renderer.cache.hits
+    assert renderer.counter_list('v1', INDEX, 'key', ['Medusa'], ranking, 'mean', 1, 2, 3) == (text, markup)
+    assert renderer.cache.hits == hits + 1
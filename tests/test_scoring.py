@@ -0,0 +1,70 @@
+import numpy as np
+import pytest
+
+from matrix import MatchupMatrix
+from scoring import STRATEGIES, get_strategy, pairwise_scores, wilson_bounds, wilson_interval
+
+DATA = {
+    'Alice': {'Bob': {'games': 100, 'percent': 0.6}, 'Carol': {'games': 5, 'percent': 1.0}},
+    'Bob': {'Alice': {'games': 100, 'percent': 0.4}, 'Carol': {'games': 20, 'percent': 0.3}},
+    'Carol': {'Alice': {'games': 5, 'percent': 0.0}, 'Bob': {'games': 20, 'percent': 0.7}},
+}
+
+
+@pytest.fixture
+def matrix():
+    return MatchupMatrix.from_dict(DATA)
+
+
+def test_mean_ignores_small_samples(matrix):
+    team = matrix.indices(['Bob', 'Carol'])
+    assert matrix.score(matrix.hero_index['Alice'], team, 'mean') == pytest.approx(0.6)
+
+
+def test_weighted_by_games(matrix):
+    team = matrix.indices(['Alice', 'Bob'])
+    # Carol: 5 игр против Alice не учитываются, 20 против Bob
+    assert matrix.score(matrix.hero_index['Carol'], team, 'weighted') == pytest.approx(0.7)
+    team = matrix.indices(['Alice', 'Carol'])
+    assert matrix.score(matrix.hero_index['Bob'], team, 'weighted') == pytest.approx((40 + 6) / 120)
+
+
+def test_bayes_shrinks_small_samples(matrix):
+    alice, carol = matrix.hero_index['Alice'], matrix.hero_index['Carol']
+    # 5 из 5 побед с prior 20 игр по 0.5: (5 + 10) / 25
+    assert matrix.score(alice, [carol], 'bayes') == pytest.approx(0.6)
+    # Без игр - prior
+    assert matrix.score(alice, [alice], 'bayes') == pytest.approx(0.5)
+
+
+def test_wilson_is_below_winrate(matrix):
+    alice, bob = matrix.hero_index['Alice'], matrix.hero_index['Bob']
+    low = matrix.score(alice, [bob], 'wilson')
+    assert low == pytest.approx(wilson_interval(0.6, 100)[0])
+    assert 0.5 < low < 0.6
+
+
+def test_wilson_bounds_match_scalar():
+    winrate = np.array([0.0, 0.3, 0.6, 1.0, 0.5])
+    games = np.array([10.0, 20.0, 100.0, 5.0, 0.0])
+    low, high = wilson_bounds(winrate, games)
+    for i in range(len(games)):
+        assert (low[i], high[i]) == pytest.approx(wilson_interval(winrate[i], int(games[i])))
+
+
+@pytest.mark.parametrize('strategy', list(STRATEGIES))
+def test_rank_batch_matches_rank(matrix, strategy):
+    teams = [['Alice'], ['Bob', 'Carol'], []]
+    assert matrix.rank_batch(teams, 3, [[], [], []], strategy) == [matrix.rank(team, 3, (), strategy) for team in teams]
+
+
+def test_pairwise_scores(matrix):
+    scores = pairwise_scores(matrix, 'weighted', columns=matrix.indices(['Carol']))
+    # Матчап Alice-Carol без достаточных игр считается равным
+    assert scores[:, 0].tolist() == pytest.approx([0.5, 0.3, 0.5])
+
+
+def test_unknown_strategy():
+    with pytest.raises(ValueError):
+        get_strategy('median')
+
@@ -0,0 +1,57 @@
+import asyncio
+
+from main import parse_cards, worker
+
+
+def test_parse_cards():
+    texts = ['95\n72%\nMedusa', '12\n8%\nSinbad']
+    assert parse_cards(texts) == {
+        'Medusa': {'games': 95, 'percent': 0.72},
+        'Sinbad': {'games': 12, 'percent': 0.08},
+    }
+
+
+class FakePage:
+    """Вкладка, которая падает на героях из failures заданное число раз"""
+
+    def __init__(self, failures):
+        self.failures = dict(failures)
+        self.reopened = 0
+
+    async def scrape_hero(self, hero):
+        await asyncio.sleep(0)
+        if self.failures.get(hero, 0) > 0:
+            self.failures[hero] -= 1
+            raise RuntimeError('таймаут')
+        return {'Medusa': {'games': 10, 'percent': 0.5}}
+
+    async def open(self):
+        self.reopened += 1
+
+
+def run_workers(pages, heroes, retries):
+    queue = asyncio.Queue()
+    for hero in heroes:
+        queue.put_nowait((hero, 0))
+    data, failed = {}, []
+
+    async def scenario():
+        await asyncio.gather(*(worker(page, queue, data, failed, retries) for page in pages))
+
+    asyncio.run(scenario())
+    return data, failed
+
+
+def test_workers_share_queue_and_retry():
+    pages = [FakePage({'Alice': 1}), FakePage({'Alice': 1})]
+    data, failed = run_workers(pages, ['Alice', 'Achilles', 'Angel', 'Buffy'], retries=3)
+    assert sorted(data) == ['Achilles', 'Alice', 'Angel', 'Buffy']
+    assert failed == []
+    # После ошибки вкладка открывается заново
+    assert sum(page.reopened for page in pages) >= 1
+
+
+def test_hero_fails_after_retries():
+    data, failed = run_workers([FakePage({'Alice': 5})], ['Alice', 'Achilles'], retries=2)
+    assert sorted(data) == ['Achilles']
+    assert failed == ['Alice']
@@ -0,0 +1,74 @@
+import asyncio
+
+import pytest
+
+from session import InMemorySessionStore, RedisSessionStore, create_session_store, new_session
+
+
+def test_memory_store_evicts_oldest():
+    async def scenario():
+        store = InMemorySessionStore(maxsize=2)
+        for user_id in (1, 2):
+            await store.set(user_id, new_session('v1', [user_id]))
+        await store.get(1)
+        await store.set(3, new_session('v1', [3]))
+        assert await store.get(2) is None
+        assert (await store.get(1))['enemy'] == [1]
+        assert len(store) == 2
+        await store.delete(1)
+        assert await store.get(1) is None
+
+    asyncio.run(scenario())
+
+
+def test_memory_store_expires_sessions():
+    async def scenario():
+        store = InMemorySessionStore(ttl=-1)
+        await store.set(1, new_session('v1'))
+        assert await store.get(1) is None
+        assert len(store) == 0
+
+    asyncio.run(scenario())
+
+
+def test_redis_encoding_round_trip():
+    session = new_session('bf64886384ef', [3, 17, 0])
+    encoded = RedisSessionStore._encode(session)
+    assert all(isinstance(value, str) for value in encoded.values())
+    assert RedisSessionStore._decode(encoded) == session
+    assert RedisSessionStore._decode(RedisSessionStore._encode(new_session('v1'))) == new_session('v1')
+
+
+def test_redis_store():
+    fakeredis = pytest.importorskip('fakeredis')
+
+    async def scenario():
+        store = RedisSessionStore(fakeredis.FakeAsyncRedis(decode_responses=True), ttl=60)
+        assert await store.get(1) is None
+        await store.set(1, new_session('v1', [5, 2]))
+        assert await store.get(1) == new_session('v1', [5, 2])
+        assert 0 < await store.redis.ttl('session:1') <= 60
+        await store.delete(1)
+        assert await store.get(1) is None
+
+    asyncio.run(scenario())
+
+
+def test_create_session_store():
+    assert isinstance(create_session_store('memory'), InMemorySessionStore)
+    assert isinstance(create_session_store('redis', redis_client=object()), RedisSessionStore)
+    with pytest.raises(ValueError):
+        create_session_store('sqlite')
+
+
+def test_redis_encoding_keeps_strategy():
+    session = new_session('v1', [1, 2], 'bayes')
+    assert RedisSessionStore._decode(RedisSessionStore._encode(session)) == session
+
+
+def test_redis_encoding_keeps_draft():
+    draft = {'format': 'duel', 'side': 'A', 'history': [12, 40]}
+    session = new_session('v1', [1], 'mean', draft)
+    assert RedisSessionStore._decode(RedisSessionStore._encode(session)) == session
+    session['draft']['history'] = []
+    assert RedisSessionStore._decode(RedisSessionStore._encode(session)) == session
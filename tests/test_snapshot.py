@@ -0,0 +1,62 @@
+import json
+import os
+
+import numpy as np
+import pytest
+
+from matrix import MatchupMatrix
+from snapshot import SnapshotError, read_snapshot, write_snapshot
+
+DATA = {
+    'Alice': {'Bob': {'games': 40, 'percent': 0.55}, 'Carol': {'games': 5, 'percent': 0.8}},
+    'Bob': {'Alice': {'games': 40, 'percent': 0.45}, 'Carol': {'games': 12, 'percent': 0.33}},
+    'Carol': {'Alice': {'games': 5, 'percent': 0.2}, 'Bob': {'games': 12, 'percent': 0.67}},
+}
+
+
+@pytest.fixture
+def paths(tmp_path):
+    json_path = tmp_path / 'winrates.json'
+    json_path.write_text(json.dumps(DATA))
+    matrix = MatchupMatrix.from_json(str(json_path))
+    snapshot_path = tmp_path / 'winrates.bin'
+    write_snapshot(str(snapshot_path), matrix)
+    return str(json_path), str(snapshot_path)
+
+
+def test_round_trip(paths):
+    json_path, snapshot_path = paths
+    expected = MatchupMatrix.from_json(json_path)
+    loaded = MatchupMatrix.from_snapshot(snapshot_path)
+    assert loaded.hero_names == expected.hero_names
+    assert loaded.version == expected.version
+    assert loaded.to_dict() == DATA
+    assert isinstance(loaded.valid_winrate, np.memmap)
+    assert np.array_equal(loaded.valid_winrate, expected.valid_winrate)
+    assert np.array_equal(loaded.valid_count, expected.valid_count)
+    assert loaded.rank(['Carol'], 2) == expected.rank(['Carol'], 2)
+
+
+def test_other_min_games_rebuilds_masks(paths):
+    _, snapshot_path = paths
+    loaded = MatchupMatrix.from_snapshot(snapshot_path, min_games=1)
+    assert not isinstance(loaded.valid_winrate, np.memmap)
+    assert loaded.valid[0, 2]
+
+
+def test_load_prefers_fresh_snapshot(paths):
+    json_path, snapshot_path = paths
+    os.utime(json_path, (0, 0))
+    assert isinstance(MatchupMatrix.load(json_path).winrate, np.memmap)
+    os.utime(snapshot_path, (0, 0))
+    os.utime(json_path, None)
+    assert not isinstance(MatchupMatrix.load(json_path).winrate, np.memmap)
+
+
+def test_corrupted_snapshot(paths, tmp_path):
+    json_path, snapshot_path = paths
+    with open(snapshot_path, 'r+b') as fp:
+        fp.write(b'NOTASNAP')
+    with pytest.raises(SnapshotError):
+        read_snapshot(snapshot_path)
+    assert MatchupMatrix.load(json_path).to_dict() == DATA
@@ -0,0 +1,40 @@
+import os
+
+from main import write_results
+from matrix import MatchupMatrix
+from snapshot import HEADER, MAGIC, snapshot_is_current
+
+DATA = {
+    'Alice': {'Medusa': {'games': 12, 'percent': 0.5833}},
+    'Medusa': {'Alice': {'games': 12, 'percent': 0.4167}},
+}
+
+
+def test_unchanged_dataset_keeps_json(tmp_path):
+    write_results(DATA, str(tmp_path))
+    json_path = tmp_path / 'winrates.json'
+    mtime = os.path.getmtime(json_path)
+    diff = write_results(DATA, str(tmp_path))
+    assert not (diff['added'] or diff['removed'] or diff['changed'])
+    assert os.path.getmtime(json_path) == mtime
+
+
+def test_missing_snapshot_is_written_for_unchanged_dataset(tmp_path):
+    write_results(DATA, str(tmp_path))
+    snapshot_path = tmp_path / 'winrates.bin'
+    snapshot_path.unlink()
+    write_results(DATA, str(tmp_path))
+    matrix = MatchupMatrix.from_json(str(tmp_path / 'winrates.json'))
+    assert snapshot_is_current(str(snapshot_path), matrix.version)
+
+
+def test_old_format_snapshot_is_rewritten(tmp_path):
+    write_results(DATA, str(tmp_path))
+    snapshot_path = tmp_path / 'winrates.bin'
+    version = MatchupMatrix.from_json(str(tmp_path / 'winrates.json')).version
+    # Заголовок снимка версии 1 без доп. секций
+    snapshot_path.write_bytes(HEADER.pack(MAGIC, 1, 0, 0, HEADER.size, 0, 0, 0, version.encode('ascii')))
+    assert not snapshot_is_current(str(snapshot_path), version)
+    write_results(DATA, str(tmp_path))
+    assert snapshot_is_current(str(snapshot_path), version)
+    assert MatchupMatrix.from_snapshot(str(snapshot_path)).to_dict() == DATA